@@ -0,0 +1,45 @@
+"""Trainer inbox composite indexes
+
+Revision ID: 0928d95c6b3a
+Revises: ea52b930dd73
+Create Date: 2026-10-18 10:12:40.114203
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0928d95c6b3a'
+down_revision: Union[str, Sequence[str], None] = 'ea52b930dd73'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+INDEXES = [
+    ("ix_assessment_submissions_inbox", "assessment_submissions", ["is_deleted", "status", "submitted_at", "id"]),
+    ("ix_assessment_submissions_user_inbox", "assessment_submissions", ["user_id", "is_deleted", "submitted_at", "id"]),
+    ("ix_assessment_submissions_task_inbox", "assessment_submissions", ["task_id", "is_deleted", "submitted_at", "id"]),
+    ("ix_assessment_feedback_submission_id", "assessment_feedback", ["submission_id"]),
+]
+
+
+def _existing(table: str) -> set:
+    # create_all() on startup already builds these on a fresh database
+    return {ix["name"] for ix in sa.inspect(op.get_bind()).get_indexes(table)}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for name, table, columns in INDEXES:
+        if name not in _existing(table):
+            op.create_index(name, table, columns)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for name, table, columns in reversed(INDEXES):
+        if name in _existing(table):
+            op.drop_index(name, table_name=table)
@@ -0,0 +1,56 @@
+"""Content-addressed blob store tables
+
+Revision ID: 5b1e9c27a4d0
+Revises: db5e37d1f38b
+Create Date: 2026-10-18 13:21:06.402117
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5b1e9c27a4d0'
+down_revision: Union[str, Sequence[str], None] = 'db5e37d1f38b'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _existing() -> set:
+    # create_all() on startup already builds these on a fresh database
+    return set(sa.inspect(op.get_bind()).get_table_names())
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    tables = _existing()
+    if "file_blobs" not in tables:
+        op.create_table(
+            "file_blobs",
+            sa.Column("sha256", sa.String(64), primary_key=True),
+            sa.Column("size", sa.BigInteger(), nullable=False),
+            sa.Column("ref_count", sa.Integer(), nullable=False, server_default="0"),
+            sa.Column("released_at", sa.DateTime(), nullable=True),
+            sa.Column("created_at", sa.DateTime(), server_default=sa.func.now()),
+            sa.Column("updated_at", sa.DateTime(), server_default=sa.func.now()),
+        )
+    if "blob_refs" not in tables:
+        op.create_table(
+            "blob_refs",
+            sa.Column("path", sa.String(500), primary_key=True),
+            sa.Column("sha256", sa.String(64), sa.ForeignKey("file_blobs.sha256"), nullable=False),
+            sa.Column("created_at", sa.DateTime(), server_default=sa.func.now()),
+            sa.Column("updated_at", sa.DateTime(), server_default=sa.func.now()),
+        )
+        op.create_index("ix_blob_refs_sha256", "blob_refs", ["sha256"])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    tables = _existing()
+    if "blob_refs" in tables:
+        op.drop_table("blob_refs")
+    if "file_blobs" in tables:
+        op.drop_table("file_blobs")
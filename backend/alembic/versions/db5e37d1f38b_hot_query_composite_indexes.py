@@ -0,0 +1,50 @@
+"""Composite indexes for the hot query shapes
+
+Revision ID: db5e37d1f38b
+Revises: 0928d95c6b3a
+Create Date: 2026-10-18 11:03:27.550871
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'db5e37d1f38b'
+down_revision: Union[str, Sequence[str], None] = '0928d95c6b3a'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Kept in step with scripts/benchmark_hot_indexes.py, which measures each of them
+INDEXES = [
+    ("ix_assessment_submissions_attempt", "assessment_submissions",
+     ["user_id", "task_id", "assessment_type", "status", "is_deleted"]),
+    ("ix_quiz_scores_user_course_lesson", "quiz_scores", ["user_id", "course_id", "lesson_id"]),
+    ("ix_question_attempts_user_quiz", "question_attempts", ["user_id", "quiz_id", "attempted_at"]),
+    ("ix_question_attempts_question", "question_attempts", ["question_id", "is_correct"]),
+    ("ix_notifications_recipient_created", "notifications", ["recipient_id", "created_at"]),
+    ("ix_notifications_recipient_unread", "notifications", ["recipient_id", "is_read", "created_at"]),
+    ("ix_trainee_set_mappings_trainee_type", "trainee_set_mappings", ["trainee_id", "assessment_type"]),
+]
+
+
+def _existing(table: str) -> set:
+    # create_all() on startup already builds these on a fresh database
+    return {ix["name"] for ix in sa.inspect(op.get_bind()).get_indexes(table)}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for name, table, columns in INDEXES:
+        if name not in _existing(table):
+            op.create_index(name, table, columns)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for name, table, columns in reversed(INDEXES):
+        if name in _existing(table):
+            op.drop_index(name, table_name=table)
@@ -0,0 +1,121 @@
+"""
+Change-data-capture journal for writes made while running on the SQLite fallback.
+
+When MySQL is configured but the app is writing to the local kmti_icad.db, every
+ORM insert/update/delete on a synced table appends one row to `change_journal`
+inside the same transaction. Bulk `Query.update()` / `Query.delete()` calls are
+expanded to one entry per affected primary key. The sync worker replays pending
+entries to MySQL in order and marks them applied (see sync_worker.replay_change_journal).
+"""
+
+import json
+import logging
+from sqlalchemy import event, insert, select, tuple_
+from sqlalchemy.orm import Session
+
+try:
+    from .database import Base, USE_MYSQL, sqlite_engine, async_sqlite_engine
+    from .models import ChangeJournal
+    from .sync_worker import TABLES_TO_SYNC, encode_row
+except ImportError:
+    from database import Base, USE_MYSQL, sqlite_engine, async_sqlite_engine
+    from models import ChangeJournal
+    from sync_worker import TABLES_TO_SYNC, encode_row
+
+logger = logging.getLogger(__name__)
+
+JOURNALED_TABLES = set(TABLES_TO_SYNC)
+journal_table = ChangeJournal.__table__
+
+
+def journal_enabled(bind) -> bool:
+    """Only local fallback writes are journaled; MySQL writes need no replay."""
+    return USE_MYSQL and bind.engine in (sqlite_engine, async_sqlite_engine.sync_engine)
+
+
+def _snapshot_rows(connection, table, pk_list):
+    """Read the committed-to-be state of the given rows from the current transaction."""
+    if not pk_list:
+        return []
+    pk_cols = list(table.primary_key.columns)
+    if len(pk_cols) == 1:
+        clause = pk_cols[0].in_([pk[pk_cols[0].name] for pk in pk_list])
+    else:
+        clause = tuple_(*pk_cols).in_([tuple(pk[c.name] for c in pk_cols) for pk in pk_list])
+    return [dict(row) for row in connection.execute(select(table).where(clause)).mappings()]
+
+
+def _journal_entries(table, operation, pk_list, rows=None):
+    by_pk = {}
+    for row in rows or []:
+        by_pk[json.dumps(encode_row({c.name: row[c.name] for c in table.primary_key.columns}))] = row
+    entries = []
+    for pk in pk_list:
+        row_pk = json.dumps(encode_row(pk))
+        row = by_pk.get(row_pk)
+        if operation != "delete" and row is None:
+            continue
+        entries.append({
+            "table_name": table.name,
+            "operation": operation,
+            "row_pk": row_pk,
+            "row_data": json.dumps(encode_row(row)) if row is not None else None,
+        })
+    return entries
+
+
+def _write_entries(connection, entries):
+    if entries:
+        connection.execute(insert(journal_table), entries)
+
+
+# ── Unit-of-work flushes (session.add / attribute changes / session.delete) ──
+
+def _on_flush_event(operation):
+    def handler(mapper, connection, target):
+        table = mapper.local_table
+        if table.name not in JOURNALED_TABLES or not journal_enabled(connection):
+            return
+        pk = {col.name: getattr(target, mapper.get_property_by_column(col).key) for col in table.primary_key.columns}
+        rows = None if operation == "delete" else _snapshot_rows(connection, table, [pk])
+        _write_entries(connection, _journal_entries(table, operation, [pk], rows))
+    return handler
+
+
+def register_mapper_events(base):
+    for operation in ("insert", "update", "delete"):
+        event.listen(base, f"after_{operation}", _on_flush_event(operation), propagate=True)
+
+
+# ── Bulk statements (Query.update() / Query.delete()) ────────────────────────
+
+@event.listens_for(Session, "do_orm_execute")
+def _journal_bulk_statement(orm_execute_state):
+    if not (orm_execute_state.is_update or orm_execute_state.is_delete):
+        return None
+    mapper = orm_execute_state.bind_mapper
+    if mapper is None or mapper.local_table.name not in JOURNALED_TABLES:
+        return None
+    session = orm_execute_state.session
+    if not journal_enabled(session.get_bind(mapper)):
+        return None
+
+    table = mapper.local_table
+    pk_cols = list(table.primary_key.columns)
+    pk_query = select(*pk_cols)
+    if orm_execute_state.statement.whereclause is not None:
+        pk_query = pk_query.where(orm_execute_state.statement.whereclause)
+    connection = session.connection(bind_arguments={"mapper": mapper})
+    pk_list = [dict(row) for row in connection.execute(pk_query).mappings()]
+
+    result = orm_execute_state.invoke_statement()
+
+    if orm_execute_state.is_delete:
+        entries = _journal_entries(table, "delete", pk_list)
+    else:
+        entries = _journal_entries(table, "update", pk_list, _snapshot_rows(connection, table, pk_list))
+    _write_entries(connection, entries)
+    return result
+
+
+register_mapper_events(Base)
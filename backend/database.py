@@ -1,6 +1,10 @@
 import os
 import logging
+import threading
+import time
 from sqlalchemy import create_engine, event, text
+from sqlalchemy.exc import DBAPIError, InterfaceError, OperationalError
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 from sqlalchemy.orm import declarative_base
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.pool import QueuePool
@@ -27,26 +31,60 @@ Base = declarative_base()
 
 # Configuration
 USE_MYSQL = os.getenv("USE_MYSQL", "false").lower() == "true"
-SQLITE_URL = f"sqlite:///{os.path.join(APP_PATH, 'kmti_icad.db')}"
-DB_MODE = "sqlite" # Default/Fallback mode
+SQLITE_URL = f"sqlite:///{os.getenv('SQLITE_DB_PATH', os.path.join(APP_PATH, 'kmti_icad.db'))}"
+DB_MODE = "sqlite" # "mysql", "sqlite" (fallback) or "recovering"
+
+# Per-connection tuning for the local fallback DB. WAL lets readers run alongside the
+# writer; synchronous=NORMAL is durable across app crashes in WAL mode (only an OS crash
+# can lose the last commits); busy_timeout makes SQLite wait for the write lock instead
+# of failing immediately with "database is locked".
+SQLITE_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "busy_timeout": int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000")),
+    "cache_size": -64000,     # KiB (negative = size, not pages): 64 MB page cache
+    "mmap_size": 268435456,   # 256 MB memory-mapped reads
+    "temp_store": "MEMORY",
+}
+
+def apply_sqlite_pragmas(dbapi_connection, pragmas: dict = SQLITE_PRAGMAS):
+    cursor = dbapi_connection.cursor()
+    for name, value in pragmas.items():
+        cursor.execute(f"PRAGMA {name}={value}")
+    cursor.close()
 
-# Initialize SQLite engine & session maker
+# Initialize SQLite engine & session maker. Every request thread may hold a reader
+# connection at once, so the pool is sized for the server's worker threads.
 sqlite_engine = create_engine(
     SQLITE_URL, 
+    poolclass=QueuePool,
+    pool_size=int(os.getenv("SQLITE_POOL_SIZE", "20")),
+    max_overflow=20,
     connect_args={"check_same_thread": False}
 )
 
 @event.listens_for(sqlite_engine, "connect")
 def set_sqlite_pragma(dbapi_connection, _connection_record):
-    cursor = dbapi_connection.cursor()
-    cursor.execute("PRAGMA journal_mode=WAL")
-    cursor.close()
+    apply_sqlite_pragmas(dbapi_connection)
 
 SQLiteSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=sqlite_engine)
 
+# Async twin of the SQLite engine for `async def` handlers (aiosqlite runs queries on its
+# own thread, so the event loop keeps serving WebSockets while a write waits for the lock).
+# expire_on_commit=False: lazy refreshes after commit are not possible outside a greenlet.
+async_sqlite_engine = create_async_engine(SQLITE_URL.replace("sqlite://", "sqlite+aiosqlite://", 1))
+
+@event.listens_for(async_sqlite_engine.sync_engine, "connect")
+def set_async_sqlite_pragma(dbapi_connection, _connection_record):
+    apply_sqlite_pragmas(dbapi_connection)
+
+AsyncSQLiteSessionLocal = async_sessionmaker(async_sqlite_engine, autoflush=False, expire_on_commit=False)
+
 # Initialize MySQL engine & session maker (if enabled)
 mysql_engine = None
 MySQLSessionLocal = None
+async_mysql_engine = None
+AsyncMySQLSessionLocal = None
 
 DB_HOST = os.getenv("DB_HOST", "localhost")
 DB_PORT = os.getenv("DB_PORT", "3306")
@@ -72,11 +110,27 @@ if USE_MYSQL:
                 "connect_timeout": 5,
             }
         )
+        # Created before the connection test so a server that is down at startup
+        # can still be switched to once the health monitor sees it recover.
+        MySQLSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=mysql_engine)
+        async_mysql_engine = create_async_engine(
+            f"mysql+aiomysql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}",
+            pool_size=5,
+            max_overflow=10,
+            pool_timeout=5,
+            pool_recycle=1800,
+            pool_pre_ping=True,
+            connect_args={
+                "charset": "utf8",
+                "connect_timeout": 5,
+            }
+        )
+        AsyncMySQLSessionLocal = async_sessionmaker(async_mysql_engine, autoflush=False, expire_on_commit=False)
+
         # Test connection immediately
         with mysql_engine.connect() as conn:
             conn.execute(text("SELECT 1"))
         
-        MySQLSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=mysql_engine)
         DB_MODE = "mysql"
         logger.info(f"[+] Connected to MySQL database at {DB_HOST}")
         try:
@@ -91,24 +145,199 @@ if USE_MYSQL:
 # Expose a default 'engine' variable for migrations and backwards compatibility
 engine = mysql_engine if DB_MODE == "mysql" else sqlite_engine
 
+DB_HEALTH_CHECK_INTERVAL = float(os.getenv("DB_HEALTH_CHECK_INTERVAL", "10"))
+DB_BREAKER_FAILURE_THRESHOLD = int(os.getenv("DB_BREAKER_FAILURE_THRESHOLD", "3"))
+DB_BREAKER_RESET_TIMEOUT = float(os.getenv("DB_BREAKER_RESET_TIMEOUT", "10"))
+_db_mode_lock = threading.Lock()
+DB_MODE_CHANGED_AT = time.time()
+_db_mode_listeners = []
+
+def add_db_mode_listener(callback):
+    """
+    Register callback(old_mode, new_mode), invoked after every DB_MODE switch on the
+    thread that made it. Callbacks must not block (hand work off to a loop/queue).
+    """
+    _db_mode_listeners.append(callback)
+
+def _set_db_mode(new_mode: str) -> bool:
+    """Atomically switch DB_MODE. Returns True if the mode actually changed."""
+    global DB_MODE, DB_MODE_CHANGED_AT
+    with _db_mode_lock:
+        if DB_MODE == new_mode:
+            return False
+        old_mode = DB_MODE
+        DB_MODE = new_mode
+        DB_MODE_CHANGED_AT = time.time()
+    logger.info(f"[*] Database mode changed: {old_mode} -> {new_mode}")
+    for callback in list(_db_mode_listeners):
+        try:
+            callback(old_mode, new_mode)
+        except Exception as e:
+            logger.error(f"DB mode listener failed: {e}")
+    return True
+
+class MySQLCircuitBreaker:
+    """
+    Thread-safe circuit breaker around mysql_engine. Its states map onto DB_MODE:
+
+        closed     ("mysql")       MySQL is used; consecutive connection failures are counted
+        open       ("sqlite")      tripped after failure_threshold failures; requests go straight
+                                   to SQLite without touching the network
+        half_open  ("recovering")  after reset_timeout a single caller may probe MySQL
+
+    All transitions happen under one lock, so concurrent failures trip the breaker
+    once and only one recovery probe can be in flight.
+
+    Failures and successes are recorded both by the health monitor's probes and by
+    every request session on MySQL (get_db/get_async_db), so a request that completes
+    resets the count. Leaving open is up to the probe alone, since requests don't reach
+    MySQL while the breaker is open.
+    """
+
+    STATES = {"mysql": "closed", "sqlite": "open", "recovering": "half_open"}
+
+    def __init__(self, failure_threshold: int = DB_BREAKER_FAILURE_THRESHOLD, reset_timeout: float = DB_BREAKER_RESET_TIMEOUT):
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_timeout = reset_timeout
+        self.consecutive_failures = 0
+        self.opened_at = None
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        return self.STATES[DB_MODE]
+
+    def record_success(self):
+        if self.consecutive_failures:
+            with self._lock:
+                self.consecutive_failures = 0
+
+    def record_failure(self, error: Exception = None) -> bool:
+        """Count a MySQL failure while closed. Returns True if this call tripped the breaker."""
+        with self._lock:
+            if DB_MODE != "mysql":
+                return False
+            self.consecutive_failures += 1
+            if self.consecutive_failures < self.failure_threshold:
+                return False
+            self.consecutive_failures = 0
+            self.opened_at = time.monotonic()
+            logger.warning(f"[!] MySQL circuit breaker tripped after {self.failure_threshold} consecutive failure(s): {error}. Falling back to SQLite.")
+            return _set_db_mode("sqlite")
+
+    def try_half_open(self) -> bool:
+        """Claim the single recovery probe (open -> half_open) once reset_timeout has elapsed."""
+        with self._lock:
+            if DB_MODE != "sqlite":
+                return False
+            if self.opened_at is not None and time.monotonic() - self.opened_at < self.reset_timeout:
+                return False
+            return _set_db_mode("recovering")
+
+    def close(self):
+        """Probe succeeded: half_open -> closed."""
+        with self._lock:
+            self.consecutive_failures = 0
+            self.opened_at = None
+            _set_db_mode("mysql")
+
+    def reopen(self):
+        """Probe failed: half_open -> open, restarting the reset timeout."""
+        with self._lock:
+            self.opened_at = time.monotonic()
+            _set_db_mode("sqlite")
+
+circuit_breaker = MySQLCircuitBreaker()
+
+class DBHealthMonitor:
+    """
+    Background thread that drives the circuit breaker with periodic probes:
+
+        closed     a failed `SELECT 1` counts as a failure, a successful one resets the count
+        open       after the reset timeout the monitor claims the half-open probe
+        half_open  success verifies the schema and closes the breaker; failure reopens it
+
+    Session factories only read DB_MODE; MySQL is probed solely from this thread.
+    """
+
+    def __init__(self, interval: float = DB_HEALTH_CHECK_INTERVAL, breaker: MySQLCircuitBreaker = None):
+        self.interval = interval
+        self.breaker = breaker or circuit_breaker
+        self.last_probe_at = None
+        self.last_probe_ok = None
+        self._wake = threading.Event()
+        self._thread = None
+
+    def probe(self) -> bool:
+        """Run a single `SELECT 1` against MySQL."""
+        if mysql_engine is None:
+            return False
+        self.last_probe_at = time.time()
+        try:
+            with mysql_engine.connect() as conn:
+                conn.execute(text("SELECT 1"))
+            self.last_probe_ok = True
+        except Exception as e:
+            logger.debug(f"MySQL health probe failed: {e}")
+            self.last_probe_ok = False
+        return self.last_probe_ok
+
+    def check_now(self):
+        """Advance the state machine by one step."""
+        if DB_MODE == "mysql":
+            if self.probe():
+                self.breaker.record_success()
+            else:
+                self.breaker.record_failure(Exception("health probe failed"))
+        elif self.breaker.try_half_open():
+            if not self.probe():
+                self.breaker.reopen()
+                return
+            try:
+                Base.metadata.create_all(bind=mysql_engine)
+                logger.info("[+] MySQL tables created/verified successfully on recovery.")
+            except Exception as recovery_err:
+                logger.warning(f"[!] MySQL table creation failed on recovery: {recovery_err}")
+            self.breaker.close()
+            logger.info("[+] MySQL has recovered! Switching database mode to MySQL.")
+
+    def report_failure(self, error: Exception):
+        """Called from the request path when a MySQL connection breaks mid-request."""
+        self.breaker.record_failure(error)
+
+    def _run(self):
+        logger.info("DB health monitor thread started.")
+        while True:
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            try:
+                self.check_now()
+            except Exception as e:
+                logger.error(f"Error in DB health check: {e}")
+
+    def start(self):
+        """Start the monitor thread (idempotent, no-op when MySQL is disabled)."""
+        if not USE_MYSQL or mysql_engine is None:
+            return
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._thread = threading.Thread(target=self._run, daemon=True, name="DBHealthMonitor")
+        self._thread.start()
+
+health_monitor = DBHealthMonitor()
+
+def start_health_monitor():
+    health_monitor.start()
+
+def _is_connection_error(error: Exception) -> bool:
+    return isinstance(error, DBAPIError) and (
+        error.connection_invalidated or isinstance(error, (OperationalError, InterfaceError))
+    )
+
 class DynamicSessionmaker:
     def __call__(self, *args, **kwargs):
-        global DB_MODE
-        if DB_MODE == "sqlite" and USE_MYSQL:
-            check_mysql_recovery()
         if DB_MODE == "mysql" and MySQLSessionLocal is not None:
-            try:
-                db = MySQLSessionLocal(*args, **kwargs)
-                db.execute(text("SELECT 1"))
-                return db
-            except Exception as e:
-                logger.warning(f"[!] MySQL session failed at runtime (DynamicSessionmaker): {e}. Falling back to SQLite.")
-                DB_MODE = "sqlite"
-                try:
-                    if db:
-                        db.close()
-                except Exception:
-                    pass
+            return MySQLSessionLocal(*args, **kwargs)
         return SQLiteSessionLocal(*args, **kwargs)
 
     def configure(self, **kwargs):
@@ -118,62 +347,44 @@ class DynamicSessionmaker:
 
 SessionLocal = DynamicSessionmaker()
 
-import time
-last_mysql_check = 0
-
-def check_mysql_recovery():
-    global DB_MODE, last_mysql_check
-    if USE_MYSQL and DB_MODE == "sqlite" and mysql_engine is not None:
-        now = time.time()
-        if now - last_mysql_check > 10: # Check at most once every 10 seconds
-            last_mysql_check = now
-            try:
-                with mysql_engine.connect() as conn:
-                    conn.execute(text("SELECT 1"))
-                DB_MODE = "mysql"
-                logger.info("[+] MySQL has recovered! Switching database mode to MySQL.")
-                try:
-                    Base.metadata.create_all(bind=mysql_engine)
-                    logger.info("[+] MySQL tables created/verified successfully on recovery.")
-                except Exception as recovery_err:
-                    logger.warning(f"[!] MySQL table creation failed on recovery: {recovery_err}")
-            except Exception:
-                pass
-
 def get_db():
-    global DB_MODE
-    
-    # Check if MySQL has recovered if we're currently down
-    if DB_MODE == "sqlite" and USE_MYSQL:
-        check_mysql_recovery()
-        
-    db = None
-    if DB_MODE == "mysql" and MySQLSessionLocal is not None:
-        try:
-            # pool_pre_ping=True on the engine already pings on checkout;
-            # just open the session and let SQLAlchemy handle dead connections.
-            db = MySQLSessionLocal()
-            # Validate by making a lightweight call
-            db.execute(text("SELECT 1"))
-        except Exception as e:
-            logger.warning(f"[!] MySQL session failed at runtime: {e}. Falling back to SQLite.")
-            DB_MODE = "sqlite"
-            if db:
-                db.close()
-            db = None
-            
-    if db is None:
-        db = SQLiteSessionLocal()
-        
+    # pool_pre_ping=True on the engine already validates connections on checkout;
+    # MySQL availability itself is tracked by the background health monitor.
+    use_mysql = DB_MODE == "mysql" and MySQLSessionLocal is not None
+    db = MySQLSessionLocal() if use_mysql else SQLiteSessionLocal()
     try:
         yield db
     except Exception as e:
+        if use_mysql and _is_connection_error(e):
+            circuit_breaker.record_failure(e)
         db.rollback()
         raise e
+    else:
+        if use_mysql:
+            circuit_breaker.record_success()
     finally:
         db.close()
 
+async def get_async_db():
+    """AsyncSession counterpart of get_db with the same failover semantics."""
+    use_mysql = DB_MODE == "mysql" and AsyncMySQLSessionLocal is not None
+    db = AsyncMySQLSessionLocal() if use_mysql else AsyncSQLiteSessionLocal()
+    try:
+        yield db
+    except Exception as e:
+        if use_mysql and _is_connection_error(e):
+            circuit_breaker.record_failure(e)
+        await db.rollback()
+        raise e
+    else:
+        if use_mysql:
+            circuit_breaker.record_success()
+    finally:
+        await db.close()
+
 def get_db_mode():
     return DB_MODE
 
-
+def get_db_mode_changed_at() -> float:
+    """Unix time of the last DB_MODE switch."""
+    return DB_MODE_CHANGED_AT
@@ -0,0 +1,185 @@
+"""
+Conditional GET for read endpoints whose payload only changes through admin edits.
+
+Each cacheable resource ("courses", "lessons", "quizzes", "tasks") has a version
+counter in this process. Mutation endpoints call bump() after they commit, and a
+DB_MODE switch bumps everything. An endpoint opts in with
+
+    cache: CachedResponse = Depends(conditional_get("quizzes"))
+
+declared before its db/user parameters, and returns cache.respond(build, Model).
+The dependency derives a strong ETag from the request path and the resource
+versions; a matching If-None-Match is answered with 304 straight from the
+dependency, so no session is opened and the user row is not loaded (the bearer
+token is still verified). Otherwise serialized bodies are kept in a bounded LRU,
+keyed by ETag, and build() only runs on a miss.
+
+No endpoint edits courses; their rows only change through the forward sync, which
+bumps the resources of every table it writes (bump_tables()), and through the
+standby replica, whose writes are only served after a failover has bumped
+everything. Scripts that edit the curriculum directly (scripts/seed_curriculum.py,
+ingest_db_lessons.py) cannot bump the counters, so versions also roll over every
+HTTP_CACHE_MAX_AGE seconds.
+"""
+
+import os
+import time
+import uuid
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Callable, Optional
+
+from fastapi import HTTPException, Request, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from jose import JWTError
+from pydantic import TypeAdapter
+
+try:
+    from .database import add_db_mode_listener
+    from .auth.security import decode_token
+except ImportError:
+    from database import add_db_mode_listener
+    from auth.security import decode_token
+
+HTTP_CACHE_MAX_ENTRIES = int(os.getenv("HTTP_CACHE_MAX_ENTRIES", "256"))
+HTTP_CACHE_MAX_AGE = float(os.getenv("HTTP_CACHE_MAX_AGE", "300"))
+
+# Counters restart at zero with the process; the epoch keeps old ETags from matching
+_EPOCH = uuid.uuid4().hex
+_versions = {"*": 0}
+_versions_lock = threading.Lock()
+
+
+def bump(*resources: str):
+    """Invalidate every cached response built from these resources."""
+    with _versions_lock:
+        for resource in resources:
+            _versions[resource] = _versions.get(resource, 0) + 1
+
+
+# Cached resources built from each table, for writers that work by table name
+TABLE_RESOURCES = {
+    "courses": "courses",
+    "lessons": "lessons",
+    "lesson_contents": "lessons",
+    "quizzes": "quizzes",
+    "questions": "quizzes",
+}
+
+
+def bump_tables(*table_names: str):
+    """bump() the resources served from these tables; other tables are ignored."""
+    bump(*{TABLE_RESOURCES[name] for name in table_names if name in TABLE_RESOURCES})
+
+
+def bump_all():
+    bump("*")
+    _bodies.clear()
+
+
+def version(resource: str) -> int:
+    return _versions.get(resource, 0)
+
+
+def if_none_match(header: Optional[str], etag: str) -> bool:
+    """True when an If-None-Match header value matches etag (weak comparison)."""
+    if not header:
+        return False
+    tags = [tag.strip() for tag in header.split(",")]
+    return "*" in tags or etag in [tag[2:] if tag.startswith("W/") else tag for tag in tags]
+
+
+class BodyLRU:
+    """Serialized response bodies by ETag, least recently used evicted first."""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            body = self._items.get(key)
+            if body is not None:
+                self._items.move_to_end(key)
+            return body
+
+    def put(self, key: str, body: bytes):
+        with self._lock:
+            self._items[key] = body
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_entries:
+                self._items.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+
+    def __len__(self):
+        return len(self._items)
+
+
+_bodies = BodyLRU(HTTP_CACHE_MAX_ENTRIES)
+_adapters = {}
+
+
+def _serialize(payload, model) -> bytes:
+    # Mirrors FastAPI's own response_model serialization, which a returned Response skips
+    if model is None:
+        return JSONResponse(jsonable_encoder(payload)).body
+    adapter = _adapters.get(model)
+    if adapter is None:
+        adapter = _adapters[model] = TypeAdapter(model)
+    return adapter.dump_json(adapter.validate_python(payload, from_attributes=True), by_alias=True)
+
+
+class CachedResponse:
+    def __init__(self, etag: str):
+        self.etag = etag
+
+    @property
+    def headers(self):
+        return {"ETag": self.etag, "Cache-Control": "private, no-cache"}
+
+    def respond(self, build: Callable, model=None) -> Response:
+        """Serve the cached body for this ETag, or build(), serialize and cache it."""
+        body = _bodies.get(self.etag)
+        if body is None:
+            body = _serialize(build(), model)
+            _bodies.put(self.etag, body)
+        return Response(content=body, media_type="application/json", headers=self.headers)
+
+
+def _has_valid_token(request: Request) -> bool:
+    scheme, _, token = request.headers.get("authorization", "").partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return False
+    try:
+        return decode_token(token).get("sub") is not None
+    except JWTError:
+        return False
+
+
+def conditional_get(*resources: str, authenticated: bool = True):
+    """
+    Dependency factory for a GET endpoint whose body depends only on its URL and on
+    the given resources. With authenticated=True a 304 is only sent to requests
+    carrying a valid bearer token; anything else falls through to the endpoint's
+    own auth.
+    """
+    async def dependency(request: Request) -> CachedResponse:
+        bucket = int(time.time() // HTTP_CACHE_MAX_AGE)
+        key = "|".join([_EPOCH, str(bucket), request.url.path, request.url.query]
+                       + [f"{r}:{version(r)}" for r in ("*",) + resources])
+        cached = CachedResponse('"' + hashlib.sha1(key.encode()).hexdigest()[:24] + '"')
+        if if_none_match(request.headers.get("if-none-match"), cached.etag):
+            if not authenticated or _has_valid_token(request):
+                raise HTTPException(status_code=304, headers=cached.headers)
+        return cached
+
+    return dependency
+
+
+add_db_mode_listener(lambda old_mode, new_mode: bump_all())
@@ -10,7 +10,9 @@ from fastapi import FastAPI, Depends
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from sqlalchemy.orm import Session
-from .database import engine, Base, get_db, get_db_mode
+from .database import engine, sqlite_engine, Base, get_db, get_db_mode, start_health_monitor, add_db_mode_listener, circuit_breaker
+from . import change_journal  # registers the SQLite fallback change-journal hooks
+from .query_counter import QueryCounterMiddleware
 from .routers import auth, admin, lessons, quizzes, assessments
 from fastapi.exceptions import RequestValidationError
 from fastapi.responses import JSONResponse
@@ -20,6 +22,9 @@ import json
 # Create database tables on startup (only if SQLite, or MySQL is ready)
 try:
     Base.metadata.create_all(bind=engine)
+    # The local fallback DB must always carry the full schema (incl. change_journal)
+    if engine is not sqlite_engine:
+        Base.metadata.create_all(bind=sqlite_engine)
     
     # Auto-migration for trainee_set_mappings assessment_type column
     from sqlalchemy import text, inspect
@@ -35,6 +40,9 @@ try:
 except Exception as e:
     print(f"[!] Warning: Could not create tables or run startup migrations: {e}")
 
+# Background MySQL health monitor (owns DB_MODE switching; no-op in SQLite-only mode)
+start_health_monitor()
+
 app = FastAPI(title="KMTI iCAD Hub API")
 
 # Enable CORS for Electron app and dev servers
@@ -58,12 +66,53 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-DB-Queries", "X-DB-Time-ms"],
 )
 
 from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.concurrency import run_in_threadpool
 from backend.websocket_manager import notification_manager
 import asyncio
 
+# Push DB failover/recovery to connected clients instead of having them poll /system/status.
+# Mode switches happen on worker threads, so the broadcast is handed to the server's loop.
+_main_loop = None
+
+@app.on_event("startup")
+async def _capture_event_loop():
+    global _main_loop
+    _main_loop = asyncio.get_running_loop()
+
+def _backfill_progress_snapshots():
+    from .database import SessionLocal
+    from .services.progress_service import ensure_trainee_snapshots
+    try:
+        with SessionLocal() as db:
+            backfilled = ensure_trainee_snapshots(db)
+            db.commit()
+        if backfilled:
+            print(f"[+] Backfilled progress snapshots for {backfilled} trainee(s).")
+    except Exception as e:
+        print(f"[!] Warning: Could not backfill progress snapshots: {e}")
+
+# Trainees from before the progress snapshot table get their rows once at startup, not on
+# import; the Performance Directory only reads them (scripts/rebuild_progress_snapshots.py redoes all)
+@app.on_event("startup")
+async def _startup_backfill_progress_snapshots():
+    await run_in_threadpool(_backfill_progress_snapshots)
+
+def _broadcast_db_mode_change(old_mode: str, new_mode: str):
+    if _main_loop is None or _main_loop.is_closed():
+        return
+    asyncio.run_coroutine_threadsafe(notification_manager.broadcast({
+        "event": "DB_MODE_CHANGED",
+        "db_mode": new_mode,
+        "previous_mode": old_mode,
+        "nas_reachable": new_mode == "mysql",
+    }), _main_loop)
+
+add_db_mode_listener(_broadcast_db_mode_change)
+
 class GlobalRefreshMiddleware(BaseHTTPMiddleware):
     async def dispatch(self, request: Request, call_next):
         response = await call_next(request)
@@ -75,6 +124,8 @@ class GlobalRefreshMiddleware(BaseHTTPMiddleware):
         return response
 
 app.add_middleware(GlobalRefreshMiddleware)
+# Outermost, so the headers cover every query the request causes
+app.add_middleware(QueryCounterMiddleware)
 
 @app.exception_handler(RequestValidationError)
 async def validation_exception_handler(request: Request, exc: RequestValidationError):
@@ -100,6 +151,7 @@ def get_system_status(db: Session = Depends(get_db)):
         "status": "online",
         "db_mode": get_db_mode(),
         "nas_reachable": get_db_mode() == "mysql",
+        "circuit_state": circuit_breaker.state,
         "version": "1.0.0"
     }
 
@@ -113,7 +165,7 @@ if os.path.exists(assets_path):
 else:
     print(f"[!] Warning: Static assets path not found: {assets_path}")
 
-from .routers import auth, admin, lessons, quizzes, assessments, notifications, settings, tts
+from .routers import auth, admin, lessons, quizzes, assessments, notifications, settings, tts, uploads
 
 # Include Modular Routers
 app.include_router(auth.router, prefix="/api/v1")
@@ -124,6 +176,7 @@ app.include_router(assessments.router, prefix="/api/v1")
 app.include_router(notifications.router, prefix="/api/v1")
 app.include_router(settings.router, prefix="/api/v1")
 app.include_router(tts.router, prefix="/api/v1")
+app.include_router(uploads.router, prefix="/api/v1")
 
 @app.get("/")
 def read_root():
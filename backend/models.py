@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, Boolean, text, ForeignKey, Text
+from sqlalchemy import Column, Integer, BigInteger, String, Float, DateTime, Boolean, text, ForeignKey, Text, Index
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 try:
@@ -44,6 +44,11 @@ class QuizScore(Base):
     completed_at = Column(DateTime, nullable=True) # Time of best score
     first_attempt_at = Column(DateTime, nullable=True)
 
+    # One best-score row per (user, course, lesson); quiz submit looks it up on all three
+    __table_args__ = (
+        Index("ix_quiz_scores_user_course_lesson", "user_id", "course_id", "lesson_id"),
+    )
+
 class MediaMetadata(Base):
     """Links Excel knowledge base entries to multimedia assets"""
     __tablename__ = "media_metadata"
@@ -198,6 +203,11 @@ class QuestionAttempt(Base):
     seconds_spent = Column(Integer, default=0) # Time taken to answer
     attempted_at = Column(DateTime, default=func.now())
 
+    __table_args__ = (
+        Index("ix_question_attempts_user_quiz", "user_id", "quiz_id", "attempted_at"),
+        Index("ix_question_attempts_question", "question_id", "is_correct"),
+    )
+
 
 
 class AssessmentTask(Base):
@@ -239,12 +249,21 @@ class AssessmentSubmission(Base):
     task = relationship("AssessmentTask", back_populates="submissions")
     feedback = relationship("AssessmentFeedback", back_populates="submission", cascade="all, delete-orphan")
 
+    # Trainer inbox keyset pagination: newest first on (submitted_at, id) per filter
+    __table_args__ = (
+        Index("ix_assessment_submissions_inbox", "is_deleted", "status", "submitted_at", "id"),
+        Index("ix_assessment_submissions_user_inbox", "user_id", "is_deleted", "submitted_at", "id"),
+        Index("ix_assessment_submissions_task_inbox", "task_id", "is_deleted", "submitted_at", "id"),
+        # submit_task: the trainee's pending attempts for one task
+        Index("ix_assessment_submissions_attempt", "user_id", "task_id", "assessment_type", "status", "is_deleted"),
+    )
+
 class AssessmentFeedback(Base):
     """Detailed feedback for a submission, including Excel checkback"""
     __tablename__ = "assessment_feedback"
 
     id = Column(Integer, primary_key=True, index=True)
-    submission_id = Column(Integer, ForeignKey("assessment_submissions.id", ondelete="CASCADE"), nullable=False)
+    submission_id = Column(Integer, ForeignKey("assessment_submissions.id", ondelete="CASCADE"), nullable=False, index=True)
     checkback_file_path = Column(String(500)) # Path to Excel checkback file
     comments = Column(Text)
     trainee_reply = Column(Text, nullable=True)
@@ -280,6 +299,10 @@ class TraineeSetMapping(Base):
     trainee = relationship("User", foreign_keys=[trainee_id])
     trainer = relationship("User", foreign_keys=[trainer_id])
 
+    __table_args__ = (
+        Index("ix_trainee_set_mappings_trainee_type", "trainee_id", "assessment_type"),
+    )
+
 class Notification(Base):
     """System notifications for users (e.g. Trainers notified of submissions)"""
     __tablename__ = "notifications"
@@ -295,6 +318,12 @@ class Notification(Base):
     recipient = relationship("User", foreign_keys=[recipient_id])
     sender = relationship("User", foreign_keys=[sender_id])
 
+    # Bell list (newest first) and the unread badge / read-all update
+    __table_args__ = (
+        Index("ix_notifications_recipient_created", "recipient_id", "created_at"),
+        Index("ix_notifications_recipient_unread", "recipient_id", "is_read", "created_at"),
+    )
+
 
 class QueryCache(Base):
     """Semantic search query cache for AI Instructor responses"""
@@ -308,3 +337,75 @@ class QueryCache(Base):
     created_at = Column(DateTime, default=func.now())
     expires_at = Column(DateTime, index=True)
 
+
+
+class ChangeJournal(Base):
+    """Append-only log of writes made to the SQLite fallback, replayed to MySQL by the sync worker"""
+    __tablename__ = "change_journal"
+
+    id = Column(Integer, primary_key=True, index=True)
+    table_name = Column(String(100), nullable=False, index=True)
+    operation = Column(String(10), nullable=False)  # "insert", "update", "delete"
+    row_pk = Column(String(500), nullable=False)    # JSON-encoded primary key values
+    row_data = Column(Text, nullable=True)          # JSON snapshot of the row after the change (None for deletes)
+    created_at = Column(DateTime, default=func.now())
+    applied_at = Column(DateTime, nullable=True, index=True)  # Set once replayed to MySQL
+
+
+class SyncWatermark(Base):
+    """Per-table high-watermark of rows already pushed from SQLite to MySQL (local DB only)"""
+    __tablename__ = "sync_watermarks"
+
+    table_name = Column(String(100), primary_key=True)
+    last_id = Column(Integer, nullable=True)        # Highest integer primary key synced
+    last_time = Column(DateTime, nullable=True)     # Highest updated_at / submitted_at synced
+    synced_at = Column(DateTime, nullable=True)
+
+
+class TraineeProgressSnapshot(Base):
+    """Per-trainee progress counters, refreshed in the same transaction as the writes that change them"""
+    __tablename__ = "trainee_progress_snapshot"
+
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    # Course quizzes (course_id "1" = 3D Modeling, "2" = 2D Drawing)
+    passed_3d = Column(Integer, default=0, nullable=False)
+    passed_2d = Column(Integer, default=0, nullable=False)
+    quizzes_taken = Column(Integer, default=0, nullable=False)
+    average_score = Column(Float, default=0.0, nullable=False)
+    mastery_index = Column(Float, default=0.0, nullable=False)  # Weighted Mastery Index
+    # Practical assessments
+    submissions_approved = Column(Integer, default=0, nullable=False)
+    submissions_pending = Column(Integer, default=0, nullable=False)
+    submissions_rejected = Column(Integer, default=0, nullable=False)
+    submissions_total = Column(Integer, default=0, nullable=False)
+    assigned_sets = Column(Integer, default=0, nullable=False)
+    completed_3d_sets = Column(Integer, default=0, nullable=False)
+    completed_2d_sets = Column(Integer, default=0, nullable=False)
+    # Most recent activity (fallback when the realtime tracker has nothing)
+    last_quiz_at = Column(DateTime, nullable=True)
+    last_quiz_lesson_id = Column(String(100), nullable=True)
+    last_submission_at = Column(DateTime, nullable=True)
+    last_submission_task_id = Column(Integer, nullable=True)
+    updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
+
+
+class FileBlob(Base):
+    """One stored file in the content-addressed upload store, named by its SHA-256"""
+    __tablename__ = "file_blobs"
+
+    sha256 = Column(String(64), primary_key=True)
+    size = Column(BigInteger, nullable=False)
+    ref_count = Column(Integer, default=0, nullable=False)  # blob_refs pointing here, recounted on every link/release
+    released_at = Column(DateTime, nullable=True)           # UTC time ref_count last dropped to 0
+    created_at = Column(DateTime, default=func.now())
+    updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
+
+
+class BlobRef(Base):
+    """Maps a stored file path (as kept in master/submission/checkback path columns) to its blob"""
+    __tablename__ = "blob_refs"
+
+    path = Column(String(500), primary_key=True)
+    sha256 = Column(String(64), ForeignKey("file_blobs.sha256"), nullable=False, index=True)
+    created_at = Column(DateTime, default=func.now())
+    updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
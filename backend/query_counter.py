@@ -0,0 +1,144 @@
+"""
+Per-request query counter and N+1 detector.
+
+Cursor-execute hooks on every Engine (sync, async and the test engines alike) add
+each statement to the QueryStats of the current request, found through a
+contextvar. Outside a request (background threads, scripts) the hooks do nothing.
+
+QueryCounterMiddleware opens the scope for every HTTP request, reports the totals
+so far as X-DB-Queries / X-DB-Time-ms headers when the response starts and, once
+the body is sent, logs requests (streamed bodies included) that exceed the query
+budget or repeat one statement shape often enough to be an N+1 loop.
+Tests can read the headers, or wrap any block in count_queries().
+"""
+
+import os
+import re
+import time
+import logging
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+logger = logging.getLogger(__name__)
+
+DB_QUERY_BUDGET = int(os.getenv("DB_QUERY_BUDGET", "50"))
+DB_TIME_BUDGET_MS = float(os.getenv("DB_TIME_BUDGET_MS", "500"))
+N_PLUS_ONE_THRESHOLD = int(os.getenv("N_PLUS_ONE_THRESHOLD", "10"))
+
+_WHITESPACE = re.compile(r"\s+")
+# Expanded IN lists differ in length per call but are the same statement shape
+_PLACEHOLDER_LIST = re.compile(r"\((?:\s*(?:\?|%s|%\(\w+\)s|:\w+)\s*,)+\s*(?:\?|%s|%\(\w+\)s|:\w+)\s*\)")
+
+
+def statement_shape(statement: str) -> str:
+    """Normalise a SQL string so repeated executions with different parameters compare equal."""
+    shape = _WHITESPACE.sub(" ", statement).strip()
+    return _PLACEHOLDER_LIST.sub("(?)", shape)
+
+
+class QueryStats:
+    """Statement count, total DB time and per-shape counts for one scope."""
+
+    def __init__(self):
+        self.count = 0
+        self.time_ms = 0.0
+        self.shapes = Counter()
+
+    def record(self, statement: str, elapsed_ms: float):
+        self.count += 1
+        self.time_ms += elapsed_ms
+        self.shapes[statement_shape(statement)] += 1
+
+    def repeated(self, threshold: int = None):
+        """[(shape, times)] for statement shapes run at least threshold times, most frequent first."""
+        threshold = threshold or N_PLUS_ONE_THRESHOLD
+        return [(shape, n) for shape, n in self.shapes.most_common() if n >= threshold]
+
+    def over_budget(self, max_queries: int = None, max_time_ms: float = None) -> bool:
+        max_queries = max_queries or DB_QUERY_BUDGET
+        max_time_ms = max_time_ms or DB_TIME_BUDGET_MS
+        return self.count > max_queries or self.time_ms > max_time_ms
+
+
+_current_stats: ContextVar[Optional[QueryStats]] = ContextVar("db_query_stats", default=None)
+
+
+@contextmanager
+def count_queries():
+    """Count every statement executed in this context (and threads/tasks spawned from it)."""
+    stats = QueryStats()
+    token = _current_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _current_stats.reset(token)
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current_stats.get() is not None:
+        conn.info.setdefault("query_started_at", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current_stats.get()
+    if stats is None:
+        return
+    started = conn.info.get("query_started_at")
+    if not started:
+        return
+    stats.record(statement, (time.perf_counter() - started.pop()) * 1000)
+
+
+@event.listens_for(Engine, "handle_error")
+def _handle_error(exception_context):
+    # A failed statement never reaches after_cursor_execute; drop its start time
+    conn = exception_context.connection
+    if conn is not None and _current_stats.get() is not None:
+        started = conn.info.get("query_started_at")
+        if started:
+            started.pop()
+
+
+def report(label: str, stats: QueryStats):
+    """Log budget overruns and N+1 patterns for a finished scope."""
+    if stats.over_budget():
+        logger.warning(
+            f"[!] {label}: {stats.count} queries / {stats.time_ms:.1f} ms exceeds budget "
+            f"({DB_QUERY_BUDGET} queries / {DB_TIME_BUDGET_MS:.0f} ms)"
+        )
+    for shape, times in stats.repeated():
+        logger.warning(f"[!] {label}: possible N+1, same statement ran {times}x: {shape[:200]}")
+
+
+class QueryCounterMiddleware:
+    """Plain ASGI middleware, so the count scope also covers a streamed body."""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_counts(message: Message):
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                headers["X-DB-Queries"] = str(stats.count)
+                headers["X-DB-Time-ms"] = f"{stats.time_ms:.1f}"
+            await send(message)
+
+        with count_queries() as stats:
+            try:
+                await self.app(scope, receive, send_with_counts)
+            finally:
+                report(f"{scope['method']} {scope['path']}", stats)
@@ -1,11 +1,14 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
-from sqlalchemy import func, cast, Integer
-from typing import List
+from sqlalchemy import func, cast, Integer, select
+from typing import List, Optional
 import io
 import csv
 import json
+import itertools
+import tempfile
 from datetime import datetime
+from fastapi.encoders import jsonable_encoder
 from fastapi.responses import StreamingResponse
 
 from ...database import get_db
@@ -17,17 +20,44 @@ from ...schemas import (
     LessonContentCreate, LessonContentResponse
 )
 from ...auth.dependencies import require_role
-from ...services.progress_service import calculate_all_trainee_progress
+from ...services.progress_service import refresh_trainee_snapshot, page_trainee_progress, iter_trainee_progress
+from ...http_cache import bump
 
 router = APIRouter()
 
 @router.get("/progress")
 def get_all_trainee_progress(
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+    sort: str = "id",  # "id", "mastery" or "-mastery" (Weighted Mastery Index)
+    trainer_id: Optional[int] = None,
+    course: Optional[str] = None,  # "1"/"3D_Modeling" or "2"/"2D_Drawing"
+    min_score: Optional[float] = None,
+    max_score: Optional[float] = None,
+    inactive_since: Optional[datetime] = None,
+    stream: bool = False,
     db: Session = Depends(get_db),
     admin: User = Depends(require_role("admin"))
 ):
-    """Get aggregated and detailed progress for all trainees"""
-    return calculate_all_trainee_progress(db)
+    """
+    Get aggregated and detailed progress for all trainees.
+
+    With limit (and the next_cursor of the previous page) returns {"items", "next_cursor"};
+    with stream=true returns NDJSON, one trainee per line; otherwise a plain array.
+    """
+    filters = dict(
+        trainer_id=trainer_id, course_id=course, min_score=min_score,
+        max_score=max_score, inactive_since=inactive_since,
+    )
+    if stream:
+        rows = iter_trainee_progress(db, cursor=cursor, sort=sort, **filters)
+        return StreamingResponse(
+            (json.dumps(jsonable_encoder(row)) + "\n" for row in rows),
+            media_type="application/x-ndjson"
+        )
+    if limit is not None or cursor is not None:
+        return page_trainee_progress(db, limit=limit or 50, cursor=cursor, sort=sort, **filters)
+    return list(iter_trainee_progress(db, sort=sort, **filters))
 
 
 @router.post("/reopen-assessment")
@@ -68,6 +98,7 @@ def reopen_assessment(
         user_id=admin.id
     )
     db.add(log_entry)
+    refresh_trainee_snapshot(db, user_id)
     db.commit()
     
     # Update progress milestones
@@ -120,6 +151,7 @@ def reopen_all_assessments(
         user_id=admin.id
     )
     db.add(log_entry)
+    refresh_trainee_snapshot(db, user_id)
     db.commit()
     
     # Update progress milestones
@@ -183,6 +215,7 @@ def close_all_assessments(
         user_id=admin.id
     )
     db.add(log_entry)
+    refresh_trainee_snapshot(db, user_id)
     db.commit()
     
     # Update progress milestones
@@ -197,72 +230,110 @@ def close_all_assessments(
     return {"message": f"Assessments have been marked as completed for user {user_id}"}
 
 
+EXPORT_PROGRESS_HEADER = [
+    "Trainee Username", "Full Name", "Course ID", "Status",
+    "Progress %", "Highest Quiz Score", "Last Activity"
+]
+XLSX_MEDIA_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+
+def _progress_export_query(user_id: int = None):
+    """One joined query: every UserProgress row with its user and the best score for that course."""
+    best = (
+        select(QuizScore.user_id, QuizScore.course_id, func.max(QuizScore.score).label("best_score"))
+        .group_by(QuizScore.user_id, QuizScore.course_id)
+        .subquery()
+    )
+    query = (
+        select(
+            User.username, User.full_name, UserProgress.course_id, UserProgress.progress_percentage,
+            UserProgress.last_accessed, best.c.best_score,
+        )
+        .join(User, UserProgress.user_id == User.id)
+        .outerjoin(best, (best.c.user_id == UserProgress.user_id) & (best.c.course_id == UserProgress.course_id))
+        .order_by(User.id, UserProgress.id)
+    )
+    if user_id:
+        query = query.where(User.id == user_id)
+    return query
+
+
+def _progress_export_values(row):
+    username, full_name, course_id, progress_pct, last_act, best_score = row
+    progress_pct = progress_pct or 0
+    status = "Completed" if progress_pct >= 100 else "In Progress"
+    return username, full_name, course_id, status, progress_pct, best_score or 0, last_act
+
+
+def _csv_lines(rows):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    def line(values):
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerow(values)
+        return buffer.getvalue()
+
+    yield line(EXPORT_PROGRESS_HEADER)
+    for row in rows:
+        username, full_name, course_id, status, progress_pct, best_score, last_act = row
+        yield line([username, full_name, course_id, status, f"{progress_pct}%", f"{best_score}%", last_act])
+
+
+def _xlsx_file(rows):
+    """Build the workbook in openpyxl write-only mode into a temp file; rows never pile up in memory."""
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet("Progress")
+    sheet.append(EXPORT_PROGRESS_HEADER)
+    for row in rows:
+        sheet.append(list(row))
+    spool = tempfile.TemporaryFile()
+    workbook.save(spool)
+    spool.seek(0)
+    return spool
+
+
+def _file_chunks(spool, chunk_size: int = 64 * 1024):
+    try:
+        while chunk := spool.read(chunk_size):
+            yield chunk
+    finally:
+        spool.close()
+
+
 @router.get("/export/progress")
 def export_trainee_progress(
     user_id: int = None,
+    export_format: str = Query("csv", alias="format", pattern="^(csv|xlsx)$"),
     db: Session = Depends(get_db),
     admin: User = Depends(require_role("employee"))
 ):
-    """Export granular trainee progress data as CSV"""
-    # Optimized query: Fetch progress and join with users
-    query = db.query(UserProgress, User)\
-        .join(User, UserProgress.user_id == User.id)
-        
-    if user_id:
-        query = query.filter(User.id == user_id)
-        
-    results = query.all()
-    
-    if not results and user_id:
+    """Export granular trainee progress data as CSV (streamed row by row) or XLSX"""
+    # stream_results: rows are pulled from the database as the response is written
+    result = db.execute(_progress_export_query(user_id).execution_options(stream_results=True, yield_per=500))
+    first = next(iter(result), None)
+
+    if first is None:
+        result.close()
+        if not user_id:
+            raise HTTPException(status_code=404, detail="No progress data found to export")
         # If no progress entries, at least check if user exists
         user = db.query(User).filter(User.id == user_id).first()
         if not user:
             raise HTTPException(status_code=404, detail="User not found")
         # Generate results for user with no progress
-        results = [(None, user)]
-    elif not results:
-        raise HTTPException(status_code=404, detail="No progress data found to export")
-    
-    output = io.StringIO()
-    writer = csv.writer(output)
-    writer.writerow([
-        "Trainee Username", "Full Name", "Course ID", "Status", 
-        "Progress %", "Highest Quiz Score", "Last Activity"
-    ])
-    
-    for progress, user in results:
-        username = user.username
-        full_name = user.full_name
-        course_id = progress.course_id if progress else "N/A"
-        progress_pct = progress.progress_percentage if progress else 0
-        last_act = progress.last_accessed if progress else "N/A"
-        
-        # Get highest quiz score for this user-course pair
-        best_score = 0
-        if progress:
-            best_score = db.query(func.max(QuizScore.score))\
-                .filter(QuizScore.user_id == user.id)\
-                .filter(QuizScore.course_id == progress.course_id).scalar() or 0
-            
-        status = "Completed" if progress_pct >= 100 else "In Progress"
-        
-        writer.writerow([
-            username,
-            full_name,
-            course_id,
-            status,
-            f"{progress_pct}%",
-            f"{best_score}%",
-            last_act
-        ])
-    
-    output.seek(0)
-    filename = f"trainee_granular_report_{user_id if user_id else 'all'}.csv"
-    return StreamingResponse(
-        io.BytesIO(output.getvalue().encode()),
-        media_type="text/csv",
-        headers={"Content-Disposition": f"attachment; filename={filename}"}
-    )
+        rows = iter([(user.username, user.full_name, "N/A", "In Progress", 0, 0, "N/A")])
+    else:
+        rows = (_progress_export_values(row) for row in itertools.chain([first], result))
+
+    filename = f"trainee_granular_report_{user_id if user_id else 'all'}.{export_format}"
+    headers = {"Content-Disposition": f"attachment; filename={filename}"}
+    if export_format == "xlsx":
+        return StreamingResponse(_file_chunks(_xlsx_file(rows)), media_type=XLSX_MEDIA_TYPE, headers=headers)
+    return StreamingResponse(_csv_lines(rows), media_type="text/csv", headers=headers)
 
 
 @router.get("/quizzes", response_model=List[QuizResponse])
@@ -304,6 +375,7 @@ def create_quiz(
     new_quiz = Quiz(**quiz_data.model_dump())
     db.add(new_quiz)
     db.commit()
+    bump("quizzes")
     db.refresh(new_quiz)
     return new_quiz
 
@@ -324,6 +396,7 @@ def update_quiz(
         setattr(quiz, key, value)
     
     db.commit()
+    bump("quizzes")
     db.refresh(quiz)
     return quiz
 
@@ -341,6 +414,7 @@ def delete_quiz(
     
     db.delete(quiz)
     db.commit()
+    bump("quizzes")
     return {"message": "Quiz deleted successfully"}
 
 
@@ -359,6 +433,7 @@ def create_question(
     new_question = Question(quiz_id=quiz_id, **question_data.model_dump())
     db.add(new_question)
     db.commit()
+    bump("quizzes")
     db.refresh(new_question)
     return new_question
 
@@ -379,6 +454,7 @@ def update_question(
         setattr(question, key, value)
     
     db.commit()
+    bump("quizzes")
     db.refresh(question)
     return question
 
@@ -396,6 +472,7 @@ def delete_question(
     
     db.delete(question)
     db.commit()
+    bump("quizzes")
     return {"message": "Question deleted successfully"}
 
 
@@ -414,6 +491,7 @@ def create_lesson(lesson_data: LessonCreate, db: Session = Depends(get_db), admi
     new_lesson = Lesson(**lesson_data.model_dump())
     db.add(new_lesson)
     db.commit()
+    bump("lessons")
     db.refresh(new_lesson)
     return new_lesson
 
@@ -428,6 +506,7 @@ def add_lesson_content(lesson_id: int, content_data: LessonContentCreate, db: Se
     new_content = LessonContent(**content_data.model_dump())
     db.add(new_content)
     db.commit()
+    bump("lessons")
     db.refresh(new_content)
     return new_content
 
@@ -7,10 +7,13 @@ import psutil
 import json
 from datetime import datetime, timedelta
 
-from ...database import get_db
+from ...database import get_db, get_db_mode, sqlite_engine
 from ...models import User, UserProgress, SystemLog, Broadcast
 from ...auth.dependencies import require_role
 from ...rag_engine import rag_engine
+from ...sync_worker import sync_scheduler, pending_journal_counts
+from ...standby_replica import standby_replicator
+from ...services.path_index import path_index
 
 router = APIRouter()
 
@@ -146,3 +149,22 @@ def delete_broadcast(
     return {"message": "Broadcast deleted successfully"}
 
 
+@router.get("/sync-status")
+def get_sync_status(
+    admin: User = Depends(require_role("admin"))
+):
+    """Per-table SQLite -> MySQL sync metrics (rows, duration, lag, backoff), journal backlog and standby replica lag"""
+    status_data = sync_scheduler.snapshot()
+    with sqlite_engine.connect() as conn:
+        pending = pending_journal_counts(conn)
+    for name, entry in status_data["tables"].items():
+        entry["pending_journal_entries"] = pending.get(name, 0)
+    return {"mode": get_db_mode(), **status_data, "standby": standby_replicator.status()}
+
+
+@router.get("/path-index")
+def get_path_index_stats(
+    admin: User = Depends(require_role("admin"))
+):
+    """Upload root index counters: hits are resolved from memory, misses and scans went to the share"""
+    return path_index.stats()
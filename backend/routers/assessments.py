@@ -1,116 +1,62 @@
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Form, Body
+from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Form, Body, Request, Response, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select, delete, func
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from typing import List, Optional, Union
 import os
 import shutil
 import zipfile
 from datetime import datetime
 from pydantic import BaseModel
 
-from fastapi.responses import FileResponse
-from ..database import get_db, APP_PATH
-from sqlalchemy.orm import joinedload
-from ..models import AssessmentTask, AssessmentSubmission, AssessmentFeedback, TrainerTraineeMapping, User, Notification, TraineeSetMapping, UserActivity
+from ..database import get_db, get_async_db, APP_PATH
+from sqlalchemy.orm import joinedload, selectinload
+from ..models import AssessmentTask, AssessmentSubmission, AssessmentFeedback, TrainerTraineeMapping, User, Notification, TraineeSetMapping, UserActivity, BlobRef
 from ..schemas import (
     AssessmentTaskResponse, AssessmentSubmissionResponse, 
     AssessmentFeedbackResponse, AssessmentSubmissionCreate,
     AssessmentTaskCreate, TrainerTraineeMappingResponse,
     TrainerTraineeMappingCreate, TraineeSetMappingResponse,
-    TraineeSetMappingCreate
+    TraineeSetMappingCreate, AssessmentSubmissionPage
 )
 from .auth import get_current_user
 from ..websocket_manager import notification_manager
 from pathlib import Path
 
-from ..services.storage_service import get_safe_path, handle_task_upload
-from ..services.assessment_service import resequence_set_task_codes
-from ..services.progress_service import calculate_all_trainee_progress
+from ..services.storage_service import (
+    StoredFile, get_safe_path, handle_task_upload, place_task_file, save_upload, staging_path,
+    resolve_master_path, store_blob, link_blob, resolve_blob, release_unreferenced, blob_path,
+)
+from ..services.archive_service import ArchiveEntry, stream_zip, unique_name
+from ..services.assessment_service import resequence_set_task_codes, inbox_conditions, page_trainer_submissions, INBOX_PAGE_MAX
+from ..services.task_catalog import task_catalog
+from ..services.bundle_service import bundle_cache
+from ..services.path_index import path_index
+from ..services.download_service import file_download
+from ..http_cache import if_none_match
+from ..services.progress_service import (
+    calculate_all_trainee_progress, calculate_trainee_dashboard_progress, refresh_trainee_snapshot,
+    refresh_trainee_snapshots, trainees_with_submissions,
+)
 
 router = APIRouter(prefix="/assessments", tags=["Assessments"])
 
-def resolve_master_path(master_file_path: str) -> str:
-    if not master_file_path:
-        return ""
-    
-    # If it's already an absolute path and exists, use it
-    if os.path.isabs(master_file_path) and os.path.exists(master_file_path):
-        return master_file_path
-        
-    base_upload_dir = os.getenv("UPLOAD_DIR", os.path.join(APP_PATH, "uploads"))
-    
-    # Clean relative path prefix
-    rel_path = master_file_path
-    if rel_path.startswith("uploads/"):
-        rel_path = rel_path.replace("uploads/", "", 1)
-    elif rel_path.startswith("uploads\\"):
-        rel_path = rel_path.replace("uploads\\", "", 1)
-        
-    # Build standard full path
-    full_path = os.path.join(base_upload_dir, rel_path)
-    
-    # Check if standard path exists
-    if os.path.exists(full_path):
-        return full_path
-        
-    # If not found, try correcting Units & Tasks <-> Unts & Tasks spelling mismatch
-    if "Units & Tasks" in rel_path:
-        alt_rel_path = rel_path.replace("Units & Tasks", "Unts & Tasks")
-        alt_path = os.path.join(base_upload_dir, alt_rel_path)
-        if os.path.exists(alt_path):
-            return alt_path
-    elif "Unts & Tasks" in rel_path:
-        alt_rel_path = rel_path.replace("Unts & Tasks", "Units & Tasks")
-        alt_path = os.path.join(base_upload_dir, alt_rel_path)
-        if os.path.exists(alt_path):
-            return alt_path
-            
-    return full_path
-
 # --- Trainee Endpoints ---
 
 @router.get("/tasks", response_model=List[AssessmentTaskResponse])
 def get_assessment_tasks(
+    request: Request,
+    response: Response,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    """Get all assessment tasks with sequential locking logic."""
-    tasks = db.query(AssessmentTask).order_by(AssessmentTask.set_number, AssessmentTask.task_code).all()
-    
-    # If user is admin/employee, return all tasks without restriction
-    if current_user.role in ["admin", "employee"]:
-        return tasks
-
-    # Get user's approved submissions
-    approved_set_numbers = db.query(AssessmentTask.set_number).join(
-        AssessmentSubmission, AssessmentTask.id == AssessmentSubmission.task_id
-    ).filter(
-        AssessmentSubmission.user_id == current_user.id,
-        AssessmentSubmission.status == "approved"
-    ).distinct().all()
-    
-    # Mapping Logic
-    from ..models import TraineeSetMapping
-    mappings = db.query(TraineeSetMapping).filter(TraineeSetMapping.trainee_id == current_user.id).all()
-    
-    if mappings:
-        mapping_dict_3d = {m.actual_set_number: abs(m.display_set_number) for m in mappings if m.assessment_type != "2D"}
-        mapping_dict_2d = {m.actual_set_number: abs(m.display_set_number) for m in mappings if m.assessment_type == "2D"}
-        
-        filtered_tasks = []
-        for t in tasks:
-            is_2d = (t.assessment_type == "2D")
-            m_dict = mapping_dict_2d if is_2d else mapping_dict_3d
-            has_mappings_of_type = len(m_dict) > 0
-            
-            if has_mappings_of_type:
-                if t.set_number in m_dict:
-                    filtered_tasks.append(t)
-            else:
-                filtered_tasks.append(t)
-                
-        filtered_tasks.sort(key=lambda x: (x.set_number, x.order))
-        return filtered_tasks
-
+    """Get the assessment tasks visible to the current user, served from the task catalog."""
+    etag, tasks = task_catalog.tasks_for(db, current_user)
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache", "Vary": "Authorization"}
+    if if_none_match(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
     return tasks
 
 @router.get("/my-set-mappings", response_model=List[TraineeSetMappingResponse])
@@ -170,7 +116,7 @@ async def create_task(
         raise HTTPException(status_code=403, detail="Admin only")
     
     # Save the master file
-    file_path = handle_task_upload(file, set_number, task_code)
+    file_path = await handle_task_upload(file, set_number, task_code, db)
     
     # If set_name not passed, try to look up existing set_name in DB for this set
     if not set_name:
@@ -191,6 +137,7 @@ async def create_task(
     db.add(db_task)
     db.commit()
     resequence_set_task_codes(db, set_number)
+    task_catalog.invalidate()
     db.refresh(db_task)
     return db_task
 
@@ -208,6 +155,9 @@ async def trigger_folder_sync(
     try:
         script_path = os.path.join("backend", "scripts", "sync_tasks_from_folder.py")
         subprocess.run([sys.executable, script_path], check=True)
+        task_catalog.invalidate()
+        bundle_cache.invalidate()
+        path_index.invalidate()
         return {"message": "Successfully synced tasks from the server folder."}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Sync failed: {str(e)}")
@@ -227,6 +177,20 @@ async def bulk_create_tasks(
         raise HTTPException(status_code=403, detail="Admin only")
     
     created_tasks = []
+    for file in files:
+        stored = await save_upload(file, staging_path())
+        created_tasks.append(await create_bulk_task(db, set_number, file.filename, stored, set_name, is_assembly, assessment_type))
+    
+    db.commit()
+    resequence_set_task_codes(db, set_number, assessment_type)
+    task_catalog.invalidate()
+    return {"message": f"Successfully created {len(created_tasks)} units for Set {set_number}"}
+
+async def create_bulk_task(
+    db: Session, set_number: int, filename: str, stored: StoredFile, set_name: Optional[str] = None,
+    is_assembly: bool = False, assessment_type: str = "3D"
+) -> AssessmentTask:
+    """Add one bulk-uploaded unit from a file already on disk; flushed, not committed."""
     # Start task code based on existing count of the same unit type (Part/Assembly)
     existing_count = db.query(AssessmentTask).filter(
         AssessmentTask.set_number == set_number,
@@ -249,31 +213,27 @@ async def bulk_create_tasks(
         if existing:
             set_name = existing.set_name
     prefix = "A" if is_assembly else "P"
-    for i, file in enumerate(files):
-        task_code = f"{prefix}{existing_count + i + 1}"
-        
-        file_path = handle_task_upload(file, set_number, task_code)
-        
-        # Strip extension for title
-        safe_filename = os.path.basename(file.filename)
-        title = os.path.splitext(safe_filename)[0].replace('_', ' ').title()
-        
-        db_task = AssessmentTask(
-            set_number=set_number,
-            set_name=set_name,
-            task_code=task_code,
-            title=title,
-            master_file_path=file_path,
-            is_assembly=is_assembly,
-            assessment_type=assessment_type,
-            order=total_existing + i
-        )
-        db.add(db_task)
-        created_tasks.append(db_task)
+    task_code = f"{prefix}{existing_count + 1}"
     
-    db.commit()
-    resequence_set_task_codes(db, set_number, assessment_type)
-    return {"message": f"Successfully created {len(created_tasks)} units for Set {set_number}"}
+    file_path = await place_task_file(stored, filename, set_number, task_code, db)
+    
+    # Strip extension for title
+    safe_filename = os.path.basename(filename)
+    title = os.path.splitext(safe_filename)[0].replace('_', ' ').title()
+    
+    db_task = AssessmentTask(
+        set_number=set_number,
+        set_name=set_name,
+        task_code=task_code,
+        title=title,
+        master_file_path=file_path,
+        is_assembly=is_assembly,
+        assessment_type=assessment_type,
+        order=total_existing
+    )
+    db.add(db_task)
+    db.flush()
+    return db_task
 
 @router.get("/admin/mappings", response_model=List[TrainerTraineeMappingResponse])
 def get_trainer_mappings(
@@ -313,6 +273,7 @@ def reorder_tasks(
     if current_user.role != "admin":
         raise HTTPException(status_code=403, detail="Admin only")
     affected_sets_and_types = set()
+    trainee_ids = trainees_with_submissions(db, [int(item["id"]) for item in updates])
     for item in updates:
         task = db.query(AssessmentTask).filter(AssessmentTask.id == int(item["id"])).first()
         if task:
@@ -320,9 +281,11 @@ def reorder_tasks(
             affected_sets_and_types.add((int(item["set_number"]), task.assessment_type))
             task.set_number = int(item["set_number"])
             task.order = int(item["order"])
+    refresh_trainee_snapshots(db, trainee_ids)
     db.commit()
     for set_num, task_type in affected_sets_and_types:
         resequence_set_task_codes(db, set_num, task_type)
+    task_catalog.invalidate()
     return {"message": "Tasks reordered successfully"}
 
 @router.delete("/admin/tasks/{task_id}")
@@ -341,9 +304,14 @@ def delete_task(
     
     set_num = task.set_number
     task_type = task.assessment_type or "3D"
+    master_path = task.master_file_path
+    trainee_ids = trainees_with_submissions(db, [task.id])
     db.delete(task)
+    release_unreferenced(db, [master_path])
+    refresh_trainee_snapshots(db, trainee_ids)
     db.commit()
     resequence_set_task_codes(db, set_num, task_type)
+    task_catalog.invalidate()
     return {"message": "Task deleted successfully"}
 
 class BulkTasksDeleteRequest(BaseModel):
@@ -360,12 +328,17 @@ def bulk_delete_tasks(
     
     tasks = db.query(AssessmentTask).filter(AssessmentTask.id.in_(req.task_ids)).all()
     affected = set((t.set_number, t.assessment_type or "3D") for t in tasks)
+    master_paths = [t.master_file_path for t in tasks]
+    trainee_ids = trainees_with_submissions(db, [t.id for t in tasks])
     
     db.query(AssessmentTask).filter(AssessmentTask.id.in_(req.task_ids)).delete(synchronize_session=False)
+    release_unreferenced(db, master_paths)
+    refresh_trainee_snapshots(db, trainee_ids)
     db.commit()
     
     for set_num, task_type in affected:
         resequence_set_task_codes(db, set_num, task_type)
+    task_catalog.invalidate()
         
     return {"message": f"Successfully deleted {len(req.task_ids)} tasks"}
 
@@ -386,6 +359,7 @@ def rename_set(
     for task in tasks:
         task.set_name = set_name
     db.commit()
+    task_catalog.invalidate()
     return {"message": "Set renamed successfully"}
 
 @router.delete("/admin/sets/{set_number}")
@@ -397,11 +371,17 @@ def delete_set(
 ):
     if current_user.role != "admin":
         raise HTTPException(status_code=403, detail="Admin only")
-    db.query(AssessmentTask).filter(
+    in_set = db.query(AssessmentTask).filter(
         AssessmentTask.set_number == set_number,
         AssessmentTask.assessment_type == assessment_type
-    ).delete()
+    )
+    master_paths = [path for (path,) in in_set.with_entities(AssessmentTask.master_file_path)]
+    trainee_ids = trainees_with_submissions(db, [task_id for (task_id,) in in_set.with_entities(AssessmentTask.id)])
+    in_set.delete()
+    release_unreferenced(db, master_paths)
+    refresh_trainee_snapshots(db, trainee_ids)
     db.commit()
+    task_catalog.invalidate()
     return {"message": "Set deleted successfully"}
 
 @router.put("/admin/tasks/{task_id}", response_model=AssessmentTaskResponse)
@@ -435,20 +415,32 @@ async def update_task(
     
     if file:
         # Save new file
-        file_path = handle_task_upload(file, set_number, task_code)
+        replaced_path = db_task.master_file_path
+        file_path = await handle_task_upload(file, set_number, task_code, db)
         db_task.master_file_path = file_path
+        release_unreferenced(db, [replaced_path])
     
+    # Set number, type and is_assembly all feed the completed-set counts
+    refresh_trainee_snapshots(db, trainees_with_submissions(db, [db_task.id]))
     db.commit()
     resequence_set_task_codes(db, set_number, db_task.assessment_type or "3D")
+    task_catalog.invalidate()
     db.refresh(db_task)
     return db_task
 
 @router.get("/admin/tasks/{task_id}/files")
 def get_task_file_tree(
     task_id: int,
+    path: str = "",
+    lazy: bool = False,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
+    """
+    Admin only: the files of a task's folder, from the upload root index. With lazy=true
+    only the level at path is returned (folders with their child_count), for opening
+    large unit folders one level at a time.
+    """
     if current_user.role != "admin":
         raise HTTPException(status_code=403, detail="Admin only")
     
@@ -457,30 +449,25 @@ def get_task_file_tree(
         raise HTTPException(status_code=404, detail="Task not found")
         
     master_path = resolve_master_path(task.master_file_path)
-    if not master_path or not os.path.exists(master_path):
-        return {"tree": []}
-        
     # If it's a file, the "folder" is its directory. But we only manage if it's a directory.
     # To support this properly, let's ensure we are dealing with a directory.
-    base_dir = master_path if os.path.isdir(master_path) else os.path.dirname(master_path)
-    
-    def build_tree(dir_path):
-        tree = []
-        for item in os.listdir(dir_path):
-            full_path = os.path.join(dir_path, item)
-            rel_path = os.path.relpath(full_path, base_dir)
-            is_dir = os.path.isdir(full_path)
-            node = {
-                "name": item,
-                "path": rel_path.replace("\\", "/"),
-                "is_dir": is_dir
-            }
-            if is_dir:
-                node["children"] = build_tree(full_path)
-            tree.append(node)
-        return sorted(tree, key=lambda x: (not x["is_dir"], x["name"].lower()))
-        
-    return {"tree": build_tree(base_dir), "base_dir": base_dir}
+    # (A single-file master kept in the blob store has no file here, only its folder.)
+    master_entry = path_index.lookup(master_path) if master_path else None
+    base_dir = master_path if master_entry and master_entry.is_dir else os.path.dirname(master_path)
+    if not master_path or path_index.listing(base_dir) is None:
+        return {"tree": []}
+
+    directory = root = base_dir
+    if path and path != "/":
+        # Secure path boundary check (it resolves, so relative paths are taken from the resolved base too)
+        directory = get_safe_path(base_dir, path)
+        root = str(Path(base_dir).resolve())
+    rel_path = os.path.relpath(directory, root).replace("\\", "/")
+    return {
+        "tree": path_index.tree(directory, root, depth=1 if lazy else None),
+        "base_dir": base_dir,
+        "path": "" if rel_path == "." else rel_path,
+    }
 
 class FolderCreateRequest(BaseModel):
     path: str
@@ -505,6 +492,7 @@ def create_task_subfolder(
     # Secure path boundary check
     new_dir = get_safe_path(base_dir, req.path)
     os.makedirs(new_dir, exist_ok=True)
+    path_index.invalidate(new_dir)
     
     return {"message": "Folder created"}
 
@@ -531,10 +519,9 @@ async def upload_task_file(
     os.makedirs(target_dir, exist_ok=True)
     
     safe_filename = os.path.basename(file.filename)
-    file_path = os.path.join(target_dir, safe_filename)
-    
-    with open(file_path, "wb") as buffer:
-        shutil.copyfileobj(file.file, buffer)
+    await save_upload(file, os.path.join(target_dir, safe_filename))
+    path_index.invalidate(os.path.join(target_dir, safe_filename))
+    bundle_cache.invalidate(task.set_number, task.assessment_type or "3D")
         
     return {"message": "File uploaded"}
 
@@ -563,6 +550,8 @@ def delete_task_file(
             shutil.rmtree(target_path)
         else:
             os.remove(target_path)
+    path_index.invalidate(target_path)
+    bundle_cache.invalidate(task.set_number, task.assessment_type or "3D")
             
     return {"message": "Item deleted"}
 
@@ -585,9 +574,23 @@ def delete_mapping(
     db.commit()
     return {"message": "Mapping removed successfully"}
 
+def check_set_access(db: Session, current_user: User, set_number: int):
+    """Fix #5: Trainees may only download files for tasks in their assigned sets."""
+    if current_user.role == "trainee":
+        mappings = db.query(TraineeSetMapping).filter(
+            TraineeSetMapping.trainee_id == current_user.id
+        ).all()
+        if mappings:
+            # If mappings exist, the task must be in an assigned set
+            allowed_sets = {m.actual_set_number for m in mappings}
+            if set_number not in allowed_sets:
+                raise HTTPException(status_code=403, detail="You are not assigned to this task set.")
+        # If no mappings exist, fall through — default locking is handled client-side
+
 @router.get("/tasks/{task_id}/download")
 def download_master_file(
     task_id: int,
+    request: Request,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
@@ -596,77 +599,98 @@ def download_master_file(
     if not task or not task.master_file_path:
         raise HTTPException(status_code=404, detail="Master file not found")
 
-    # Fix #5: Trainees may only download files for tasks in their assigned sets
-    if current_user.role == "trainee":
-        from ..models import TraineeSetMapping
-        mappings = db.query(TraineeSetMapping).filter(
-            TraineeSetMapping.trainee_id == current_user.id
-        ).all()
-        if mappings:
-            # If mappings exist, the task must be in an assigned set
-            allowed_sets = {m.actual_set_number for m in mappings}
-            if task.set_number not in allowed_sets:
-                raise HTTPException(status_code=403, detail="You are not assigned to this task set.")
-        # If no mappings exist, fall through — default locking is handled client-side
+    check_set_access(db, current_user, task.set_number)
     
-    full_path = resolve_master_path(task.master_file_path)
+    full_path = resolve_blob(db, task.master_file_path) or resolve_master_path(task.master_file_path)
         
-    if not os.path.exists(full_path):
+    if not os.path.isfile(full_path):
         raise HTTPException(status_code=404, detail="File does not exist on server")
         
-    return FileResponse(
-        path=full_path, 
-        filename=task.file_name or os.path.basename(full_path),
+    return file_download(
+        request,
+        full_path,
+        filename=task.file_name or os.path.basename(task.master_file_path),
         media_type="application/octet-stream"
     )
 
+@router.get("/sets/{set_number}/bundle")
+def download_set_bundle(
+    set_number: int,
+    request: Request,
+    assessment_type: str = "3D",
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Every master unit file of a set (assemblies with their Parts) as one .zip. Built once
+    per change of the set's files; supports If-None-Match and Range for resuming.
+    """
+    check_set_access(db, current_user, set_number)
+
+    bundle = bundle_cache.get(db, set_number, assessment_type)
+    if bundle is None:
+        raise HTTPException(status_code=404, detail="This set has no files on the server")
+
+    return file_download(
+        request,
+        bundle.path,
+        filename=f"Set {set_number} {assessment_type}.zip",
+        media_type="application/zip",
+        etag=f'"{bundle.key}"'
+    )
+
 @router.post("/submit/{task_id}", response_model=AssessmentSubmissionResponse)
 async def submit_task(
     task_id: int,
     file: UploadFile = File(...),
     assessment_type: str = Form("3D"),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Submit a .dwg file for a specific task."""
     # Check if task exists
-    task = db.query(AssessmentTask).filter(AssessmentTask.id == task_id).first()
+    task = await db.get(AssessmentTask, task_id)
     if not task:
         raise HTTPException(status_code=404, detail="Task not found")
 
+    return await record_submission(db, current_user, task, file.filename, await store_blob(file), assessment_type)
+
+async def record_submission(
+    db: AsyncSession, current_user: User, task: AssessmentTask, filename: Optional[str],
+    stored: StoredFile, assessment_type: str = "3D"
+) -> AssessmentSubmission:
+    """Record a blob already in the store as the trainee's attempt at task (shared with resumable uploads)."""
+    task_id = task.id
+
     # Define upload directory mirroring the master structure
     # e.g., master path: "Units & Tasks/4th Set Parts And Assembly/2655RCGR/Parts/part.dwg"
     master_dir = os.path.dirname(task.master_file_path) if task.master_file_path else ""
     base_upload_dir = os.getenv("UPLOAD_DIR", os.path.join(APP_PATH, "uploads"))
     upload_dir = os.path.join(base_upload_dir, "submissions", str(current_user.id), master_dir)
-    os.makedirs(upload_dir, exist_ok=True)
     
-    safe_filename = os.path.basename(file.filename) if file.filename else "submission"
+    safe_filename = os.path.basename(filename) if filename else "submission"
     file_path = os.path.join(upload_dir, safe_filename)
-    
-    with open(file_path, "wb") as buffer:
-        shutil.copyfileobj(file.file, buffer)
 
     # Create a new submission record for every attempt (Work History)
     # However, if the user re-uploads while the status is still 'pending', we replace the file for that specific record.
     # For CAD files, we match by extension. For .zip/.rar folders, we match by the exact filename so multiple folders can exist.
-    pending_submissions = db.query(AssessmentSubmission).filter(
+    pending_submissions = (await db.execute(select(AssessmentSubmission).where(
         AssessmentSubmission.user_id == current_user.id,
         AssessmentSubmission.task_id == task_id,
         AssessmentSubmission.assessment_type == assessment_type,
         AssessmentSubmission.status == "pending",
         AssessmentSubmission.is_deleted == False
-    ).all()
+    ))).scalars().all()
 
     target_submission = None
-    file_ext = os.path.splitext(file.filename)[1].lower()
+    file_ext = os.path.splitext(filename or "")[1].lower()
     
     for sub in pending_submissions:
         if sub.submission_file_path:
             existing_name = os.path.basename(sub.submission_file_path)
             existing_ext = os.path.splitext(existing_name)[1].lower()
             if file_ext in ['.zip', '.rar']:
-                if existing_name == file.filename:
+                if existing_name == filename:
                     target_submission = sub
                     break
             else:
@@ -674,11 +698,14 @@ async def submit_task(
                     target_submission = sub
                     break
 
+    await db.run_sync(link_blob, file_path, stored)
     if target_submission:
         # Update current pending submission
+        replaced_path = target_submission.submission_file_path
         target_submission.submission_file_path = file_path
         target_submission.submitted_at = datetime.now()
         submission = target_submission
+        await db.run_sync(release_unreferenced, [replaced_path])
     else:
         # Create a new attempt
         submission = AssessmentSubmission(
@@ -690,28 +717,30 @@ async def submit_task(
         )
         db.add(submission)
     
-    db.commit()
-    db.refresh(submission)
+    await db.run_sync(refresh_trainee_snapshot, current_user.id)
+    await db.commit()
+    await db.refresh(submission)
 
     # --- Real-Time Trainer Notification (consolidated, Fix #10) ---
     # One notification per submission; includes set-completion context if all tasks are now submitted.
-    mapping = db.query(TrainerTraineeMapping).filter(TrainerTraineeMapping.trainee_id == current_user.id).first()
+    mapping = (await db.execute(
+        select(TrainerTraineeMapping).where(TrainerTraineeMapping.trainee_id == current_user.id)
+    )).scalars().first()
     if mapping:
         try:
-            set_tasks = db.query(AssessmentTask).filter(
+            set_task_ids = (await db.execute(select(AssessmentTask.id).where(
                 AssessmentTask.set_number == task.set_number,
                 AssessmentTask.assessment_type == assessment_type
-            ).all()
-            set_task_ids = [t.id for t in set_tasks]
+            ))).scalars().all()
 
-            user_sub_count = db.query(AssessmentSubmission.task_id).filter(
+            user_sub_count = await db.scalar(select(func.count(AssessmentSubmission.task_id.distinct())).where(
                 AssessmentSubmission.user_id == current_user.id,
                 AssessmentSubmission.task_id.in_(set_task_ids),
                 AssessmentSubmission.assessment_type == assessment_type,
                 AssessmentSubmission.is_deleted == False
-            ).distinct().count()
+            ))
 
-            set_complete = (len(set_tasks) > 0 and user_sub_count == len(set_tasks))
+            set_complete = (len(set_task_ids) > 0 and user_sub_count == len(set_task_ids))
 
             if set_complete:
                 notification_msg = (
@@ -731,7 +760,7 @@ async def submit_task(
                 type="new_submission"
             )
             db.add(new_notif)
-            db.commit()
+            await db.commit()
 
             import asyncio
             asyncio.create_task(notification_manager.send_personal_message(
@@ -747,6 +776,8 @@ async def submit_task(
         except Exception as e:
             print(f"Error sending trainer submission notification: {e}")
 
+    # Relationships can't lazy-load during response serialization on an AsyncSession
+    await db.refresh(submission, ["user", "task", "feedback"])
     return submission
 
 # --- Trainer (Employee) Endpoints ---
@@ -768,16 +799,16 @@ async def update_trainee_set_mappings(
     trainee_id: int,
     mappings: List[TraineeSetMappingCreate] = Body(...),
     assessment_type: str = "3D",
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     if current_user.role not in ["employee", "admin"]:
         raise HTTPException(status_code=403, detail="Not authorized")
         
-    db.query(TraineeSetMapping).filter(
+    await db.execute(delete(TraineeSetMapping).where(
         TraineeSetMapping.trainee_id == trainee_id,
         TraineeSetMapping.assessment_type == assessment_type
-    ).delete()
+    ))
     
     for m in mappings:
         new_map = TraineeSetMapping(
@@ -788,7 +819,9 @@ async def update_trainee_set_mappings(
             assessment_type=assessment_type
         )
         db.add(new_map)
-    db.commit()
+    await db.run_sync(refresh_trainee_snapshot, trainee_id)
+    await db.commit()
+    task_catalog.forget_trainee(trainee_id)
     
     # Notify trainee to refresh sets
     db_notification = Notification(
@@ -798,7 +831,7 @@ async def update_trainee_set_mappings(
         type="assessment_unlocked"
     )
     db.add(db_notification)
-    db.commit()
+    await db.commit()
     
     from ..websocket_manager import notification_manager
     try:
@@ -814,41 +847,145 @@ async def update_trainee_set_mappings(
     
     return {"message": "Mappings updated"}
 
-@router.get("/trainer/submissions", response_model=List[AssessmentSubmissionResponse])
+@router.get("/trainer/submissions", response_model=Union[List[AssessmentSubmissionResponse], AssessmentSubmissionPage])
 def get_trainer_submissions(
-    status: str = "pending", # "pending", "approved", "rejected", or "all"
+    status: str = "pending", # "pending", "approved", "rejected", "reviewed" or "all"
+    limit: Optional[int] = Query(None, ge=1, le=INBOX_PAGE_MAX),
+    cursor: Optional[str] = None,
+    trainee_id: Optional[int] = None,
+    set_number: Optional[int] = None,
+    task_id: Optional[int] = None,
+    assessment_type: Optional[str] = None,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    """List submissions assigned to this trainer with optional status filter."""
+    """
+    List submissions assigned to this trainer with optional status and trainee/set/task/type filters.
+
+    With limit (and the next_cursor of the previous page) returns {"items", "next_cursor"} of
+    summary rows, newest first; open a row through /trainer/submissions/{id}. Without it the
+    full list with feedback is returned as before.
+    """
     if current_user.role not in ["employee", "admin"]:
         raise HTTPException(status_code=403, detail="Not authorized")
 
     # Get trainees assigned to this trainer
-    trainee_ids = [m.trainee_id for m in db.query(TrainerTraineeMapping).filter(TrainerTraineeMapping.trainer_id == current_user.id).all()]
-    
-    if not trainee_ids and current_user.role != "admin":
-        return []
+    trainee_ids = None
+    if current_user.role != "admin":
+        trainee_ids = [m.trainee_id for m in db.query(TrainerTraineeMapping).filter(TrainerTraineeMapping.trainer_id == current_user.id).all()]
+    paged = limit is not None or cursor is not None
+
+    if trainee_ids == []:
+        return {"items": [], "next_cursor": None} if paged else []
 
-    query = db.query(AssessmentSubmission).options(
+    filters = dict(
+        status=status, trainee_ids=trainee_ids, trainee_id=trainee_id,
+        set_number=set_number, task_id=task_id, assessment_type=assessment_type,
+    )
+    if paged:
+        return page_trainer_submissions(db, limit=limit or 50, cursor=cursor, **filters)
+
+    return db.query(AssessmentSubmission).options(
         joinedload(AssessmentSubmission.user),
         joinedload(AssessmentSubmission.task),
         joinedload(AssessmentSubmission.feedback)
-    ).filter(AssessmentSubmission.is_deleted == False)
-    
-    if status == "reviewed":
-        query = query.filter(AssessmentSubmission.status.in_(["approved", "rejected"]))
-    elif status != "all":
-        query = query.filter(AssessmentSubmission.status == status)
-    
+    ).filter(*inbox_conditions(**filters)).order_by(
+        AssessmentSubmission.submitted_at.desc(), AssessmentSubmission.id.desc()
+    ).all()
+
+@router.get("/trainer/submissions/archive")
+def download_submissions_archive(
+    status: str = "all",
+    trainee_id: Optional[int] = None,
+    set_number: Optional[int] = None,
+    task_id: Optional[int] = None,
+    assessment_type: Optional[str] = None,
+    submitted_from: Optional[datetime] = None,
+    submitted_to: Optional[datetime] = None,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Every matching submission file in one ZIP, laid out as <trainee>/Set <n>/<task>/<file>.
+    Takes the inbox filters plus a submitted_at range; the archive is built while it downloads.
+    """
+    if current_user.role not in ["employee", "admin"]:
+        raise HTTPException(status_code=403, detail="Not authorized")
+
+    trainee_ids = None
     if current_user.role != "admin":
-        query = query.filter(AssessmentSubmission.user_id.in_(trainee_ids))
-    
-    return query.order_by(AssessmentSubmission.submitted_at.desc()).all()
+        trainee_ids = [m.trainee_id for m in db.query(TrainerTraineeMapping).filter(TrainerTraineeMapping.trainer_id == current_user.id).all()]
+        if not trainee_ids:
+            raise HTTPException(status_code=404, detail="No submissions match")
+
+    rows = db.query(
+        AssessmentSubmission.id, AssessmentSubmission.submission_file_path,
+        User.username, AssessmentTask.set_number, AssessmentTask.task_code, BlobRef.sha256
+    ).join(User, User.id == AssessmentSubmission.user_id).join(
+        AssessmentTask, AssessmentTask.id == AssessmentSubmission.task_id
+    ).outerjoin(BlobRef, BlobRef.path == AssessmentSubmission.submission_file_path).filter(
+        AssessmentSubmission.submission_file_path.isnot(None),
+        *inbox_conditions(
+            status=status, trainee_ids=trainee_ids, trainee_id=trainee_id, set_number=set_number,
+            task_id=task_id, assessment_type=assessment_type,
+            submitted_from=submitted_from, submitted_to=submitted_to,
+        )
+    ).order_by(User.username, AssessmentTask.set_number, AssessmentTask.task_code, AssessmentSubmission.id).all()
+    if not rows:
+        raise HTTPException(status_code=404, detail="No submissions match")
+
+    # Resolve everything now so the stream does no DB work. The get_db session still stays
+    # open until the whole archive is sent (FastAPI closes yield dependencies after the response)
+    used = set()
+    entries = [
+        ArchiveEntry(
+            unique_name(f"{row.username}/Set {row.set_number}/{row.task_code or 'Task'}/"
+                        f"{row.id}_{os.path.basename(row.submission_file_path)}", used),
+            blob_path(row.sha256) if row.sha256 else row.submission_file_path,
+        )
+        for row in rows
+    ]
+
+    name = f"submissions_set{set_number}" if set_number is not None else "submissions"
+    if trainee_id is not None:
+        name += f"_{rows[0].username}"
+    return StreamingResponse(
+        stream_zip(entries),
+        media_type="application/zip",
+        headers={"Content-Disposition": f'attachment; filename="{name}.zip"'}
+    )
+
+@router.get("/trainer/submissions/{submission_id}", response_model=AssessmentSubmissionResponse)
+def get_trainer_submission(
+    submission_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Open one inbox row: the full submission with trainee, task and feedback."""
+    if current_user.role not in ["employee", "admin"]:
+        raise HTTPException(status_code=403, detail="Not authorized")
+
+    submission = db.query(AssessmentSubmission).options(
+        joinedload(AssessmentSubmission.user),
+        joinedload(AssessmentSubmission.task),
+        selectinload(AssessmentSubmission.feedback)
+    ).filter(AssessmentSubmission.id == submission_id, AssessmentSubmission.is_deleted == False).first()
+    if not submission:
+        raise HTTPException(status_code=404, detail="Submission not found")
+
+    if current_user.role == "employee":
+        is_assigned = db.query(TrainerTraineeMapping).filter(
+            TrainerTraineeMapping.trainer_id == current_user.id,
+            TrainerTraineeMapping.trainee_id == submission.user_id
+        ).first()
+        if not is_assigned:
+            raise HTTPException(status_code=403, detail="You are not assigned to this trainee.")
+    return submission
 
 @router.get("/submissions/{submission_id}/download")
 def download_trainee_submission(
     submission_id: int,
+    request: Request,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
@@ -869,11 +1006,13 @@ def download_trainee_submission(
         if not is_assigned:
             raise HTTPException(status_code=403, detail="You are not assigned to this trainee.")
     
-    if not os.path.exists(submission.submission_file_path):
+    full_path = resolve_blob(db, submission.submission_file_path) or submission.submission_file_path
+    if not os.path.isfile(full_path):
         raise HTTPException(status_code=404, detail="File does not exist on server")
         
-    return FileResponse(
-        path=submission.submission_file_path, 
+    return file_download(
+        request,
+        full_path,
         filename=os.path.basename(submission.submission_file_path),
         media_type="application/octet-stream"
     )
@@ -884,14 +1023,18 @@ async def provide_feedback(
     status: str = Form(...), # "approved" or "rejected"
     file: Optional[UploadFile] = File(None),
     comments: Optional[str] = Form(None),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Review a submission and provide an Excel checkback file."""
     if current_user.role not in ["employee", "admin"]:
         raise HTTPException(status_code=403, detail="Not authorized")
 
-    submission = db.query(AssessmentSubmission).filter(AssessmentSubmission.id == submission_id).first()
+    submission = (await db.execute(
+        select(AssessmentSubmission)
+        .options(selectinload(AssessmentSubmission.task))
+        .where(AssessmentSubmission.id == submission_id)
+    )).scalars().first()
     if not submission:
         raise HTTPException(status_code=404, detail="Submission not found")
 
@@ -902,20 +1045,21 @@ async def provide_feedback(
     if file:
         base_upload_dir = os.getenv("UPLOAD_DIR", os.path.join(APP_PATH, "uploads"))
         feedback_dir = os.path.join(base_upload_dir, "feedback", str(submission.user_id))
-        os.makedirs(feedback_dir, exist_ok=True)
         safe_fb_filename = os.path.basename(file.filename) if file.filename else "feedback"
         file_path = os.path.join(feedback_dir, f"feedback_{submission_id}_{safe_fb_filename}")
-        
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
+        await db.run_sync(link_blob, file_path, await store_blob(file))
     
     # Create feedback record if there's either a file OR comments
     if file or comments:
         # Check if feedback already exists for this submission
-        feedback = db.query(AssessmentFeedback).filter(AssessmentFeedback.submission_id == submission_id).first()
+        feedback = (await db.execute(
+            select(AssessmentFeedback).where(AssessmentFeedback.submission_id == submission_id)
+        )).scalars().first()
         if feedback:
             if file_path:
+                replaced_path = feedback.checkback_file_path
                 feedback.checkback_file_path = file_path
+                await db.run_sync(release_unreferenced, [replaced_path])
             if comments:
                 feedback.comments = comments
         else:
@@ -926,7 +1070,8 @@ async def provide_feedback(
             )
             db.add(feedback)
 
-    db.commit()
+    await db.run_sync(refresh_trainee_snapshot, submission.user_id)
+    await db.commit()
 
     # Save Notification record in database and trigger real-time WebSocket push
     try:
@@ -943,7 +1088,7 @@ async def provide_feedback(
             type="assessment_reviewed"
         )
         db.add(db_notification)
-        db.commit()
+        await db.commit()
 
         import asyncio
         asyncio.create_task(notification_manager.send_personal_message(
@@ -965,6 +1110,7 @@ async def provide_feedback(
 @router.get("/feedback/{feedback_id}/download")
 def download_feedback_file(
     feedback_id: int,
+    request: Request,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
@@ -973,11 +1119,13 @@ def download_feedback_file(
     if not feedback or not feedback.checkback_file_path:
         raise HTTPException(status_code=404, detail="Feedback file not found")
     
-    if not os.path.exists(feedback.checkback_file_path):
+    full_path = resolve_blob(db, feedback.checkback_file_path) or feedback.checkback_file_path
+    if not os.path.isfile(full_path):
         raise HTTPException(status_code=404, detail="File does not exist on server")
         
-    return FileResponse(
-        path=feedback.checkback_file_path, 
+    return file_download(
+        request,
+        full_path,
         filename=os.path.basename(feedback.checkback_file_path),
         media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
     )
@@ -1044,8 +1192,10 @@ def empty_trash(
         ).all()
         
         count = 0
+        stored_paths = []
         for sub in submissions:
             file_to_delete = sub.submission_file_path
+            stored_paths += [file_to_delete] + [fb.checkback_file_path for fb in sub.feedback]
             db.delete(sub)
             if file_to_delete and os.path.exists(file_to_delete):
                 try:
@@ -1054,6 +1204,8 @@ def empty_trash(
                     print(f"Cleanup Warning: Could not delete physical file {file_to_delete}: {e}")
             count += 1
             
+        release_unreferenced(db, stored_paths)
+        refresh_trainee_snapshot(db, current_user.id)
         db.commit()
         return {"message": f"Successfully emptied {count} files from trash"}
     except Exception as e:
@@ -1159,7 +1311,10 @@ def permanent_delete_submission(
             raise HTTPException(status_code=404, detail="Submission not found")
             
         file_to_delete = submission.submission_file_path
+        stored_paths = [file_to_delete] + [fb.checkback_file_path for fb in submission.feedback]
         db.delete(submission)
+        release_unreferenced(db, stored_paths)
+        refresh_trainee_snapshot(db, current_user.id)
         db.commit()
         
         if file_to_delete and os.path.exists(file_to_delete):
@@ -1195,11 +1350,6 @@ def get_trainer_trainees_progress(
     current_user: User = Depends(get_current_user)
 ):
     """Get detailed curriculum & assessment progress for all assigned trainees."""
-    try:
-        from ..models import QuizScore, Quiz
-    except ImportError:
-        from models import QuizScore, Quiz
-
     if current_user.role not in ["employee", "admin"]:
         raise HTTPException(status_code=403, detail="Not authorized")
     
@@ -1211,126 +1361,25 @@ def get_trainer_trainees_progress(
         trainee_ids = [m.trainee_id for m in mappings]
         trainees = db.query(User).filter(User.id.in_(trainee_ids)).all()
     
+    # 2. Aggregate everything in a fixed number of grouped queries
+    progress = calculate_trainee_dashboard_progress(db, [t.id for t in trainees])
+
     results = []
     for trainee in trainees:
-        # Fetch Quiz Scores (Lessons completed/passed)
-        scores = db.query(QuizScore).filter(QuizScore.user_id == trainee.id).all()
-        
-        # Calculate completion metrics
-        # Course 1 is 3D Modeling, Course 2 is 2D Drawing
-        completed_3d = [s for s in scores if s.course_id == "1" and s.score >= 80.0]
-        completed_2d = [s for s in scores if s.course_id == "2" and s.score >= 80.0]
-        
-        # Total quizzes in DB per course type
-        total_3d = db.query(Quiz).filter(Quiz.course_type == "3D_Modeling").count()
-        total_2d = db.query(Quiz).filter(Quiz.course_type == "2D_Drawing").count()
-        
-        # Fetch assessment submissions for this trainee
-        submissions = db.query(AssessmentSubmission).filter(AssessmentSubmission.user_id == trainee.id).all()
-        approved_submissions = [s for s in submissions if s.status == "approved"]
-        pending_submissions = [s for s in submissions if s.status == "pending"]
-        rejected_submissions = [s for s in submissions if s.status == "rejected"]
-        
-        # Practical Assessment (3D) Progress
-        trainee_mappings = db.query(TraineeSetMapping).filter(TraineeSetMapping.trainee_id == trainee.id).all()
-        total_3d_practical = len(trainee_mappings)
-        completed_3d_practical = 0
-        if total_3d_practical > 0:
-            assigned_actual_sets = [m.actual_set_number for m in trainee_mappings]
-            for set_num in assigned_actual_sets:
-                is_completed = db.query(AssessmentSubmission).join(AssessmentTask).filter(
-                    AssessmentSubmission.user_id == trainee.id,
-                    AssessmentSubmission.status == 'approved',
-                    AssessmentTask.set_number == set_num,
-                    (AssessmentSubmission.assessment_type == '3D') | (AssessmentSubmission.assessment_type == None)
-                ).first()
-                if is_completed:
-                    completed_3d_practical += 1
-                    
-        # Practical Assessment (2D) Progress — Fix #11: scope to 2D tasks only
-        total_2d_practical = db.query(AssessmentTask).filter(
-            AssessmentTask.is_assembly == True,
-            AssessmentTask.assessment_type == "2D"
-        ).count()
-        completed_2d_practical = db.query(AssessmentSubmission).join(AssessmentTask).filter(
-            AssessmentSubmission.user_id == trainee.id,
-            AssessmentSubmission.status == 'approved',
-            AssessmentSubmission.assessment_type == '2D',
-            AssessmentTask.is_assembly == True,
-            AssessmentTask.assessment_type == "2D"
-        ).group_by(AssessmentTask.id).count()
-
-        # Determine current activity (from realtime tracker or fallback to most recent quiz/submission)
-        current_activity = "Not started yet"
-        
-        realtime_activity = db.query(UserActivity).filter(UserActivity.user_id == trainee.id).first()
-        last_updated = None
-        if realtime_activity and realtime_activity.current_activity:
-            current_activity = realtime_activity.current_activity
-            last_updated = realtime_activity.last_updated
-        else:
-            recent_quiz = db.query(QuizScore).filter(QuizScore.user_id == trainee.id).order_by(QuizScore.completed_at.desc()).first()
-            recent_submission = db.query(AssessmentSubmission).filter(AssessmentSubmission.user_id == trainee.id).order_by(AssessmentSubmission.submitted_at.desc()).first()
-            last_quiz_time = recent_quiz.completed_at if recent_quiz and recent_quiz.completed_at else None
-            last_sub_time = recent_submission.submitted_at if recent_submission and recent_submission.submitted_at else None
-            if last_quiz_time and last_sub_time:
-                last_updated = max(last_quiz_time, last_sub_time)
-                if last_quiz_time > last_sub_time:
-                    activity_str = recent_quiz.lesson_id.replace('-', ' ').title() if recent_quiz.lesson_id else "Quiz"
-                    current_activity = f"Course: {activity_str}"
-                else:
-                    task_title = recent_submission.task.title if recent_submission.task else "Task"
-                    current_activity = f"Practical: {task_title}"
-            elif last_quiz_time:
-                last_updated = last_quiz_time
-                activity_str = recent_quiz.lesson_id.replace('-', ' ').title() if recent_quiz.lesson_id else "Quiz"
-                current_activity = f"Course: {activity_str}"
-            elif last_sub_time:
-                last_updated = last_sub_time
-                task_title = recent_submission.task.title if recent_submission.task else "Task"
-                current_activity = f"Practical: {task_title}"
-
-        last_updated_str = last_updated.isoformat() if last_updated else None
+        summary = progress[trainee.id]
+        last_updated = summary["last_updated"]
         online_since = notification_manager.get_online_since(trainee.id)
-        online_since_str = online_since.isoformat() if online_since else None
 
         results.append({
             "id": trainee.id,
             "username": trainee.username,
             "full_name": trainee.full_name,
             "email": trainee.email,
-            "current_activity": current_activity,
+            "current_activity": summary["current_activity"],
             "is_online": notification_manager.is_user_online(trainee.id),
-            "online_since": online_since_str,
-            "last_updated": last_updated_str,
-            "progress": {
-                "course_3d": {
-                    "completed": len(completed_3d),
-                    "total": total_3d,
-                    "percentage": round((len(completed_3d) / total_3d * 100), 1) if total_3d > 0 else 0.0
-                },
-                "course_2d": {
-                    "completed": len(completed_2d),
-                    "total": total_2d,
-                    "percentage": round((len(completed_2d) / total_2d * 100), 1) if total_2d > 0 else 0.0
-                },
-                "practical_3d": {
-                    "completed": completed_3d_practical,
-                    "total": total_3d_practical,
-                    "percentage": round((completed_3d_practical / total_3d_practical * 100), 1) if total_3d_practical > 0 else 0.0
-                },
-                "practical_2d": {
-                    "completed": completed_2d_practical,
-                    "total": total_2d_practical,
-                    "percentage": round((completed_2d_practical / total_2d_practical * 100), 1) if total_2d_practical > 0 else 0.0
-                },
-                "assessments": {
-                    "approved": len(approved_submissions),
-                    "pending": len(pending_submissions),
-                    "rejected": len(rejected_submissions),
-                    "total_submitted": len(submissions)
-                }
-            }
+            "online_since": online_since.isoformat() if online_since else None,
+            "last_updated": last_updated.isoformat() if last_updated else None,
+            "progress": summary["progress"]
         })
         
     return results
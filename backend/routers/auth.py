@@ -4,12 +4,15 @@ Authentication Router
 Handles user registration, login, and user management endpoints.
 """
 
+import asyncio
 from datetime import datetime, timedelta, timezone
 from typing import List
 from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from ..database import get_db
+from ..database import get_db, get_async_db, get_db_mode
 from ..models import User, SystemLog, QuizScore, UserProgress, QuestionAttempt, Quiz, TrainerTraineeMapping, Notification
 from ..schemas import UserCreate, UserLogin, Token, UserResponse, ForgotPasswordRequest, QuizSubmission, LessonProgress
 from ..auth.security import hash_password, verify_password, create_access_token
@@ -244,26 +247,19 @@ from pydantic import BaseModel
 class ActivityUpdate(BaseModel):
     activity: str
 
-from ..models import UserActivity
+from ..write_queue import write_queue
+from ..services.progress_service import record_user_activity, record_quiz_submission
 
 @router.post("/activity")
 def update_realtime_activity(
     data: ActivityUpdate,
-    db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """
     Update the user's current real-time activity (e.g. current tab or lesson).
     """
-    activity_record = db.query(UserActivity).filter(UserActivity.user_id == current_user.id).first()
-    if not activity_record:
-        activity_record = UserActivity(user_id=current_user.id, current_activity=data.activity)
-        db.add(activity_record)
-    else:
-        activity_record.current_activity = data.activity
-        activity_record.last_updated = datetime.now(timezone.utc)
-    
-    db.commit()
+    user_id = current_user.id
+    write_queue.submit(lambda session: record_user_activity(session, user_id, data.activity))
     return {"status": "success"}
 
 @router.get("/progress/{course_id}", response_model=List[LessonProgress])
@@ -293,80 +289,35 @@ def get_course_progress(
 @router.post("/submit-quiz")
 async def submit_quiz_score(
     submission: QuizSubmission,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """
     Submit a quiz score for a lesson.
     If score >= 80%, the lesson is effectively marked as passed.
     """
-    # Check if a score already exists for this lesson
-    existing_score = db.query(QuizScore).filter(
-        QuizScore.user_id == current_user.id,
-        QuizScore.course_id == submission.course_id,
-        QuizScore.lesson_id == submission.lesson_id
-    ).first()
-    
-    # Determine if this pass is new (first time scoring >= 80%)
-    is_new_pass = False
-    if submission.score >= 80.0:
-        if not existing_score or (existing_score and existing_score.score < 80.0):
-            is_new_pass = True
-            
-    if existing_score:
-        # Increment attempt counter
-        existing_score.attempts_count = (existing_score.attempts_count or 0) + 1
-        
-        # Update best score only if the new one is higher
-        if submission.score > existing_score.score:
-            existing_score.score = submission.score
-            existing_score.completed_at = datetime.now(timezone.utc)
-    else:
-        now = datetime.now(timezone.utc)
-        new_score = QuizScore(
-            user_id=current_user.id,
-            course_id=submission.course_id,
-            lesson_id=submission.lesson_id,
-            score=submission.score,
-            first_attempt_score=submission.score,
-            attempts_count=1,
-            completed_at=now,
-            first_attempt_at=now
+    user_id = current_user.id
+    if get_db_mode() != "mysql":
+        # SQLite has one write lock: let the writer thread group-commit concurrent submissions
+        is_new_pass = await asyncio.wrap_future(
+            write_queue.submit(lambda session: record_quiz_submission(session, user_id, submission))
         )
-        db.add(new_score)
-    
-    db.commit()
-    
-    # Update curriculum progress milestones
-    if submission.course_id:
-        from ..services.progress_service import update_user_course_progress
-        update_user_course_progress(db, current_user.id, submission.course_id)
-    
-    # Save individual question attempts for analytics
-    if submission.answers:
-        # Find the quiz ID by slug (lesson_id in submission matches slug in Quiz)
-        quiz = db.query(Quiz).filter(Quiz.slug == submission.lesson_id).first()
-        if quiz:
-            for ans in submission.answers:
-                attempt = QuestionAttempt(
-                    user_id=current_user.id,
-                    quiz_id=quiz.id,
-                    question_id=ans.question_id,
-                    chosen_option=ans.chosen_option,
-                    is_correct=ans.is_correct,
-                    seconds_spent=ans.seconds_spent
-                )
-                db.add(attempt)
-            db.commit()
+    else:
+        is_new_pass = await db.run_sync(record_quiz_submission, user_id, submission)
+        await db.commit()
  
+    # Find the quiz by slug (lesson_id in submission matches slug in Quiz)
+    quiz = (await db.execute(select(Quiz).where(Quiz.slug == submission.lesson_id))).scalars().first()
+
     # Dispatch Trainer progress updates
     if is_new_pass:
         try:
-            quiz = db.query(Quiz).filter(Quiz.slug == submission.lesson_id).first()
             quiz_title = quiz.title if quiz else submission.lesson_id
             course_name = "3D Modeling" if submission.course_id == "1" else "2D Drawing" if submission.course_id == "2" else "Curriculum"
  
-            mapping = db.query(TrainerTraineeMapping).filter(TrainerTraineeMapping.trainee_id == current_user.id).first()
+            mapping = (await db.execute(
+                select(TrainerTraineeMapping).where(TrainerTraineeMapping.trainee_id == current_user.id)
+            )).scalars().first()
             if mapping:
                 # 1. Save and dispatch lesson completion
                 msg = f"Trainee {current_user.full_name or current_user.username} passed {quiz_title} quiz with {submission.score}%!"
@@ -377,7 +328,7 @@ async def submit_quiz_score(
                     type="lesson_passed"
                 )
                 db.add(new_notif)
-                db.commit()
+                await db.commit()
  
                 await notification_manager.send_personal_message(
                     {
@@ -393,12 +344,14 @@ async def submit_quiz_score(
  
                 # 2. Check and dispatch course completion
                 if quiz:
-                    total_quizzes = db.query(Quiz).filter(Quiz.course_type == quiz.course_type).count()
-                    passed_quizzes = db.query(QuizScore).filter(
+                    total_quizzes = await db.scalar(
+                        select(func.count()).select_from(Quiz).where(Quiz.course_type == quiz.course_type)
+                    )
+                    passed_quizzes = await db.scalar(select(func.count()).select_from(QuizScore).where(
                         QuizScore.user_id == current_user.id,
                         QuizScore.course_id == submission.course_id,
                         QuizScore.score >= 80.0
-                    ).count()
+                    ))
  
                     if passed_quizzes >= total_quizzes and total_quizzes > 0:
                         course_msg = f"Trainee {current_user.full_name or current_user.username} completed the ENTIRE {course_name} Course!"
@@ -409,7 +362,7 @@ async def submit_quiz_score(
                             type="course_completed"
                         )
                         db.add(course_notif)
-                        db.commit()
+                        await db.commit()
  
                         await notification_manager.send_personal_message(
                             {
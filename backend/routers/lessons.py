@@ -5,15 +5,17 @@ from ..models import User, Lesson, LessonContent
 from ..services.course_service import course_service
 from ..schemas import CourseList, CourseProgress
 from ..auth.dependencies import get_current_user
+from ..http_cache import CachedResponse, conditional_get
 
 router = APIRouter(prefix="/courses", tags=["Curriculum & Progress"])
 
 @router.get("/", response_model=CourseList)
-def get_courses(db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+def get_courses(cache: CachedResponse = Depends(conditional_get("courses")),
+                db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
     """
     Get list of available courses. Requires authentication.
     """
-    return course_service.get_available_courses(db)
+    return cache.respond(lambda: course_service.get_available_courses(db), CourseList)
 
 @router.get("/{course_id}/progress/{user_id}", response_model=CourseProgress)
 def get_progress(course_id: str, user_id: str, db: Session = Depends(get_db),
@@ -24,20 +26,27 @@ def get_progress(course_id: str, user_id: str, db: Session = Depends(get_db),
     return course_service.get_user_progress(db, course_id, user_id)
 
 @router.get("/{course_id}/lessons")
-def get_course_lessons(course_id: str, db: Session = Depends(get_db)):
+def get_course_lessons(course_id: str,
+                       cache: CachedResponse = Depends(conditional_get("lessons", "quizzes", "tasks", authenticated=False)),
+                       db: Session = Depends(get_db)):
     """
     Fetch hierarchical lesson list for a specific course.
     """
-    return course_service.get_course_lessons(db, course_id)
+    return cache.respond(lambda: course_service.get_course_lessons(db, course_id))
 
 @router.get("/lesson/{slug}/content")
-def get_lesson_content(slug: str, db: Session = Depends(get_db)):
+def get_lesson_content(slug: str,
+                       cache: CachedResponse = Depends(conditional_get("lessons", authenticated=False)),
+                       db: Session = Depends(get_db)):
     """
     Fetch modular content for a lesson by its slug.
     Used for dynamically managed curriculum.
     """
-    lesson = db.query(Lesson).filter(Lesson.slug == slug).first()
-    if not lesson:
-        return []
-    
-    return db.query(LessonContent).filter(LessonContent.lesson_id == lesson.id).order_by(LessonContent.order).all()
+    def build():
+        lesson = db.query(Lesson).filter(Lesson.slug == slug).first()
+        if not lesson:
+            return []
+        
+        return db.query(LessonContent).filter(LessonContent.lesson_id == lesson.id).order_by(LessonContent.order).all()
+
+    return cache.respond(build)
@@ -5,6 +5,8 @@ from ..models import User, UserActivity, TrainerTraineeMapping, Notification
 from ..auth.security import decode_token
 from jose import JWTError
 from ..websocket_manager import notification_manager
+from ..write_queue import write_queue
+from ..services.progress_service import record_user_activity
 from ..schemas import NotificationResponse
 from .auth import get_current_user
 import logging
@@ -74,16 +76,9 @@ async def websocket_endpoint(websocket: WebSocket, token: str = None):
                     data_json = json.loads(data)
                     if data_json.get("event") == "HEARTBEAT":
                         activity = data_json.get("activity", "Active")
+                        # Heartbeats are the hottest write path; the single writer group-commits them
+                        write_queue.submit(lambda db, a=activity: record_user_activity(db, user_id, a))
                         with SessionLocal() as db:
-                            activity_record = db.query(UserActivity).filter(UserActivity.user_id == user_id).first()
-                            if not activity_record:
-                                activity_record = UserActivity(user_id=user_id, current_activity=activity)
-                                db.add(activity_record)
-                            else:
-                                activity_record.current_activity = activity
-                                activity_record.last_updated = datetime.now(timezone.utc)
-                            db.commit()
-
                             # Notify trainer of active telemetry
                             mapping = db.query(TrainerTraineeMapping).filter(TrainerTraineeMapping.trainee_id == user_id).first()
                             if mapping:
@@ -6,12 +6,14 @@ from ..database import get_db
 from ..models import Quiz, Question, User
 from ..schemas import QuizResponse
 from ..auth.dependencies import get_current_user
+from ..http_cache import CachedResponse, conditional_get
 
 router = APIRouter(prefix="/quizzes", tags=["Assessments"])
 
 @router.get("/{slug}", response_model=QuizResponse)
 def get_quiz_by_slug(
     slug: str,
+    cache: CachedResponse = Depends(conditional_get("quizzes")),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
@@ -19,12 +21,14 @@ def get_quiz_by_slug(
     Fetch a quiz by its slug (e.g., 'interface'). 
     Used by trainees when taking a quiz.
     """
-    quiz = db.query(Quiz).filter(Quiz.slug == slug).first()
-    if not quiz:
-        raise HTTPException(status_code=404, detail="Assessment not found")
-        
-    # Get questions
-    questions = db.query(Question).filter(Question.quiz_id == quiz.id).order_by(Question.order).all()
-    quiz.questions = questions
+    def build():
+        quiz = db.query(Quiz).filter(Quiz.slug == slug).first()
+        if not quiz:
+            raise HTTPException(status_code=404, detail="Assessment not found")
+            
+        # Get questions
+        questions = db.query(Question).filter(Question.quiz_id == quiz.id).order_by(Question.order).all()
+        quiz.questions = questions
+        return quiz
     
-    return quiz
+    return cache.respond(build, QuizResponse)
@@ -0,0 +1,143 @@
+from fastapi import APIRouter, Depends, HTTPException, Request, Query, Header
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from typing import Union
+
+from ..database import get_db, get_async_db
+from ..models import AssessmentTask, User
+from ..schemas import UploadSessionCreate, UploadSessionResponse, AssessmentSubmissionResponse, AssessmentTaskResponse
+from .auth import get_current_user
+from .assessments import record_submission, create_bulk_task
+from ..services.storage_service import ingest
+from ..services.assessment_service import resequence_set_task_codes
+from ..services.task_catalog import task_catalog
+from ..services.upload_sessions import (
+    create_session, load_session, received_chunks, chunk_bounds, chunk_count, write_chunk,
+    claim_upload, copy_claimed, drop_claimed, unclaim_upload, discard_session,
+)
+
+router = APIRouter(prefix="/uploads", tags=["Uploads"])
+
+
+def _status(session: dict) -> dict:
+    return {
+        "upload_id": session["upload_id"],
+        "filename": session["filename"],
+        "size": session["size"],
+        "chunk_size": session["chunk_size"],
+        "chunk_count": chunk_count(session),
+        "received": received_chunks(session),
+    }
+
+
+@router.post("/", response_model=UploadSessionResponse)
+def create_upload(
+    req: UploadSessionCreate,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Start a resumable upload for a submission or a bulk master unit."""
+    if req.purpose == "task":
+        if current_user.role != "admin":
+            raise HTTPException(status_code=403, detail="Admin only")
+        if req.set_number is None:
+            raise HTTPException(status_code=400, detail="set_number is required")
+        params = req.model_dump(include={"purpose", "set_number", "set_name", "is_assembly", "assessment_type"})
+    else:
+        if req.task_id is None or not db.get(AssessmentTask, req.task_id):
+            raise HTTPException(status_code=404, detail="Task not found")
+        params = req.model_dump(include={"purpose", "task_id", "assessment_type"})
+
+    session = create_session(current_user.id, req.filename, req.size, params, req.sha256)
+    return _status(session)
+
+
+@router.get("/{upload_id}", response_model=UploadSessionResponse)
+def get_upload(
+    upload_id: str,
+    current_user: User = Depends(get_current_user)
+):
+    """Chunks received so far; a client resumes by sending the rest."""
+    return _status(load_session(upload_id, current_user.id))
+
+
+@router.put("/{upload_id}", response_model=UploadSessionResponse)
+async def put_chunk(
+    upload_id: str,
+    request: Request,
+    offset: int = Query(..., ge=0),
+    chunk_sha256: str = Header(..., alias="X-Chunk-SHA256"),
+    current_user: User = Depends(get_current_user)
+):
+    """Store the chunk starting at offset. The raw body is checked against X-Chunk-SHA256."""
+    session = await run_in_threadpool(load_session, upload_id, current_user.id)
+    index, expected = chunk_bounds(session, offset)
+
+    body = bytearray()
+    async for part in request.stream():
+        body += part
+        if len(body) > expected:
+            raise HTTPException(status_code=413, detail=f"Chunk {index} must be {expected} bytes")
+
+    await run_in_threadpool(write_chunk, session, offset, bytes(body), chunk_sha256)
+    return await run_in_threadpool(_status, session)
+
+
+@router.post("/{upload_id}/finalize", response_model=Union[AssessmentSubmissionResponse, AssessmentTaskResponse])
+async def finalize_upload(
+    upload_id: str,
+    db: Session = Depends(get_db),
+    async_db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Assemble the upload and hand it to the same logic as POST /assessments/submit/{task_id}
+    (returns the submission) or POST /assessments/admin/tasks/bulk (returns the new unit).
+    """
+    session = await run_in_threadpool(load_session, upload_id, current_user.id)
+    params = session["params"]
+    task = None
+    if params["purpose"] == "submission":
+        task = await async_db.get(AssessmentTask, params["task_id"])
+        if not task:
+            raise HTTPException(status_code=404, detail="Task not found")
+
+    stored = await run_in_threadpool(claim_upload, session)
+    handed = stored
+    try:
+        if task is not None:
+            blob = await run_in_threadpool(ingest, stored)
+            result = await record_submission(
+                async_db, current_user, task, session["filename"], blob, params["assessment_type"]
+            )
+        else:
+            if session["filename"].lower().endswith(".zip"):
+                # Extraction deletes the zip and leaves no blob to restore it from
+                handed = await run_in_threadpool(copy_claimed, stored)
+            result = await create_bulk_task(
+                db, params["set_number"], session["filename"], handed,
+                params["set_name"], params["is_assembly"], params["assessment_type"]
+            )
+            db.commit()
+            resequence_set_task_codes(db, params["set_number"], params["assessment_type"])
+            task_catalog.invalidate()
+            db.refresh(result)
+    except BaseException:
+        await run_in_threadpool(unclaim_upload, session, stored, handed)
+        raise
+
+    if handed is not stored:
+        await run_in_threadpool(drop_claimed, stored)
+    await run_in_threadpool(discard_session, upload_id)
+    return result
+
+
+@router.delete("/{upload_id}")
+def abort_upload(
+    upload_id: str,
+    current_user: User = Depends(get_current_user)
+):
+    load_session(upload_id, current_user.id)
+    discard_session(upload_id)
+    return {"message": "Upload cancelled"}
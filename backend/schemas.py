@@ -318,6 +318,50 @@ class AssessmentSubmissionResponse(AssessmentSubmissionBase):
     class Config:
         from_attributes = True
 
+class AssessmentSubmissionSummary(BaseModel):
+    """Inbox row: submission columns plus trainee/task labels, without feedback bodies."""
+    id: int
+    user_id: int
+    username: str
+    full_name: Optional[str] = None
+    task_id: int
+    set_number: Optional[int] = None
+    task_code: Optional[str] = None
+    task_title: Optional[str] = None
+    assessment_type: Optional[str] = "3D"
+    status: str
+    trainer_id: Optional[int] = None
+    submitted_at: datetime
+    updated_at: Optional[datetime] = None
+    feedback_count: int = 0
+
+class AssessmentSubmissionPage(BaseModel):
+    items: List[AssessmentSubmissionSummary]
+    next_cursor: Optional[str] = None
+
+class UploadSessionCreate(BaseModel):
+    """
+    Start a resumable upload. "submission" uploads answer task_id; "task" uploads
+    (admin only) add a unit to set_number the way the bulk upload does.
+    """
+    filename: str
+    size: int
+    sha256: Optional[str] = None  # Whole-file hash, checked on finalize
+    purpose: Literal["submission", "task"]
+    task_id: Optional[int] = None
+    set_number: Optional[int] = None
+    set_name: Optional[str] = None
+    is_assembly: bool = False
+    assessment_type: str = "3D"
+
+class UploadSessionResponse(BaseModel):
+    upload_id: str
+    filename: str
+    size: int
+    chunk_size: int
+    chunk_count: int
+    received: List[int] = []
+
 class TrainerTraineeMappingBase(BaseModel):
     trainer_id: int
     trainee_id: int
@@ -0,0 +1,178 @@
+"""
+Benchmark the hot multi-column query shapes before and after the composite index pack
+(alembic revision db5e37d1f38b), printing the EXPLAIN plan and timings for each.
+
+"Before" is the schema as create_all() built it until now: the single-column indexes
+only. "After" adds the pack's indexes. Runs against a throwaway SQLite file by default;
+pass --url to run against a scratch MySQL database instead (its tables are dropped at
+the end, so never point it at the real one).
+
+Usage: python scripts/benchmark_hot_indexes.py [--trainees 500] [--samples 200] [--url mysql+pymysql://...]
+"""
+
+import sys
+import os
+import argparse
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+# The services use package-relative imports, so import through the backend package
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from sqlalchemy import create_engine, select, insert, func, cast, Integer
+
+from backend.database import Base
+from backend.models import (
+    User, Quiz, Question, QuestionAttempt, QuizScore, AssessmentTask, AssessmentSubmission,
+    Notification, TraineeSetMapping,
+)
+
+# Same list as the migration; the benchmark must not depend on alembic being installed
+PACK = [
+    "ix_assessment_submissions_attempt",
+    "ix_quiz_scores_user_course_lesson",
+    "ix_question_attempts_user_quiz",
+    "ix_question_attempts_question",
+    "ix_notifications_recipient_created",
+    "ix_notifications_recipient_unread",
+    "ix_trainee_set_mappings_trainee_type",
+]
+
+
+def pack_indexes():
+    found = {ix.name: ix for table in Base.metadata.tables.values() for ix in table.indexes}
+    return [found[name] for name in PACK]
+
+
+def seed(engine, trainees: int):
+    rng = random.Random(trainees)
+    started = datetime(2026, 1, 5, 9, 0, 0)
+    at = lambda: started + timedelta(minutes=rng.randint(0, 200000))
+    with engine.begin() as conn:
+        conn.execute(insert(User), [
+            dict(id=i, username=f"bench_{i}", email=f"bench{i}@kmti.local", hashed_password="x",
+                 role="employee" if i == 1 else "trainee")
+            for i in range(1, trainees + 2)
+        ])
+        conn.execute(insert(Quiz), [dict(id=q, slug=f"quiz-{q}", title=f"Quiz {q}", course_type="3D_Modeling") for q in range(1, 41)])
+        conn.execute(insert(Question), [
+            dict(id=q, quiz_id=(q - 1) // 10 + 1, text=f"Q{q}", options_json="[]", correct_answer=0)
+            for q in range(1, 401)
+        ])
+        conn.execute(insert(AssessmentTask), [
+            dict(id=t, set_number=(t - 1) // 4 + 1, title=f"Task {t}", assessment_type="3D" if t <= 60 else "2D")
+            for t in range(1, 81)
+        ])
+        users = range(2, trainees + 2)
+        conn.execute(insert(QuizScore), [
+            dict(user_id=u, course_id=rng.choice("12"), lesson_id=f"quiz-{q}", score=rng.uniform(40, 100), completed_at=at())
+            for u in users for q in rng.sample(range(1, 41), 30)
+        ])
+        conn.execute(insert(QuestionAttempt), [
+            dict(user_id=u, quiz_id=(q - 1) // 10 + 1, question_id=q, chosen_option=0, is_correct=rng.random() < 0.7,
+                 seconds_spent=rng.randint(5, 90), attempted_at=at())
+            for u in users for q in rng.choices(range(1, 401), k=200)
+        ])
+        conn.execute(insert(AssessmentSubmission), [
+            dict(user_id=u, task_id=t, assessment_type="3D" if t <= 60 else "2D", is_deleted=False,
+                 status=rng.choice(["pending", "approved", "rejected"]), submission_file_path="uploads/x.dwg", submitted_at=at())
+            for u in users for t in rng.choices(range(1, 81), k=40)
+        ])
+        conn.execute(insert(Notification), [
+            dict(recipient_id=u, message="A new assessment set has been unlocked by your trainer.",
+                 type="assessment_unlocked", is_read=rng.random() < 0.8, created_at=at())
+            for u in users for _ in range(50)
+        ])
+        conn.execute(insert(TraineeSetMapping), [
+            dict(trainee_id=u, trainer_id=1, display_set_number=n, actual_set_number=s, assessment_type=kind)
+            for u in users for kind in ("3D", "2D") for n, s in enumerate(rng.sample(range(1, 16), 3), start=1)
+        ])
+
+
+def hot_queries():
+    """(label, statement factory taking a sampled trainee id) — each mirrors a router query."""
+    return [
+        ("submit_task: pending attempts", lambda u: select(AssessmentSubmission.id).where(
+            AssessmentSubmission.user_id == u, AssessmentSubmission.task_id == 7,
+            AssessmentSubmission.assessment_type == "3D", AssessmentSubmission.status == "pending",
+            AssessmentSubmission.is_deleted == False)),
+        ("submit_quiz_score: best score row", lambda u: select(QuizScore.id).where(
+            QuizScore.user_id == u, QuizScore.course_id == "1", QuizScore.lesson_id == "quiz-12")),
+        ("trainee attempts for a quiz", lambda u: select(QuestionAttempt.id).where(
+            QuestionAttempt.user_id == u, QuestionAttempt.quiz_id == 3).order_by(QuestionAttempt.attempted_at.desc())),
+        ("question performance", lambda u: select(
+            Question.id, func.count(QuestionAttempt.id), func.sum(cast(QuestionAttempt.is_correct, Integer))
+        ).join(QuestionAttempt, Question.id == QuestionAttempt.question_id).where(Question.quiz_id == 3).group_by(Question.id)),
+        ("notifications: bell list", lambda u: select(Notification.id).where(
+            Notification.recipient_id == u).order_by(Notification.created_at.desc())),
+        ("notifications: unread", lambda u: select(Notification.id).where(
+            Notification.recipient_id == u, Notification.is_read == False)),
+        ("set mappings by type", lambda u: select(TraineeSetMapping.actual_set_number).where(
+            TraineeSetMapping.trainee_id == u, TraineeSetMapping.assessment_type == "2D")),
+    ]
+
+
+def explain(conn, statement):
+    sql = str(statement.compile(dialect=conn.dialect, compile_kwargs={"literal_binds": True}))
+    prefix = "EXPLAIN QUERY PLAN " if conn.dialect.name == "sqlite" else "EXPLAIN "
+    rows = conn.exec_driver_sql(prefix + sql).all()
+    if conn.dialect.name == "sqlite":
+        return [row[-1] for row in rows]
+    return [f"{row.table}: key={row.key} rows={row.rows} {row.Extra or ''}".strip() for row in rows]
+
+
+def measure(engine, sample):
+    results = {}
+    with engine.connect() as conn:
+        if conn.dialect.name == "sqlite":
+            conn.exec_driver_sql("ANALYZE")
+        for label, build in hot_queries():
+            plan = explain(conn, build(sample[0]))
+            conn.execute(build(sample[0])).all()  # warm the page cache
+            started = time.perf_counter()
+            for user_id in sample:
+                conn.execute(build(user_id)).all()
+            results[label] = (plan, (time.perf_counter() - started) * 1000 / len(sample))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--trainees", type=int, default=500)
+    parser.add_argument("--samples", type=int, default=200, help="trainees each query is timed for")
+    parser.add_argument("--url", help="scratch database URL (default: a temporary SQLite file)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(args.url or f"sqlite:///{os.path.join(tmp, 'hot_indexes.db')}")
+        Base.metadata.create_all(bind=engine)
+        try:
+            for index in pack_indexes():
+                index.drop(bind=engine)
+            seed(engine, args.trainees)
+            sample = random.Random(0).choices(range(2, args.trainees + 2), k=args.samples)
+
+            before = measure(engine, sample)
+            for index in pack_indexes():
+                index.create(bind=engine)
+            after = measure(engine, sample)
+        finally:
+            if args.url:
+                Base.metadata.drop_all(bind=engine)
+            engine.dispose()
+
+    print(f"[+] {engine.dialect.name}, {args.trainees} trainees, {args.samples} samples per query\n")
+    for label, (plan_before, ms_before) in before.items():
+        plan_after, ms_after = after[label]
+        speedup = ms_before / ms_after if ms_after else float("inf")
+        print(f"{label}: {ms_before:.3f} ms -> {ms_after:.3f} ms per query ({speedup:.1f}x)")
+        for line in plan_before:
+            print(f"    before: {line}")
+        for line in plan_after:
+            print(f"    after:  {line}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""
+Benchmark the SQLite fallback write path: 50 simulated trainees sending heartbeats
+and activity logs concurrently, every fifth write a quiz submission.
+
+  before: WAL only, every write is its own session + commit on the request thread
+  after:  tuned pragmas (database.SQLITE_PRAGMAS) + single writer thread with group commit
+
+Runs against throwaway database files; the real kmti_icad.db is never touched.
+
+Usage: python scripts/benchmark_sqlite_writes.py [--trainees 50] [--writes 40]
+"""
+
+import sys
+import os
+import argparse
+import tempfile
+import threading
+import time
+
+# The services use package-relative imports, so import through the backend package
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import QueuePool
+
+from backend.database import Base, apply_sqlite_pragmas, SQLITE_PRAGMAS
+from backend.models import User, UserActivity, SystemLog, Quiz
+from backend.schemas import QuizSubmission
+from backend.services.progress_service import record_quiz_submission
+from backend.write_queue import WriteQueue
+
+
+def make_engine(path, pragmas, pool_size=5):
+    engine = create_engine(
+        f"sqlite:///{path}",
+        poolclass=QueuePool,
+        pool_size=pool_size,
+        max_overflow=60,
+        connect_args={"check_same_thread": False},
+    )
+    event.listen(engine, "connect", lambda conn, _record: apply_sqlite_pragmas(conn, pragmas))
+    Base.metadata.create_all(bind=engine)
+    return engine
+
+
+def seed_users(Session, count):
+    with Session() as db:
+        db.add_all([
+            User(username=f"bench_trainee_{i}", email=f"bench{i}@kmti.local", hashed_password="x", role="trainee")
+            for i in range(count)
+        ])
+        db.add(Quiz(slug="bench-quiz", title="Bench Quiz", course_type="3D_Modeling"))
+        db.commit()
+        return [u.id for u in db.query(User).all()]
+
+
+def heartbeat(db, user_id, n):
+    activity = db.query(UserActivity).filter(UserActivity.user_id == user_id).first()
+    if activity is None:
+        db.add(UserActivity(user_id=user_id, current_activity=f"Lesson {n}"))
+    else:
+        activity.current_activity = f"Lesson {n}"
+    db.add(SystemLog(level="INFO", message=f"heartbeat {n}", context="BENCH", user_id=user_id))
+    if n % 5 == 4:
+        record_quiz_submission(db, user_id, QuizSubmission(
+            course_id="1", lesson_id="bench-quiz", score=60.0 + n,
+            answers=[{"question_id": 1, "chosen_option": n % 4, "is_correct": n % 2 == 0}],
+        ))
+
+
+def run_trainees(user_ids, writes, do_write):
+    errors = []
+
+    def trainee(user_id):
+        for n in range(writes):
+            try:
+                do_write(user_id, n)
+            except Exception as e:
+                errors.append(e)
+
+    threads = [threading.Thread(target=trainee, args=(uid,)) for uid in user_ids]
+    started = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return time.perf_counter() - started, errors
+
+
+def bench_before(path, trainees, writes):
+    engine = make_engine(path, {"journal_mode": "WAL"})
+    Session = sessionmaker(bind=engine, autoflush=False)
+    user_ids = seed_users(Session, trainees)
+
+    def direct_write(user_id, n):
+        with Session() as db:
+            heartbeat(db, user_id, n)
+            db.commit()
+
+    elapsed, errors = run_trainees(user_ids, writes, direct_write)
+    engine.dispose()
+    return elapsed, errors, None
+
+
+def bench_after(path, trainees, writes):
+    engine = make_engine(path, SQLITE_PRAGMAS, pool_size=20)
+    Session = sessionmaker(bind=engine, autoflush=False)
+    user_ids = seed_users(Session, trainees)
+    writer = WriteQueue(session_factory=Session)
+
+    def queued_write(user_id, n):
+        # Handlers don't wait for fire-and-forget writes; the benchmark waits at the end
+        writer.submit(lambda db: heartbeat(db, user_id, n))
+
+    elapsed, errors = run_trainees(user_ids, writes, queued_write)
+    started = time.perf_counter()
+    writer.flush()
+    elapsed += time.perf_counter() - started
+    engine.dispose()
+    return elapsed, errors, writer
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--trainees", type=int, default=50)
+    parser.add_argument("--writes", type=int, default=40, help="heartbeats per trainee")
+    args = parser.parse_args()
+    total = args.trainees * args.writes
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for label, bench in (("before", bench_before), ("after", bench_after)):
+            elapsed, errors, writer = bench(os.path.join(tmp, f"{label}.db"), args.trainees, args.writes)
+            line = f"{label:>6}: {total} writes in {elapsed:.2f}s = {total / elapsed:,.0f} writes/s, {len(errors)} error(s)"
+            if writer is not None:
+                line += f", {writer.batches_committed} commits"
+            print(line)
+            if errors:
+                print(f"        first error: {errors[0]}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+Benchmark the trainer dashboard aggregate (/assessments/trainer/trainees-progress)
+at growing trainee counts. The query count must stay flat; only the row volume grows.
+
+Each trainee gets quiz scores, 3D set assignments, submissions and an activity row.
+Runs against a throwaway database file; the real kmti_icad.db is never touched.
+
+Usage: python scripts/benchmark_trainees_progress.py [--sizes 50 200 1000]
+"""
+
+import sys
+import os
+import argparse
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+# The services use package-relative imports, so import through the backend package
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from backend.database import Base
+from backend.models import (
+    User, Quiz, QuizScore, AssessmentTask, AssessmentSubmission, TraineeSetMapping, UserActivity,
+)
+from backend.query_counter import count_queries
+from backend.services.progress_service import calculate_trainee_dashboard_progress
+
+
+def seed(Session, trainees):
+    rng = random.Random(trainees)
+    started = datetime(2026, 1, 5, 9, 0, 0)
+    with Session() as db:
+        trainer = User(username="bench_trainer", email="trainer@kmti.local", hashed_password="x", role="employee")
+        db.add(trainer)
+        db.add_all([Quiz(slug=f"q3d-{i}", title=f"3D {i}", course_type="3D_Modeling") for i in range(20)])
+        db.add_all([Quiz(slug=f"q2d-{i}", title=f"2D {i}", course_type="2D_Drawing") for i in range(25)])
+        tasks = [
+            AssessmentTask(set_number=s, title=f"Set {s} {code}", assessment_type="3D")
+            for s in range(1, 11) for code in "ABC"
+        ] + [AssessmentTask(set_number=20 + i, title=f"2D Assembly {i}", assessment_type="2D", is_assembly=True) for i in range(5)]
+        db.add_all(tasks)
+        db.flush()
+
+        users = [
+            User(username=f"bench_trainee_{i}", email=f"bench{i}@kmti.local", hashed_password="x", role="trainee")
+            for i in range(trainees)
+        ]
+        db.add_all(users)
+        db.flush()
+        for user in users:
+            db.add_all([
+                QuizScore(user_id=user.id, course_id=rng.choice("12"), lesson_id=f"lesson-{n}",
+                          score=rng.uniform(50, 100), completed_at=started + timedelta(minutes=rng.randint(0, 10000)))
+                for n in range(rng.randint(0, 30))
+            ])
+            db.add_all([
+                TraineeSetMapping(trainee_id=user.id, trainer_id=trainer.id, display_set_number=n, actual_set_number=s)
+                for n, s in enumerate(rng.sample(range(1, 11), 3), start=1)
+            ])
+            db.add_all([
+                AssessmentSubmission(user_id=user.id, task_id=task.id, status=rng.choice(["pending", "approved", "rejected"]),
+                                     assessment_type=task.assessment_type, submission_file_path="uploads/x.dwg",
+                                     submitted_at=started + timedelta(minutes=rng.randint(0, 10000)))
+                for task in rng.sample(tasks, 8)
+            ])
+            if rng.random() < 0.5:
+                db.add(UserActivity(user_id=user.id, current_activity="Lesson: Part Modeling"))
+        db.commit()
+        return [u.id for u in users]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[50, 200, 1000])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in args.sizes:
+            engine = create_engine(f"sqlite:///{os.path.join(tmp, f'trainees_{size}.db')}")
+            Base.metadata.create_all(bind=engine)
+            Session = sessionmaker(bind=engine, autoflush=False)
+            user_ids = seed(Session, size)
+
+            with Session() as db:
+                started = time.perf_counter()
+                with count_queries() as stats:
+                    calculate_trainee_dashboard_progress(db, user_ids)
+                elapsed_ms = (time.perf_counter() - started) * 1000
+            engine.dispose()
+            print(f"{size:>5} trainees: {stats.count} queries, {stats.time_ms:.1f} ms in DB, {elapsed_ms:.1f} ms total")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""
+Prebuild the per-set master unit bundles so the first trainee to download a set
+doesn't wait for it, e.g. right after copying new units onto the NAS and syncing.
+
+Sets whose files haven't changed keep their existing bundle. Superseded bundles of a
+set are removed when its new one is built.
+
+Usage: python scripts/build_bundles.py [--set 4] [--type 3D]
+"""
+
+import sys
+import os
+import argparse
+
+# The services use package-relative imports, so import through the backend package
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from backend.database import SessionLocal
+from backend.models import AssessmentTask
+from backend.services.bundle_service import bundle_cache
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--set", type=int, dest="set_number", help="only this set number")
+    parser.add_argument("--type", dest="assessment_type", choices=["3D", "2D"], help="only this assessment type")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        sets = sorted({
+            (set_number, assessment_type or "3D")
+            for set_number, assessment_type in db.query(AssessmentTask.set_number, AssessmentTask.assessment_type).distinct()
+        })
+        for set_number, assessment_type in sets:
+            if args.set_number is not None and set_number != args.set_number:
+                continue
+            if args.assessment_type and assessment_type != args.assessment_type:
+                continue
+            bundle = bundle_cache.get(db, set_number, assessment_type)
+            if bundle is None:
+                print(f"[!] Set {set_number} {assessment_type}: no files found")
+            else:
+                print(f"[+] Set {set_number} {assessment_type}: {bundle.member_count} files, "
+                      f"{os.path.getsize(bundle.path)} bytes -> {bundle.path}")
+    except Exception as e:
+        print(f"[!] Bundle build failed: {e}")
+        return 2
+    finally:
+        db.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,46 @@
+"""
+Reclaim blobs in the content-addressed upload store that no master unit, submission
+or checkback path has referenced for the grace period, plus stray files in the store.
+
+Submissions and feedback release their references when they are permanently deleted
+or the trash is emptied; this removes the files. Run it from a scheduled task.
+
+Usage: python scripts/gc_blobs.py [--dry-run] [--grace-hours 24]
+"""
+
+import sys
+import os
+import argparse
+
+# The services use package-relative imports, so import through the backend package
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from backend.database import SessionLocal
+from backend.services.storage_service import collect_garbage, CAS_GC_GRACE_SECONDS
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--dry-run", action="store_true", help="report what would be removed")
+    parser.add_argument("--grace-hours", type=float, default=CAS_GC_GRACE_SECONDS / 3600,
+                        help="keep unreferenced blobs at least this long")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        stats = collect_garbage(db, grace_seconds=args.grace_hours * 3600, dry_run=args.dry_run)
+    except Exception as e:
+        db.rollback()
+        print(f"[!] Garbage collection failed: {e}")
+        return 2
+    finally:
+        db.close()
+
+    action = "would be" if args.dry_run else "were"
+    print(f"[+] {stats['blobs']} unreferenced blob(s) and {stats['orphans']} stray file(s) {action} removed "
+          f"({stats['bytes']} bytes).")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
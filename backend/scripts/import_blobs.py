@@ -0,0 +1,74 @@
+"""
+Move files written before the content-addressed store existed into it, so identical
+master units and resubmitted drawings are kept once.
+
+Every single-file master unit, submission and checkback path recorded in the database
+is hashed, copied into {UPLOAD_DIR}/cas and linked in blob_refs; the original is then
+deleted. Zip-extracted master folders stay where they are. Safe to re-run: paths that
+are already in the store are skipped. With --dry-run nothing is changed and the space
+that would be reclaimed is reported.
+
+Usage: python scripts/import_blobs.py [--dry-run] [--keep-originals]
+"""
+
+import sys
+import os
+import argparse
+
+# The services use package-relative imports, so import through the backend package
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from backend.database import SessionLocal, Base, engine
+from backend.models import AssessmentTask, AssessmentSubmission, AssessmentFeedback, BlobRef
+from backend.services.storage_service import adopt_file, hash_file, resolve_master_path
+
+
+def recorded_paths(db):
+    """(logical path, file on disk) for every stored path not yet in the blob store."""
+    linked = {path for (path,) in db.query(BlobRef.path).all()}
+    candidates = [(p, resolve_master_path(p)) for (p,) in db.query(AssessmentTask.master_file_path).distinct()]
+    candidates += [(p, p) for (p,) in db.query(AssessmentSubmission.submission_file_path).distinct()]
+    candidates += [(p, p) for (p,) in db.query(AssessmentFeedback.checkback_file_path).distinct()]
+    return [(path, file_path) for path, file_path in candidates
+            if path and path not in linked and file_path and os.path.isfile(file_path)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--dry-run", action="store_true", help="hash and report only")
+    parser.add_argument("--keep-originals", action="store_true", help="don't delete files once they are in the store")
+    args = parser.parse_args()
+
+    Base.metadata.create_all(bind=engine, tables=[Base.metadata.tables["file_blobs"], Base.metadata.tables["blob_refs"]])
+    db = SessionLocal()
+    seen, total, unique = set(), 0, 0
+    try:
+        for path, file_path in recorded_paths(db):
+            if args.dry_run:
+                size, sha256 = hash_file(file_path)
+            else:
+                stored = adopt_file(db, path, file_path)
+                db.commit()
+                size, sha256 = stored.size, stored.sha256
+                if not args.keep_originals:
+                    os.remove(file_path)
+            total += size
+            if sha256 not in seen:
+                seen.add(sha256)
+                unique += size
+            print(f"  {sha256[:12]} {size:>12} {path}")
+    except Exception as e:
+        db.rollback()
+        print(f"[!] Import failed: {e}")
+        return 2
+    finally:
+        db.close()
+
+    action = "would be" if args.dry_run else "were"
+    print(f"[+] {total} bytes across the imported paths {action} stored as {unique} bytes "
+          f"({len(seen)} distinct blobs).")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,53 @@
+"""
+Recompute trainee_progress_snapshot from the raw quiz, submission and set-mapping
+tables, and report any drift between the stored counters and the real data.
+
+Run it once after deploying the snapshot table (to backfill it), and any time the
+dashboards look off. With --check nothing is written; the exit code is 1 when drift
+was found, so it can run from a scheduled task.
+
+Usage: python scripts/rebuild_progress_snapshots.py [--check] [--chunk-size 500]
+"""
+
+import sys
+import os
+import argparse
+
+# The services use package-relative imports, so import through the backend package
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from backend.database import SessionLocal, Base, engine
+from backend.services.progress_service import rebuild_trainee_snapshots
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--check", action="store_true", help="report drift only, don't rewrite snapshots")
+    parser.add_argument("--chunk-size", type=int, default=500, help="trainees recomputed per batch")
+    args = parser.parse_args()
+
+    Base.metadata.create_all(bind=engine, tables=[Base.metadata.tables["trainee_progress_snapshot"]])
+    db = SessionLocal()
+    try:
+        drift = rebuild_trainee_snapshots(db, check_only=args.check, chunk_size=args.chunk_size)
+        if not args.check:
+            db.commit()
+    except Exception as e:
+        db.rollback()
+        print(f"[!] Snapshot rebuild failed: {e}")
+        return 2
+    finally:
+        db.close()
+
+    trainees = sorted({user_id for user_id, *_ in drift})
+    for user_id, column, stored, actual in drift[:50]:
+        print(f"  user {user_id}: {column} stored={stored!r} actual={actual!r}")
+    if len(drift) > 50:
+        print(f"  ... and {len(drift) - 50} more")
+    action = "found" if args.check else "fixed"
+    print(f"[+] {len(drift)} drifted value(s) across {len(trainees)} trainee(s) {action}.")
+    return 1 if drift and args.check else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -127,6 +127,14 @@ if __name__ == "__main__":
             print("[+] SQLite-to-MySQL sync worker started successfully.")
         except Exception as se:
             print(f"[!] Sync worker could not be started: {se}")
+
+        # Start MySQL-to-SQLite warm-standby replicator (keeps the fallback DB current)
+        try:
+            from backend.standby_replica import start_standby_replicator
+            start_standby_replicator()
+            print("[+] Standby replicator started successfully.")
+        except Exception as re_err:
+            print(f"[!] Standby replicator could not be started: {re_err}")
         
         port = int(os.getenv("SERVER_PORT", 3001))
         host = "0.0.0.0"
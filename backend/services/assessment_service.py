@@ -1,5 +1,10 @@
+from datetime import datetime
+from sqlalchemy import select, func, or_, and_
 from sqlalchemy.orm import Session
-from ..models import AssessmentTask
+from ..models import AssessmentTask, AssessmentSubmission, AssessmentFeedback, User
+from .keyset import encode_cursor, decode_cursor
+
+INBOX_PAGE_MAX = 200
 
 def resequence_set_task_codes(db: Session, set_number: int, assessment_type: str = "3D"):
     tasks = db.query(AssessmentTask).filter(
@@ -8,9 +13,85 @@ def resequence_set_task_codes(db: Session, set_number: int, assessment_type: str
     ).order_by(AssessmentTask.order, AssessmentTask.id).all()
     assemblies = [t for t in tasks if t.is_assembly]
     parts = [t for t in tasks if not t.is_assembly]
-    
+
     for i, a in enumerate(assemblies):
         a.task_code = f"A{i+1}"
     for i, p in enumerate(parts):
         p.task_code = f"P{i+1}"
     db.commit()
+
+
+def inbox_conditions(status: str = "pending", trainee_ids=None, trainee_id: int = None,
+                     set_number: int = None, task_id: int = None, assessment_type: str = None,
+                     submitted_from: datetime = None, submitted_to: datetime = None):
+    """
+    WHERE clauses for the trainer submission inbox. trainee_ids limits an employee to
+    their assigned trainees (None = admin, every trainee). status is "pending",
+    "approved", "rejected", "reviewed" (approved or rejected) or "all".
+    submitted_from/submitted_to bound submitted_at (inclusive/exclusive).
+    """
+    conditions = [AssessmentSubmission.is_deleted == False]
+    if status == "reviewed":
+        conditions.append(AssessmentSubmission.status.in_(["approved", "rejected"]))
+    elif status != "all":
+        conditions.append(AssessmentSubmission.status == status)
+    if trainee_ids is not None:
+        conditions.append(AssessmentSubmission.user_id.in_(trainee_ids))
+    if trainee_id is not None:
+        conditions.append(AssessmentSubmission.user_id == trainee_id)
+    if task_id is not None:
+        conditions.append(AssessmentSubmission.task_id == task_id)
+    if set_number is not None:
+        conditions.append(AssessmentSubmission.task_id.in_(
+            select(AssessmentTask.id).where(AssessmentTask.set_number == set_number)
+        ))
+    if assessment_type is not None:
+        conditions.append(AssessmentSubmission.assessment_type == assessment_type)
+    if submitted_from is not None:
+        conditions.append(AssessmentSubmission.submitted_at >= submitted_from)
+    if submitted_to is not None:
+        conditions.append(AssessmentSubmission.submitted_at < submitted_to)
+    return conditions
+
+
+def page_trainer_submissions(db: Session, limit: int = 50, cursor: str = None, **filters):
+    """
+    One inbox page, newest first: {"items": [summary rows], "next_cursor": str | None}.
+
+    Rows are column projections joined to the trainee and task; feedback is only
+    counted here; the full submission is loaded when a row is opened.
+    """
+    limit = max(1, min(limit, INBOX_PAGE_MAX))
+    query = (
+        select(
+            AssessmentSubmission.id, AssessmentSubmission.user_id, User.username, User.full_name,
+            AssessmentSubmission.task_id, AssessmentTask.set_number, AssessmentTask.task_code,
+            AssessmentTask.title.label("task_title"), AssessmentSubmission.assessment_type,
+            AssessmentSubmission.status, AssessmentSubmission.trainer_id,
+            AssessmentSubmission.submitted_at, AssessmentSubmission.updated_at,
+        )
+        .join(User, User.id == AssessmentSubmission.user_id)
+        .join(AssessmentTask, AssessmentTask.id == AssessmentSubmission.task_id)
+        .where(*inbox_conditions(**filters))
+    )
+    if cursor:
+        submitted_at, last_id = decode_cursor(cursor, datetime.fromisoformat, int)
+        query = query.where(or_(
+            AssessmentSubmission.submitted_at < submitted_at,
+            and_(AssessmentSubmission.submitted_at == submitted_at, AssessmentSubmission.id < last_id),
+        ))
+    rows = db.execute(
+        query.order_by(AssessmentSubmission.submitted_at.desc(), AssessmentSubmission.id.desc()).limit(limit + 1)
+    ).mappings().all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    feedback_counts = dict(db.execute(
+        select(AssessmentFeedback.submission_id, func.count())
+        .where(AssessmentFeedback.submission_id.in_([r["id"] for r in rows]))
+        .group_by(AssessmentFeedback.submission_id)
+    ).all()) if rows else {}
+
+    items = [{**row, "feedback_count": feedback_counts.get(row["id"], 0)} for row in rows]
+    next_cursor = encode_cursor(rows[-1]["submitted_at"], rows[-1]["id"]) if has_more else None
+    return {"items": items, "next_cursor": next_cursor}
@@ -0,0 +1,223 @@
+"""
+One downloadable archive per (set_number, assessment_type) holding every master unit
+file of the set: the assemblies, their Parts folders and anything added through the
+task file manager. A trainee fetches it in one ranged request instead of a file at a
+time off the NAS.
+
+A bundle is keyed by a content hash of its members (their names and SHA-256s) and
+built once into {UPLOAD_DIR}/bundles/set<n>_<type>_<key>.zip; every later request is
+served from that file, and the key doubles as its ETag. Member hashes are cached by
+(size, mtime), and blob store members are named after theirs, so only files that
+changed are read again.
+
+The member list itself is cached until invalidate() (task file upload/delete, folder
+sync), a task catalog version bump (any task endpoint) or BUNDLE_MAX_AGE seconds, for
+writers outside this process. Recomputing it only rebuilds the archive if the content
+hash moved.
+"""
+
+import os
+import time
+import uuid
+import hashlib
+import logging
+import threading
+import zipfile
+from typing import NamedTuple, Optional
+from sqlalchemy.orm import Session
+
+from .archive_service import ArchiveEntry, unique_name
+from .storage_service import resolve_blob, resolve_master_path, blob_sha256, hash_file, master_units_dir
+from .task_catalog import task_catalog
+from ..database import APP_PATH, add_db_mode_listener
+from ..models import AssessmentTask
+
+logger = logging.getLogger(__name__)
+
+BUNDLE_MAX_AGE = float(os.getenv("BUNDLE_MAX_AGE", "300"))
+# Built once, downloaded many times: spend the CPU on a smaller archive
+BUNDLE_COMPRESSLEVEL = int(os.getenv("BUNDLE_COMPRESSLEVEL", "6"))
+
+
+class Bundle(NamedTuple):
+    path: str
+    key: str           # SHA-256 over the member names and contents
+    member_count: int
+
+
+def bundles_root() -> str:
+    return os.path.join(os.getenv("UPLOAD_DIR", os.path.join(APP_PATH, "uploads")), "bundles")
+
+
+def _prefix(set_number: int, assessment_type: str) -> str:
+    return f"set{set_number}_{assessment_type}_"
+
+
+def bundle_members(db: Session, set_number: int, assessment_type: str) -> list:
+    """
+    Every file of the set as ArchiveEntry(name, physical path), named relative to the
+    folder its files share. A master kept in the blob store is read from the store under
+    its logical name.
+
+    Besides the masters themselves only the units' own folders are walked (a folder
+    master, or the folder a NAS unit file sits in), never the master_units/set<n> folder
+    every type and upload shares; other tasks' masters and in-flight .part files are left out.
+    """
+    tasks = db.query(AssessmentTask).filter(AssessmentTask.master_file_path.isnot(None)).order_by(
+        AssessmentTask.order, AssessmentTask.task_code, AssessmentTask.id
+    ).all()
+    mine = [t for t in tasks if t.set_number == set_number and (t.assessment_type or "3D") == assessment_type]
+    foreign = {
+        os.path.abspath(resolve_master_path(t.master_file_path))
+        for t in tasks if t.set_number != set_number or (t.assessment_type or "3D") != assessment_type
+    }
+    shared = os.path.abspath(master_units_dir())
+
+    found = {}  # logical path -> physical path
+    folders = []
+    for task in mine:
+        logical = os.path.abspath(resolve_master_path(task.master_file_path))
+        if os.path.isdir(logical):
+            folders.append(logical)
+            continue
+        physical = resolve_blob(db, task.master_file_path) or logical
+        if os.path.isfile(physical):
+            found[logical] = physical
+        folder = os.path.dirname(logical)
+        if not _within(folder, shared):
+            folders.append(folder)
+
+    # The unit folders hold whatever else the admin put next to the masters
+    for folder in dict.fromkeys(folders):
+        for root, dirs, files in os.walk(folder):
+            dirs[:] = [d for d in dirs if os.path.normpath(os.path.join(root, d)) not in foreign]
+            for name in files:
+                path = os.path.normpath(os.path.join(root, name))
+                if name.endswith(".part") or path in foreign:
+                    continue
+                found.setdefault(path, path)
+    if not found:
+        return []
+
+    try:
+        base = os.path.commonpath([os.path.dirname(logical) for logical in found])
+    except ValueError:  # different drives
+        base = None
+    used = set()
+    return [
+        ArchiveEntry(
+            unique_name((os.path.relpath(logical, base) if base else os.path.basename(logical)).replace("\\", "/"), used),
+            physical,
+        )
+        for logical, physical in sorted(found.items())
+    ]
+
+
+def _within(path: str, folder: str) -> bool:
+    try:
+        return os.path.commonpath([path, folder]) == folder
+    except ValueError:
+        return False
+
+
+class BundleCache:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._bundles = {}       # (set_number, assessment_type) -> (catalog version, built at, Bundle)
+        self._build_locks = {}
+        self._hashes = {}        # path -> (size, mtime_ns, sha256)
+
+    def invalidate(self, set_number: Optional[int] = None, assessment_type: Optional[str] = None):
+        """Forget the member list of one set (either type if assessment_type is None), or of every set."""
+        with self._lock:
+            for key in list(self._bundles):
+                if set_number is None or (key[0] == set_number and assessment_type in (None, key[1])):
+                    del self._bundles[key]
+
+    def clear(self):
+        with self._lock:
+            self._bundles.clear()
+
+    def _file_sha256(self, path: str) -> str:
+        sha256 = blob_sha256(path)
+        if sha256:
+            return sha256
+        stat_result = os.stat(path)
+        cached = self._hashes.get(path)
+        if cached and cached[:2] == (stat_result.st_size, stat_result.st_mtime_ns):
+            return cached[2]
+        sha256 = hash_file(path)[1]
+        self._hashes[path] = (stat_result.st_size, stat_result.st_mtime_ns, sha256)
+        return sha256
+
+    def _cached(self, key) -> Optional[Bundle]:
+        with self._lock:
+            entry = self._bundles.get(key)
+        if entry is None:
+            return None
+        version, built_at, bundle = entry
+        if version != task_catalog.version or time.monotonic() - built_at > BUNDLE_MAX_AGE:
+            return None
+        return bundle if os.path.isfile(bundle.path) else None
+
+    def get(self, db: Session, set_number: int, assessment_type: str = "3D") -> Optional[Bundle]:
+        """The current bundle for the set, building it if needed; None if the set has no files."""
+        key = (set_number, assessment_type)
+        bundle = self._cached(key)
+        if bundle is not None:
+            return bundle
+
+        with self._lock:
+            build_lock = self._build_locks.setdefault(key, threading.Lock())
+        # One build per set at a time; everyone else waiting on it gets the result
+        with build_lock:
+            bundle = self._cached(key)
+            if bundle is not None:
+                return bundle
+
+            version = task_catalog.version
+            entries = bundle_members(db, set_number, assessment_type)
+            if not entries:
+                return None
+            manifest = "\n".join(f"{entry.name}\0{self._file_sha256(entry.file_path)}" for entry in entries)
+            content_key = hashlib.sha256(manifest.encode()).hexdigest()
+            path = os.path.join(bundles_root(), f"{_prefix(set_number, assessment_type)}{content_key}.zip")
+            if not os.path.isfile(path):
+                _build(entries, path)
+                logger.info(f"[+] Built bundle for set {set_number} {assessment_type}: {len(entries)} files, key {content_key[:12]}")
+                _prune(set_number, assessment_type, keep=path)
+
+            bundle = Bundle(path, content_key, len(entries))
+            with self._lock:
+                self._bundles[key] = (version, time.monotonic(), bundle)
+            return bundle
+
+
+def _build(entries, path: str):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    part_path = f"{path}.{uuid.uuid4().hex}.part"
+    try:
+        with zipfile.ZipFile(part_path, "w", compression=zipfile.ZIP_DEFLATED, compresslevel=BUNDLE_COMPRESSLEVEL) as archive:
+            for entry in entries:
+                archive.write(entry.file_path, arcname=entry.name)
+        os.replace(part_path, path)
+    except BaseException:
+        if os.path.exists(part_path):
+            os.remove(part_path)
+        raise
+
+
+def _prune(set_number: int, assessment_type: str, keep: str):
+    """Remove the set's superseded bundles (one still being downloaded on Windows stays until next time)."""
+    prefix = _prefix(set_number, assessment_type)
+    for name in os.listdir(bundles_root()):
+        path = os.path.join(bundles_root(), name)
+        if name.startswith(prefix) and name.endswith(".zip") and path != keep:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+
+bundle_cache = BundleCache()
+add_db_mode_listener(lambda old_mode, new_mode: bundle_cache.clear())
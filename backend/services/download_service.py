@@ -0,0 +1,70 @@
+"""
+File downloads with validators, conditional GET and byte ranges.
+
+file_download() answers If-None-Match / If-Modified-Since with 304 once the route has
+done its own authorization, and otherwise returns a FileDownload, which inherits
+Starlette's Range / If-Range handling (206, multipart ranges, 416). Blobs from the
+content-addressed store get their SHA-256 as a strong ETag, so the same drawing keeps
+its ETag however many tasks or submissions point at it; other files get Starlette's
+mtime/size ETag.
+
+Whole-file GETs go out through "http.response.pathsend" when the ASGI server offers
+it (FileResponse handles that, so the server can sendfile); otherwise the body is
+streamed in DOWNLOAD_CHUNK_SIZE reads.
+"""
+
+import os
+from email.utils import parsedate_to_datetime
+from typing import Optional
+
+from fastapi import Request, Response
+from starlette.responses import FileResponse
+
+from .storage_service import blob_sha256
+from ..http_cache import if_none_match
+
+DOWNLOAD_CHUNK_SIZE = int(os.getenv("DOWNLOAD_CHUNK_SIZE", str(1024 * 1024)))
+
+
+class FileDownload(FileResponse):
+    chunk_size = DOWNLOAD_CHUNK_SIZE
+
+
+def content_etag(path: str) -> Optional[str]:
+    """Strong ETag for a blob in the content-addressed store (its name is its SHA-256)."""
+    sha256 = blob_sha256(path)
+    return f'"{sha256}"' if sha256 else None
+
+
+def _not_modified(request: Request, etag: str, mtime: float) -> bool:
+    header = request.headers.get("if-none-match")
+    if header is not None:
+        return if_none_match(header, etag)
+    since = request.headers.get("if-modified-since")
+    if since:
+        try:
+            return int(mtime) <= parsedate_to_datetime(since).timestamp()
+        except (TypeError, ValueError):
+            return False
+    return False
+
+
+def file_download(request: Request, path: str, filename: str,
+                  media_type: str = "application/octet-stream", etag: Optional[str] = None) -> Response:
+    """
+    Serve path as an attachment named filename. Call it only after the caller has
+    checked the user may see the file: a 304 still tells them it exists. etag, if the
+    caller knows the content hash, overrides the default validator.
+    """
+    stat_result = os.stat(path)
+    headers = {"Cache-Control": "private, no-cache"}
+    etag = etag or content_etag(path)
+    if etag:
+        headers["ETag"] = etag
+    response = FileDownload(path, filename=filename, media_type=media_type, stat_result=stat_result, headers=headers)
+
+    if request.method in ("GET", "HEAD") and _not_modified(request, response.headers["etag"], stat_result.st_mtime):
+        return Response(status_code=304, headers={
+            key: response.headers[key] for key in ("etag", "last-modified", "cache-control")
+        })
+    return response
@@ -0,0 +1,30 @@
+"""
+Opaque cursors for keyset pagination: the (sort key..., id) of the last row a page
+returned, packed as URL-safe base64 JSON. The next page filters on those values
+instead of an OFFSET.
+"""
+
+import base64
+import json
+from datetime import datetime
+from fastapi import HTTPException
+
+
+def encode_cursor(*values) -> str:
+    """Cursor for the last row of a page; datetimes are stored as ISO strings."""
+    values = [v.isoformat() if isinstance(v, datetime) else v for v in values]
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+
+def decode_cursor(cursor: str, *parsers) -> tuple:
+    """
+    The values encode_cursor() packed, each passed through its parser (e.g. float,
+    int, datetime.fromisoformat). Anything malformed is a 400.
+    """
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        if len(values) != len(parsers):
+            raise ValueError(cursor)
+        return tuple(parse(value) for parse, value in zip(parsers, values))
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
@@ -0,0 +1,207 @@
+"""
+In-memory index of the upload root, so resolving a master unit path doesn't stat the
+NAS share on every download and file-tree request.
+
+Each directory is listed once with os.scandir and kept as {normcase(name): Entry}.
+A listing is trusted for PATH_INDEX_REVALIDATE seconds; after that one stat of the
+directory decides whether it changed (mtime) and must be listed again. exists() walks
+a path component by component through the listings, which is a few dict lookups when
+they are fresh. Paths found missing are remembered for PATH_INDEX_NEGATIVE_TTL seconds
+so the spelling fallbacks in resolve_master_path() don't re-check them on every call.
+
+Anything this process writes under the root calls invalidate() for the directory it
+changed; writers elsewhere (the NAS itself, a second backend) are picked up by the mtime
+check. Paths outside the upload root bypass the index. stats() exposes the counters.
+
+tree() serves the task file manager from the same listings.
+"""
+
+import os
+import stat
+import time
+import logging
+import threading
+from datetime import datetime
+from typing import NamedTuple, Optional
+
+from ..database import APP_PATH
+
+logger = logging.getLogger(__name__)
+
+PATH_INDEX_REVALIDATE = float(os.getenv("PATH_INDEX_REVALIDATE", "2"))
+PATH_INDEX_NEGATIVE_TTL = float(os.getenv("PATH_INDEX_NEGATIVE_TTL", "30"))
+# Listings kept before the index starts over (each is one directory's entries)
+PATH_INDEX_MAX_DIRS = int(os.getenv("PATH_INDEX_MAX_DIRS", "20000"))
+
+
+class Entry(NamedTuple):
+    name: str       # As spelled on disk
+    is_dir: bool
+    size: int
+    mtime: float
+
+
+class _Listing(NamedTuple):
+    mtime_ns: int
+    checked_at: float
+    entries: dict   # normcase(name) -> Entry
+
+
+def upload_root() -> str:
+    return os.path.abspath(os.getenv("UPLOAD_DIR", os.path.join(APP_PATH, "uploads")))
+
+
+def _entry(item: os.DirEntry) -> Optional[Entry]:
+    try:
+        is_dir = item.is_dir()
+        stat_result = item.stat()
+    except OSError:  # removed while listing, or a dangling link
+        return None
+    return Entry(item.name, is_dir, 0 if is_dir else stat_result.st_size, stat_result.st_mtime)
+
+
+class PathIndex:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._listings = {}  # directory -> _Listing
+        self._missing = {}   # path -> expires at
+        self._counters = dict.fromkeys(
+            ("hits", "misses", "revalidations", "scans", "negative_hits", "bypassed"), 0
+        )
+
+    def _count(self, name: str):
+        with self._lock:
+            self._counters[name] += 1
+
+    def invalidate(self, path: Optional[str] = None):
+        """
+        Call after creating, replacing or removing path: forgets the listings of path and
+        every directory above it, plus all cached misses. None forgets everything.
+        """
+        with self._lock:
+            self._missing.clear()
+            if path is None:
+                self._listings.clear()
+                return
+            path = os.path.abspath(path)
+            while True:
+                self._listings.pop(path, None)
+                parent = os.path.dirname(path)
+                if parent == path:
+                    break
+                path = parent
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {**self._counters, "directories": len(self._listings), "missing": len(self._missing)}
+
+    def _scan(self, directory: str, mtime_ns: int) -> _Listing:
+        entries = {}
+        with os.scandir(directory) as items:
+            for item in items:
+                entry = _entry(item)
+                if entry is not None:
+                    entries[os.path.normcase(entry.name)] = entry
+        self._count("scans")
+        return _Listing(mtime_ns, time.monotonic(), entries)
+
+    def listing(self, directory: str) -> Optional[dict]:
+        """{normcase(name): Entry} of directory, or None if it is not a directory."""
+        directory = os.path.abspath(directory)
+        with self._lock:
+            cached = self._listings.get(directory)
+        now = time.monotonic()
+        if cached is not None and now - cached.checked_at < PATH_INDEX_REVALIDATE:
+            return cached.entries
+
+        try:
+            stat_result = os.stat(directory)
+        except OSError:
+            with self._lock:
+                self._listings.pop(directory, None)
+            return None
+        if cached is not None and cached.mtime_ns == stat_result.st_mtime_ns:
+            self._count("revalidations")
+            fresh = cached._replace(checked_at=now)
+        else:
+            try:
+                fresh = self._scan(directory, stat_result.st_mtime_ns)
+            except (NotADirectoryError, FileNotFoundError):
+                return None
+        with self._lock:
+            if len(self._listings) >= PATH_INDEX_MAX_DIRS:
+                self._listings.clear()
+            self._listings[directory] = fresh
+        return fresh.entries
+
+    def lookup(self, path: str) -> Optional[Entry]:
+        """Entry for path if it exists under the upload root; bypasses the index (Entry or None from a stat) outside it."""
+        path = os.path.abspath(path)
+        root = upload_root()
+        try:
+            rel_path = os.path.relpath(path, root)
+        except ValueError:  # another drive
+            rel_path = os.pardir
+        if rel_path == os.pardir or rel_path.startswith(os.pardir + os.sep):
+            self._count("bypassed")
+            try:
+                stat_result = os.stat(path)
+            except OSError:
+                return None
+            is_dir = stat.S_ISDIR(stat_result.st_mode)
+            return Entry(os.path.basename(path), is_dir, 0 if is_dir else stat_result.st_size, stat_result.st_mtime)
+
+        now = time.monotonic()
+        with self._lock:
+            expires = self._missing.get(path)
+        if expires is not None and now < expires:
+            self._count("negative_hits")
+            return None
+
+        scans = self._counters["scans"]
+        directory, entry = root, None
+        if self.listing(root) is not None:
+            entry = Entry(os.path.basename(root), True, 0, 0.0)
+        if entry is not None and rel_path != os.curdir:
+            for part in rel_path.split(os.sep):
+                entries = self.listing(directory) if entry.is_dir else None
+                entry = entries.get(os.path.normcase(part)) if entries else None
+                if entry is None:
+                    break
+                directory = os.path.join(directory, entry.name)
+        self._count("hits" if self._counters["scans"] == scans else "misses")
+
+        if entry is None:
+            with self._lock:
+                self._missing[path] = now + PATH_INDEX_NEGATIVE_TTL
+        return entry
+
+    def exists(self, path: str) -> bool:
+        return self.lookup(path) is not None
+
+    def tree(self, directory: str, base_dir: str, depth: Optional[int] = None) -> list:
+        """
+        File manager nodes for directory, folders first, paths relative to base_dir. Files
+        carry size and modified_at, folders child_count. depth=None nests every level
+        under "children"; depth=1 returns just this one.
+        """
+        nodes = []
+        for entry in (self.listing(directory) or {}).values():
+            full_path = os.path.join(directory, entry.name)
+            node = {
+                "name": entry.name,
+                "path": os.path.relpath(full_path, base_dir).replace("\\", "/"),
+                "is_dir": entry.is_dir,
+                "modified_at": datetime.fromtimestamp(entry.mtime).isoformat(),
+            }
+            if entry.is_dir:
+                node["child_count"] = len(self.listing(full_path) or {})
+                if depth is None or depth > 1:
+                    node["children"] = self.tree(full_path, base_dir, None if depth is None else depth - 1)
+            else:
+                node["size"] = entry.size
+            nodes.append(node)
+        return sorted(nodes, key=lambda x: (not x["is_dir"], x["name"].lower()))
+
+
+path_index = PathIndex()
@@ -1,5 +1,68 @@
+from fastapi import HTTPException
+from sqlalchemy import select, func, or_, and_, case
 from sqlalchemy.orm import Session
-from ..models import User, UserProgress, QuizScore, TrainerTraineeMapping
+from datetime import datetime, timezone
+from ..models import (
+    User, UserProgress, QuizScore, Quiz, QuestionAttempt, TrainerTraineeMapping, UserActivity,
+    AssessmentSubmission, AssessmentTask, TraineeSetMapping, TraineeProgressSnapshot,
+)
+from .keyset import encode_cursor, decode_cursor
+
+IS_2D_ASSEMBLY = (AssessmentTask.is_assembly == True) & (AssessmentTask.assessment_type == "2D")
+
+def _trainee_progress_entry(user, snapshot, user_progress, user_scores):
+    """Performance Directory row: snapshot aggregates plus the lesson and quiz history."""
+    lessons = [
+        {
+            "course_id": p.course_id,
+            "percentage": p.progress_percentage,
+            "last_accessed": p.last_accessed
+        } for p in user_progress
+    ]
+    
+    quizzes = [
+        {
+            "course_id": q.course_id,
+            "lesson_id": q.lesson_id,
+            "score": q.score,
+            "first_attempt_score": q.first_attempt_score,
+            "attempts_count": q.attempts_count,
+            "completed_at": q.completed_at,
+            "first_attempt_at": q.first_attempt_at
+        } for q in user_scores
+    ]
+    
+    # Weighted Mastery Index and raw average come from the progress snapshot
+    return {
+        "id": user.id,
+        "username": user.username,
+        "full_name": user.full_name,
+        "last_login": user.last_login,
+        "completed_lessons": len(user_progress),
+        "average_score": round(float(snapshot["mastery_index"]), 1), # This is now the Weighted Mastery Index
+        "raw_average_score": round(float(snapshot["average_score"]), 1) if snapshot["quizzes_taken"] else 0,
+        "lessons_history": lessons,
+        "quizzes_history": quizzes
+    }
+
+
+def _histories(db: Session, user_ids, course_id: str = None):
+    """Batch fetch UserProgress and QuizScore rows for the given users, grouped by user_id."""
+    progress_query = db.query(UserProgress).filter(UserProgress.user_id.in_(user_ids))
+    scores_query = db.query(QuizScore).filter(QuizScore.user_id.in_(user_ids))
+    if course_id:
+        progress_query = progress_query.filter(UserProgress.course_id == course_id)
+        scores_query = scores_query.filter(QuizScore.course_id == course_id)
+
+    # Row order is whatever index the planner picks unless it is pinned; keep insertion order
+    progress_map = {}
+    for p in progress_query.order_by(UserProgress.id):
+        progress_map.setdefault(p.user_id, []).append(p)
+    scores_map = {}
+    for s in scores_query.order_by(QuizScore.id):
+        scores_map.setdefault(s.user_id, []).append(s)
+    return progress_map, scores_map
+
 
 def calculate_all_trainee_progress(db: Session, trainer_id: int = None):
     """Get aggregated and detailed progress for all trainees (WMI calculation)"""
@@ -16,90 +79,163 @@ def calculate_all_trainee_progress(db: Session, trainer_id: int = None):
     user_ids = [u.id for u in users]
     
     # Batch fetch all progress and scores to avoid N+1 problem
-    all_progress = db.query(UserProgress).filter(UserProgress.user_id.in_(user_ids)).all()
-    all_scores = db.query(QuizScore).filter(QuizScore.user_id.in_(user_ids)).all()
-    
-    # Organize data by user_id
-    progress_map = {}
-    for p in all_progress:
-        if p.user_id not in progress_map:
-            progress_map[p.user_id] = []
-        progress_map[p.user_id].append(p)
-        
-    scores_map = {}
-    for s in all_scores:
-        if s.user_id not in scores_map:
-            scores_map[s.user_id] = []
-        scores_map[s.user_id].append(s)
+    progress_map, scores_map = _histories(db, user_ids)
+    snapshots = load_trainee_snapshots(db, user_ids)
     
-    results = []
-    for user in users:
-        user_progress = progress_map.get(user.id, [])
-        user_scores = scores_map.get(user.id, [])
-        
-        lessons = [
-            {
-                "course_id": p.course_id,
-                "percentage": p.progress_percentage,
-                "last_accessed": p.last_accessed
-            } for p in user_progress
-        ]
-        
-        quizzes = [
-            {
-                "course_id": q.course_id,
-                "lesson_id": q.lesson_id,
-                "score": q.score,
-                "first_attempt_score": q.first_attempt_score,
-                "attempts_count": q.attempts_count,
-                "completed_at": q.completed_at,
-                "first_attempt_at": q.first_attempt_at
-            } for q in user_scores
-        ]
-        
-        # Calculate Weighted Mastery Index
-        # Formula: (Best Score) * Efficiency Factor
-        # Efficiency Factor: 1.0 (1-2 attempts), 0.9 (3-5), 0.75 (6-9), 0.6 (10+)
-        weighted_scores = []
-        for q in user_scores:
-            efficiency_factor = 1.0
-            if q.attempts_count > 9: efficiency_factor = 0.6
-            elif q.attempts_count >= 6: efficiency_factor = 0.75
-            elif q.attempts_count >= 3: efficiency_factor = 0.9
-            
-            weighted_scores.append(q.score * efficiency_factor)
-            
-        avg_score = 0
-        if weighted_scores:
-            avg_score = sum(weighted_scores) / len(weighted_scores)
-        
-        results.append({
-            "id": user.id,
-            "username": user.username,
-            "full_name": user.full_name,
-            "last_login": user.last_login,
-            "completed_lessons": len(user_progress),
-            "average_score": round(float(avg_score), 1), # This is now the Weighted Mastery Index
-            "raw_average_score": round(float(sum(q.score for q in user_scores) / len(user_scores)), 1) if user_scores else 0,
-            "lessons_history": lessons,
-            "quizzes_history": quizzes
-        })
-        
-    return results
+    return [
+        _trainee_progress_entry(user, snapshots[user.id], progress_map.get(user.id, []), scores_map.get(user.id, []))
+        for user in users
+    ]
+
+
+# ── Paginated / streamed Performance Directory ───────────────────────────────
+
+PROGRESS_SORTS = ("id", "mastery", "-mastery")
+PROGRESS_PAGE_MAX = 500
+COURSE_IDS = {"3D_Modeling": "1", "2D_Drawing": "2"}
+
 
-def update_user_course_progress(db: Session, user_id: int, course_id: str):
-    """Recalculate overall course progress percentage and update/create UserProgress (milestone) entry."""
+def _mastery():
+    return func.coalesce(TraineeProgressSnapshot.mastery_index, 0.0)
+
+
+def _snapshot_values(snapshot):
+    return {"mastery_index": snapshot.mastery_index, "average_score": snapshot.average_score, "quizzes_taken": snapshot.quizzes_taken}
+
+
+def _cursor_for(sort: str, row) -> str:
+    user, snapshot = row
+    key = user.id if sort == "id" else (snapshot.mastery_index if snapshot is not None else 0.0)
+    return encode_cursor(key, user.id)
+
+
+def ensure_trainee_snapshots(db: Session, chunk_size: int = 500) -> int:
+    """
+    Backfill snapshot rows for trainees that have none yet, so SQL can filter and sort
+    on them; the caller commits. Run once at startup (and by the rebuild script), never
+    from a read path.
+    """
+    missing = db.scalars(
+        select(User.id)
+        .outerjoin(TraineeProgressSnapshot, TraineeProgressSnapshot.user_id == User.id)
+        .where(User.role != "admin", TraineeProgressSnapshot.user_id.is_(None))
+    ).all()
+    for start in range(0, len(missing), chunk_size):
+        refresh_trainee_snapshots(db, missing[start:start + chunk_size])
+    return len(missing)
+
+
+def trainee_progress_query(
+    trainer_id: int = None,
+    course_id: str = None,
+    min_score: float = None,
+    max_score: float = None,
+    inactive_since: datetime = None,
+    sort: str = "id",
+    cursor: str = None,
+):
+    """SELECT (User, TraineeProgressSnapshot) of the non-admin users matching the filters, in sort order."""
+    if sort not in PROGRESS_SORTS:
+        raise HTTPException(status_code=400, detail=f"sort must be one of {', '.join(PROGRESS_SORTS)}")
+    snapshot = TraineeProgressSnapshot
+    mastery = _mastery()
+    query = (
+        select(User, snapshot)
+        .outerjoin(snapshot, snapshot.user_id == User.id)
+        .where(User.role != "admin")
+    )
+    if trainer_id:
+        query = query.where(User.id.in_(
+            select(TrainerTraineeMapping.trainee_id).where(TrainerTraineeMapping.trainer_id == trainer_id)
+        ))
+    if course_id:
+        query = query.where(
+            select(QuizScore.id).where(QuizScore.user_id == User.id, QuizScore.course_id == course_id).exists()
+        )
+    if min_score is not None:
+        query = query.where(mastery >= min_score)
+    if max_score is not None:
+        query = query.where(mastery <= max_score)
+    if inactive_since is not None:
+        # No login, quiz or submission since the cut-off
+        for column in (User.last_login, snapshot.last_quiz_at, snapshot.last_submission_at):
+            query = query.where(or_(column.is_(None), column < inactive_since))
+
+    # Keyset pagination: the cursor is the (sort key, id) of the last row already returned
+    after = decode_cursor(cursor, float, int) if cursor else None
+    if sort == "id":
+        if after:
+            query = query.where(User.id > after[1])
+        return query.order_by(User.id)
+    if after:
+        key, last_id = after
+        beyond = mastery > key if sort == "mastery" else mastery < key
+        query = query.where(or_(beyond, and_(mastery == key, User.id > last_id)))
+    return query.order_by(mastery if sort == "mastery" else mastery.desc(), User.id)
+
+
+def page_trainee_progress(db: Session, limit: int = 50, cursor: str = None, sort: str = "id", **filters):
+    """
+    One page of the Performance Directory: {"items": [...], "next_cursor": str | None}.
+    A trainee without a snapshot row yet is shown with values computed on the fly
+    (filters and sorting treat them as 0 until ensure_trainee_snapshots() has run).
+    """
+    course_id = COURSE_IDS.get(filters.get("course_id"), filters.get("course_id"))
+    filters["course_id"] = course_id
+    limit = max(1, min(limit, PROGRESS_PAGE_MAX))
+
+    rows = db.execute(trainee_progress_query(sort=sort, cursor=cursor, **filters).limit(limit + 1)).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    progress_map, scores_map = _histories(db, [user.id for user, _ in rows], course_id)
+    computed = load_trainee_snapshots(db, [user.id for user, snapshot in rows if snapshot is None])
+    items = [
+        _trainee_progress_entry(
+            user, _snapshot_values(snapshot) if snapshot is not None else computed[user.id],
+            progress_map.get(user.id, []), scores_map.get(user.id, [])
+        )
+        for user, snapshot in rows
+    ]
+    return {"items": items, "next_cursor": _cursor_for(sort, rows[-1]) if has_more else None}
+
+
+def iter_trainee_progress(db: Session, batch_size: int = 100, cursor: str = None, sort: str = "id", **filters):
+    """
+    Yield Performance Directory rows one at a time, batch_size users per query.
+
+    Each batch is a keyset page, so memory stays flat however large the cohort is and
+    no unbuffered cursor is held open across the history lookups (MySQL can't run
+    other statements on a connection while one is streaming).
+    """
+    while True:
+        page = page_trainee_progress(db, limit=batch_size, cursor=cursor, sort=sort, **filters)
+        yield from page["items"]
+        cursor = page["next_cursor"]
+        if cursor is None:
+            return
+
+
+def update_user_course_progress(db: Session, user_id: int, course_id: str, commit: bool = True):
+    """
+    Recalculate overall course progress percentage and update/create UserProgress (milestone) entry.
+    commit=False leaves committing to the caller (e.g. a write queue job).
+    """
     from ..models import Quiz, QuizScore, UserProgress
     from datetime import datetime, timezone
     
     course_type = "3D_Modeling" if course_id == "1" else "2D_Drawing"
     total_quizzes = db.query(Quiz).filter(Quiz.course_type == course_type).count()
     
-    passed_quizzes = db.query(QuizScore).filter(
-        QuizScore.user_id == user_id,
-        QuizScore.course_id == course_id,
-        QuizScore.score >= 80.0
-    ).count()
+    if course_id in ("1", "2"):
+        snapshot = load_trainee_snapshots(db, [user_id])[user_id]
+        passed_quizzes = snapshot["passed_3d" if course_id == "1" else "passed_2d"]
+    else:
+        passed_quizzes = db.query(QuizScore).filter(
+            QuizScore.user_id == user_id,
+            QuizScore.course_id == course_id,
+            QuizScore.score >= 80.0
+        ).count()
     
     progress_pct = 0.0
     if total_quizzes > 0:
@@ -126,4 +262,393 @@ def update_user_course_progress(db: Session, user_id: int, course_id: str):
         if progress_record:
             db.delete(progress_record)
             
-    db.commit()
+    if commit:
+        db.commit()
+
+
+def record_user_activity(db: Session, user_id: int, activity: str):
+    """Upsert the user's real-time activity row (run through the write queue; caller commits)."""
+    activity_record = db.query(UserActivity).filter(UserActivity.user_id == user_id).first()
+    if not activity_record:
+        db.add(UserActivity(user_id=user_id, current_activity=activity))
+    else:
+        activity_record.current_activity = activity
+        activity_record.last_updated = datetime.now(timezone.utc)
+
+
+def record_quiz_submission(db: Session, user_id: int, submission) -> bool:
+    """
+    Upsert the best score of a QuizSubmission, then refresh the snapshot, the course
+    milestone and the per-question attempts (run through the write queue on SQLite;
+    caller commits). Returns whether this is a new pass.
+    """
+    # Check if a score already exists for this lesson
+    existing_score = db.query(QuizScore).filter(
+        QuizScore.user_id == user_id,
+        QuizScore.course_id == submission.course_id,
+        QuizScore.lesson_id == submission.lesson_id
+    ).first()
+    
+    # Determine if this pass is new (first time scoring >= 80%)
+    is_new_pass = False
+    if submission.score >= 80.0:
+        if not existing_score or (existing_score and existing_score.score < 80.0):
+            is_new_pass = True
+            
+    if existing_score:
+        # Increment attempt counter
+        existing_score.attempts_count = (existing_score.attempts_count or 0) + 1
+        
+        # Update best score only if the new one is higher
+        if submission.score > existing_score.score:
+            existing_score.score = submission.score
+            existing_score.completed_at = datetime.now(timezone.utc)
+    else:
+        now = datetime.now(timezone.utc)
+        new_score = QuizScore(
+            user_id=user_id,
+            course_id=submission.course_id,
+            lesson_id=submission.lesson_id,
+            score=submission.score,
+            first_attempt_score=submission.score,
+            attempts_count=1,
+            completed_at=now,
+            first_attempt_at=now
+        )
+        db.add(new_score)
+    
+    refresh_trainee_snapshot(db, user_id)
+    
+    # Update curriculum progress milestones
+    if submission.course_id:
+        update_user_course_progress(db, user_id, submission.course_id, commit=False)
+    
+    # Save individual question attempts for analytics
+    quiz = db.query(Quiz).filter(Quiz.slug == submission.lesson_id).first()
+    if submission.answers and quiz:
+        for ans in submission.answers:
+            db.add(QuestionAttempt(
+                user_id=user_id,
+                quiz_id=quiz.id,
+                question_id=ans.question_id,
+                chosen_option=ans.chosen_option,
+                is_correct=ans.is_correct,
+                seconds_spent=ans.seconds_spent
+            ))
+    db.flush()
+    return is_new_pass
+
+
+def _percentage(completed: int, total: int) -> float:
+    return round((completed / total * 100), 1) if total > 0 else 0.0
+
+
+def _latest_per_user(db: Session, time_col, user_ids, *columns):
+    """Rows holding each user's newest time_col value (ties: whichever comes first)."""
+    model = time_col.class_
+    newest = (
+        select(model.user_id, func.max(time_col).label("newest"))
+        .where(model.user_id.in_(user_ids))
+        .group_by(model.user_id)
+        .subquery()
+    )
+    latest = {}
+    for row in db.execute(
+        select(model.user_id, time_col, *columns).join(
+            newest, (model.user_id == newest.c.user_id) & (time_col == newest.c.newest)
+        )
+    ):
+        latest.setdefault(row[0], row)
+    return latest
+
+
+def compute_trainee_snapshots(db: Session, user_ids):
+    """
+    Recompute TraineeProgressSnapshot column values from the raw tables.
+
+    Runs a fixed number of grouped queries for any number of trainees and returns
+    {user_id: {column: value}} with an entry for every requested id.
+    """
+    user_ids = list(user_ids)
+    if not user_ids:
+        return {}
+    snapshots = {
+        user_id: {
+            "passed_3d": 0, "passed_2d": 0, "quizzes_taken": 0, "average_score": 0.0, "mastery_index": 0.0,
+            "submissions_approved": 0, "submissions_pending": 0, "submissions_rejected": 0, "submissions_total": 0,
+            "assigned_sets": 0, "completed_3d_sets": 0, "completed_2d_sets": 0,
+            "last_quiz_at": None, "last_quiz_lesson_id": None,
+            "last_submission_at": None, "last_submission_task_id": None,
+        }
+        for user_id in user_ids
+    }
+
+    # Course quizzes. Weighted Mastery Index = best score * efficiency factor:
+    # 1.0 (1-2 attempts), 0.9 (3-5), 0.75 (6-9), 0.6 (10+)
+    attempts = func.coalesce(QuizScore.attempts_count, 1)
+    efficiency = case((attempts > 9, 0.6), (attempts >= 6, 0.75), (attempts >= 3, 0.9), else_=1.0)
+    passed = QuizScore.score >= 80.0
+    for user_id, taken, score_sum, weighted_sum, passed_3d, passed_2d in db.execute(
+        select(
+            QuizScore.user_id,
+            func.count(QuizScore.id),
+            func.sum(QuizScore.score),
+            func.sum(QuizScore.score * efficiency),
+            func.sum(case((passed & (QuizScore.course_id == "1"), 1), else_=0)),
+            func.sum(case((passed & (QuizScore.course_id == "2"), 1), else_=0)),
+        )
+        .where(QuizScore.user_id.in_(user_ids))
+        .group_by(QuizScore.user_id)
+    ):
+        snapshots[user_id].update(
+            quizzes_taken=taken,
+            average_score=float(score_sum or 0) / taken,
+            mastery_index=float(weighted_sum or 0) / taken,
+            passed_3d=int(passed_3d or 0),
+            passed_2d=int(passed_2d or 0),
+        )
+
+    # Submissions by status
+    for user_id, status, n in db.execute(
+        select(AssessmentSubmission.user_id, AssessmentSubmission.status, func.count(AssessmentSubmission.id))
+        .where(AssessmentSubmission.user_id.in_(user_ids))
+        .group_by(AssessmentSubmission.user_id, AssessmentSubmission.status)
+    ):
+        snapshot = snapshots[user_id]
+        snapshot["submissions_total"] += n
+        if status in ("approved", "pending", "rejected"):
+            snapshot[f"submissions_{status}"] = n
+
+    # 3D practical: an assigned set is complete once any 3D (or untyped) task of it is approved
+    approved_sets = set(db.execute(
+        select(AssessmentSubmission.user_id, AssessmentTask.set_number)
+        .join(AssessmentTask)
+        .where(
+            AssessmentSubmission.user_id.in_(user_ids),
+            AssessmentSubmission.status == "approved",
+            or_(AssessmentSubmission.assessment_type == "3D", AssessmentSubmission.assessment_type.is_(None)),
+        )
+        .group_by(AssessmentSubmission.user_id, AssessmentTask.set_number)
+    ).tuples())
+    for trainee_id, set_number in db.execute(
+        select(TraineeSetMapping.trainee_id, TraineeSetMapping.actual_set_number)
+        .where(TraineeSetMapping.trainee_id.in_(user_ids))
+    ):
+        snapshots[trainee_id]["assigned_sets"] += 1
+        if (trainee_id, set_number) in approved_sets:
+            snapshots[trainee_id]["completed_3d_sets"] += 1
+
+    # 2D practical: distinct approved 2D assembly tasks
+    for user_id, n in db.execute(
+        select(AssessmentSubmission.user_id, func.count(AssessmentTask.id.distinct()))
+        .join(AssessmentTask)
+        .where(
+            AssessmentSubmission.user_id.in_(user_ids),
+            AssessmentSubmission.status == "approved",
+            AssessmentSubmission.assessment_type == "2D",
+            IS_2D_ASSEMBLY,
+        )
+        .group_by(AssessmentSubmission.user_id)
+    ):
+        snapshots[user_id]["completed_2d_sets"] = n
+
+    # Most recent quiz and submission
+    for user_id, completed_at, lesson_id in _latest_per_user(db, QuizScore.completed_at, user_ids, QuizScore.lesson_id).values():
+        snapshots[user_id].update(last_quiz_at=completed_at, last_quiz_lesson_id=lesson_id)
+    for user_id, submitted_at, task_id in _latest_per_user(
+        db, AssessmentSubmission.submitted_at, user_ids, AssessmentSubmission.task_id
+    ).values():
+        snapshots[user_id].update(last_submission_at=submitted_at, last_submission_task_id=task_id)
+
+    return snapshots
+
+
+def _write_snapshots(db: Session, computed, existing):
+    now = datetime.now(timezone.utc)
+    for user_id, values in computed.items():
+        snapshot = existing.get(user_id)
+        if snapshot is None:
+            snapshot = TraineeProgressSnapshot(user_id=user_id)
+            db.add(snapshot)
+        for column, value in values.items():
+            setattr(snapshot, column, value)
+        snapshot.updated_at = now
+    db.flush()
+
+
+def _stored_snapshots(db: Session, user_ids):
+    return {
+        s.user_id: s for s in db.query(TraineeProgressSnapshot).filter(TraineeProgressSnapshot.user_id.in_(user_ids))
+    }
+
+
+def refresh_trainee_snapshots(db: Session, user_ids):
+    """Rewrite the snapshot rows of the given trainees inside the caller's transaction (caller commits)."""
+    user_ids = list(user_ids)
+    db.flush()  # Sessions don't autoflush; the pending writes must be visible to the recount
+    _write_snapshots(db, compute_trainee_snapshots(db, user_ids), _stored_snapshots(db, user_ids))
+
+
+def refresh_trainee_snapshot(db: Session, user_id: int):
+    """Single-trainee refresh_trainee_snapshots, for write paths (and AsyncSession.run_sync)."""
+    refresh_trainee_snapshots(db, [user_id])
+
+
+def trainees_with_submissions(db: Session, task_ids) -> list:
+    """
+    Trainees whose snapshot counts depend on these tasks (a submission to any of them).
+    Collect them before a task is deleted or moved to another set or type, then pass
+    them to refresh_trainee_snapshots() once the change is made.
+    """
+    task_ids = list(task_ids)
+    if not task_ids:
+        return []
+    return list(db.scalars(
+        select(AssessmentSubmission.user_id).where(AssessmentSubmission.task_id.in_(task_ids)).distinct()
+    ))
+
+
+def load_trainee_snapshots(db: Session, user_ids):
+    """{user_id: column values} from the snapshot table; trainees without a row are computed on the fly."""
+    user_ids = list(user_ids)
+    if not user_ids:
+        return {}
+    columns = [c for c in TraineeProgressSnapshot.__table__.c if c.name not in ("user_id", "updated_at")]
+    snapshots = {
+        row.user_id: {c.name: row._mapping[c.name] for c in columns}
+        for row in db.execute(
+            select(TraineeProgressSnapshot.user_id, *columns).where(TraineeProgressSnapshot.user_id.in_(user_ids))
+        )
+    }
+    missing = [user_id for user_id in user_ids if user_id not in snapshots]
+    if missing:
+        snapshots.update(compute_trainee_snapshots(db, missing))
+    return snapshots
+
+
+def _snapshot_values_differ(stored, actual) -> bool:
+    if isinstance(actual, float) or isinstance(stored, float):
+        return stored is None or actual is None or abs(stored - actual) > 1e-6
+    if isinstance(actual, datetime) and isinstance(stored, datetime):
+        return stored.replace(tzinfo=None) != actual.replace(tzinfo=None)
+    return stored != actual
+
+
+def rebuild_trainee_snapshots(db: Session, check_only: bool = False, chunk_size: int = 500):
+    """
+    Recompute every trainee's snapshot from scratch and report drift.
+
+    Returns [(user_id, column, stored, actual)] for each stored value that did not
+    match (a missing row counts as drift on every column). Unless check_only, rows
+    are rewritten and orphaned snapshots removed; the caller commits.
+    """
+    user_ids = [user_id for (user_id,) in db.query(User.id).filter(User.role != "admin").order_by(User.id)]
+    drift = []
+    for start in range(0, len(user_ids), chunk_size):
+        chunk = user_ids[start:start + chunk_size]
+        stored = _stored_snapshots(db, chunk)
+        computed = compute_trainee_snapshots(db, chunk)
+        for user_id, values in computed.items():
+            snapshot = stored.get(user_id)
+            for column, actual in values.items():
+                current = getattr(snapshot, column) if snapshot is not None else None
+                if snapshot is None or _snapshot_values_differ(current, actual):
+                    drift.append((user_id, column, current, actual))
+        if not check_only:
+            _write_snapshots(db, computed, stored)
+    if not check_only:
+        db.query(TraineeProgressSnapshot).filter(
+            TraineeProgressSnapshot.user_id.notin_(user_ids)
+        ).delete(synchronize_session=False)
+        db.flush()
+    return drift
+
+
+def calculate_trainee_dashboard_progress(db: Session, user_ids):
+    """
+    Curriculum, practical and activity summary per trainee for the trainer dashboard.
+
+    Reads one snapshot row per trainee plus a few global totals. Returns
+    {user_id: {"current_activity", "last_updated", "progress"}}.
+    """
+    user_ids = list(user_ids)
+    if not user_ids:
+        return {}
+    snapshots = load_trainee_snapshots(db, user_ids)
+
+    quiz_totals = dict(db.execute(
+        select(Quiz.course_type, func.count(Quiz.id))
+        .where(Quiz.course_type.in_(["3D_Modeling", "2D_Drawing"]))
+        .group_by(Quiz.course_type)
+    ).all())
+    total_3d = quiz_totals.get("3D_Modeling", 0)
+    total_2d = quiz_totals.get("2D_Drawing", 0)
+    total_2d_practical = db.scalar(select(func.count(AssessmentTask.id)).where(IS_2D_ASSEMBLY))
+
+    # Current activity: the realtime tracker, else the most recent quiz or submission
+    activities = {
+        row.user_id: row for row in db.execute(
+            select(UserActivity.user_id, UserActivity.current_activity, UserActivity.last_updated)
+            .where(UserActivity.user_id.in_(user_ids))
+        )
+    }
+    task_ids = {s["last_submission_task_id"] for s in snapshots.values() if s["last_submission_task_id"] is not None}
+    task_titles = dict(db.execute(
+        select(AssessmentTask.id, AssessmentTask.title).where(AssessmentTask.id.in_(task_ids))
+    ).all()) if task_ids else {}
+
+    results = {}
+    for user_id in user_ids:
+        snapshot = snapshots[user_id]
+        current_activity = "Not started yet"
+        last_updated = None
+        realtime = activities.get(user_id)
+        if realtime and realtime.current_activity:
+            current_activity = realtime.current_activity
+            last_updated = realtime.last_updated
+        else:
+            last_quiz_time = snapshot["last_quiz_at"]
+            last_sub_time = snapshot["last_submission_at"]
+            if last_quiz_time and (not last_sub_time or last_quiz_time > last_sub_time):
+                last_updated = last_quiz_time
+                lesson_id = snapshot["last_quiz_lesson_id"]
+                activity_str = lesson_id.replace('-', ' ').title() if lesson_id else "Quiz"
+                current_activity = f"Course: {activity_str}"
+            elif last_sub_time:
+                last_updated = last_sub_time
+                task_title = task_titles.get(snapshot["last_submission_task_id"], "Task")
+                current_activity = f"Practical: {task_title}"
+
+        results[user_id] = {
+            "current_activity": current_activity,
+            "last_updated": last_updated,
+            "progress": {
+                "course_3d": {
+                    "completed": snapshot["passed_3d"],
+                    "total": total_3d,
+                    "percentage": _percentage(snapshot["passed_3d"], total_3d)
+                },
+                "course_2d": {
+                    "completed": snapshot["passed_2d"],
+                    "total": total_2d,
+                    "percentage": _percentage(snapshot["passed_2d"], total_2d)
+                },
+                "practical_3d": {
+                    "completed": snapshot["completed_3d_sets"],
+                    "total": snapshot["assigned_sets"],
+                    "percentage": _percentage(snapshot["completed_3d_sets"], snapshot["assigned_sets"])
+                },
+                "practical_2d": {
+                    "completed": snapshot["completed_2d_sets"],
+                    "total": total_2d_practical,
+                    "percentage": _percentage(snapshot["completed_2d_sets"], total_2d_practical)
+                },
+                "assessments": {
+                    "approved": snapshot["submissions_approved"],
+                    "pending": snapshot["submissions_pending"],
+                    "rejected": snapshot["submissions_rejected"],
+                    "total_submitted": snapshot["submissions_total"]
+                }
+            }
+        }
+    return results
@@ -1,8 +1,366 @@
 import os
+import re
+import time
 import shutil
+import uuid
+import hashlib
+import logging
 import zipfile
+from datetime import datetime, timedelta
 from pathlib import Path
+from typing import NamedTuple, Optional
 from fastapi import HTTPException, UploadFile
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import func
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from ..database import APP_PATH, USE_MYSQL
+from ..models import FileBlob, BlobRef, AssessmentTask, AssessmentSubmission, AssessmentFeedback
+from .path_index import path_index
+
+logger = logging.getLogger(__name__)
+
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+# Per-extension upload ceilings in MB, e.g. ".zip=1024,.dwg=200"; anything else gets UPLOAD_MAX_MB
+UPLOAD_MAX_MB = float(os.getenv("UPLOAD_MAX_MB", "200"))
+UPLOAD_LIMITS_MB = {
+    ext.strip().lower(): float(mb)
+    for ext, mb in (item.split("=") for item in os.getenv("UPLOAD_LIMITS_MB", ".zip=1024,.rar=1024,.dwg=200,.xlsx=50,.xls=50").split(",") if item)
+}
+# Unreferenced blobs (and stray files in the store) are kept this long before collection
+CAS_GC_GRACE_SECONDS = float(os.getenv("CAS_GC_GRACE_SECONDS", str(24 * 3600)))
+_SHA256_NAME = re.compile(r"^[0-9a-f]{64}$")
+
+
+class StoredFile(NamedTuple):
+    path: str
+    size: int
+    sha256: str
+
+
+def upload_limit(filename: str) -> int:
+    """Maximum accepted size in bytes for an upload with this filename."""
+    ext = os.path.splitext(filename or "")[1].lower()
+    return int(UPLOAD_LIMITS_MB.get(ext, UPLOAD_MAX_MB) * 1024 * 1024)
+
+
+def _open_part(dest_path: str):
+    os.makedirs(os.path.dirname(dest_path) or ".", exist_ok=True)
+    part_path = f"{dest_path}.{uuid.uuid4().hex[:8]}.part"
+    return part_path, open(part_path, "wb")
+
+
+def _write_chunk(buffer, hasher, chunk: bytes):
+    hasher.update(chunk)
+    buffer.write(chunk)
+
+
+def _commit_part(buffer, part_path: str, dest_path: str):
+    buffer.flush()
+    os.fsync(buffer.fileno())
+    buffer.close()
+    os.replace(part_path, dest_path)
+
+
+def _discard_part(buffer, part_path: str):
+    buffer.close()
+    if os.path.exists(part_path):
+        os.remove(part_path)
+
+
+async def save_upload(file: UploadFile, dest_path: str, max_bytes: int = None) -> StoredFile:
+    """
+    Stream an UploadFile to dest_path without blocking the event loop.
+
+    Chunks are hashed and written on the threadpool into a .part file next to the
+    destination, which is renamed over dest_path only once the upload is complete,
+    so readers never see a half-written file. Exceeding max_bytes (default: the
+    per-extension limit) aborts with 413 and leaves dest_path untouched.
+    """
+    max_bytes = max_bytes or upload_limit(file.filename)
+    part_path, buffer = await run_in_threadpool(_open_part, dest_path)
+    hasher = hashlib.sha256()
+    size = 0
+    try:
+        while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+            size += len(chunk)
+            if size > max_bytes:
+                raise HTTPException(
+                    status_code=413,
+                    detail=f"{os.path.basename(file.filename or 'Upload')} exceeds the {max_bytes // (1024 * 1024)} MB limit"
+                )
+            await run_in_threadpool(_write_chunk, buffer, hasher, chunk)
+        await run_in_threadpool(_commit_part, buffer, part_path, dest_path)
+    except BaseException:
+        await run_in_threadpool(_discard_part, buffer, part_path)
+        raise
+    return StoredFile(dest_path, size, hasher.hexdigest())
+
+# --- Content-addressed store ---
+#
+# Submissions, checkback files and single-file master units are kept once per distinct
+# content under {UPLOAD_DIR}/cas/<aa>/<sha256>. The path columns keep the logical path
+# the file used to be written to (so names, extensions and folder mirroring are
+# unchanged); blob_refs maps that path to its blob and file_blobs counts the paths
+# pointing at each blob. Zip-extracted master folders stay on disk as before.
+
+def cas_root() -> str:
+    return os.path.join(os.getenv("UPLOAD_DIR", os.path.join(APP_PATH, "uploads")), "cas")
+
+
+def blob_path(sha256: str) -> str:
+    return os.path.join(cas_root(), sha256[:2], sha256)
+
+
+def blob_sha256(file_path: str) -> Optional[str]:
+    """The SHA-256 a path in the store is named after, or None for any other path."""
+    name = os.path.basename(file_path)
+    in_store = os.path.dirname(os.path.dirname(os.path.abspath(file_path))) == os.path.abspath(cas_root())
+    return name if in_store and _SHA256_NAME.match(name) else None
+
+
+def staging_path() -> str:
+    """A fresh name for an upload on its way into the store; strays are swept by collect_garbage()."""
+    return os.path.join(cas_root(), "tmp", uuid.uuid4().hex)
+
+
+def _ingest(part_path: str, sha256: str) -> bool:
+    """Move a finished upload into the store; False if identical content was already there."""
+    target = blob_path(sha256)
+    if os.path.exists(target):
+        os.remove(part_path)
+        # Fresh mtime keeps the garbage collector off a blob that is about to be re-linked
+        os.utime(target)
+        return False
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    os.replace(part_path, target)
+    return True
+
+
+def ingest(stored: StoredFile) -> StoredFile:
+    """Move a hashed file (e.g. from staging_path()) into the store; returns the blob it landed in."""
+    if not _ingest(stored.path, stored.sha256):
+        logger.info(f"[+] Upload deduplicated onto blob {stored.sha256[:12]}")
+    return StoredFile(blob_path(stored.sha256), stored.size, stored.sha256)
+
+
+async def store_blob(file: UploadFile, max_bytes: int = None) -> StoredFile:
+    """
+    Stream an upload into the content-addressed store and return the blob it landed in.
+    A duplicate of an existing blob is dropped as soon as its hash is known. Pair with
+    link_blob() to give it a logical path.
+    """
+    stored = await save_upload(file, staging_path(), max_bytes)
+    return await run_in_threadpool(ingest, stored)
+
+
+def hash_file(file_path: str):
+    """(size, sha256) of a file already on disk."""
+    hasher = hashlib.sha256()
+    size = 0
+    with open(file_path, "rb") as f:
+        while chunk := f.read(UPLOAD_CHUNK_SIZE):
+            size += len(chunk)
+            hasher.update(chunk)
+    return size, hasher.hexdigest()
+
+
+def adopt_file(db: Session, path: str, file_path: str) -> StoredFile:
+    """
+    Copy a file written before the store existed into it and point path at the blob.
+    The original is left in place; remove it once the caller has committed, so a crash
+    in between leaves a duplicate rather than a dangling reference.
+    """
+    size, sha256 = hash_file(file_path)
+    target = blob_path(sha256)
+    if not os.path.exists(target):
+        part_path = staging_path()
+        os.makedirs(os.path.dirname(part_path), exist_ok=True)
+        shutil.copyfile(file_path, part_path)
+        _ingest(part_path, sha256)
+    stored = StoredFile(target, size, sha256)
+    link_blob(db, path, stored)
+    return stored
+
+
+def _recount(db: Session, sha256: str):
+    """
+    Set a blob's ref_count from its blob_refs rows. It is a count, not a running total:
+    the forward sync copies file_blobs rows whole, so a fallback copy of the row can
+    overwrite MySQL's value, and the next link or release here puts it right again.
+    collect_garbage() never relies on it.
+    """
+    db.flush()
+    count = db.query(func.count(BlobRef.path)).filter(BlobRef.sha256 == sha256).scalar()
+    values = {FileBlob.ref_count: count}
+    if count == 0:
+        values[FileBlob.released_at] = datetime.utcnow()
+    db.query(FileBlob).filter(FileBlob.sha256 == sha256).update(values, synchronize_session=False)
+
+
+def link_blob(db: Session, path: str, stored: StoredFile):
+    """
+    Point a logical path at a stored blob, moving the reference off whatever blob the
+    path held before. Flushes but does not commit; the caller commits with the row that
+    records the path.
+    """
+    if db.get(FileBlob, stored.sha256) is None:
+        try:
+            with db.begin_nested():
+                db.add(FileBlob(sha256=stored.sha256, size=stored.size, ref_count=0))
+        except IntegrityError:
+            pass  # A concurrent upload of the same content created it first
+
+    ref = db.get(BlobRef, path)
+    if ref is not None and ref.sha256 == stored.sha256:
+        return
+    released = None
+    if ref is not None:
+        released = ref.sha256
+        ref.sha256 = stored.sha256
+    else:
+        db.add(BlobRef(path=path, sha256=stored.sha256))
+    _recount(db, stored.sha256)
+    if released is not None:
+        _recount(db, released)
+    db.flush()
+
+
+def resolve_blob(db: Session, path: str) -> Optional[str]:
+    """Physical file behind a logical path, or None if the path is not in the store."""
+    if not path:
+        return None
+    sha256 = db.query(BlobRef.sha256).filter(BlobRef.path == path).scalar()
+    return blob_path(sha256) if sha256 else None
+
+
+def release_unreferenced(db: Session, paths):
+    """
+    Drop the blob references of paths that no task, submission or feedback row records
+    any more. Call after deleting the rows, before committing; the blobs themselves are
+    only removed by collect_garbage().
+    """
+    db.flush()
+    for path in {p for p in paths if p}:
+        in_use = (
+            db.query(AssessmentSubmission.id).filter(AssessmentSubmission.submission_file_path == path).first()
+            or db.query(AssessmentFeedback.id).filter(AssessmentFeedback.checkback_file_path == path).first()
+            or db.query(AssessmentTask.id).filter(AssessmentTask.master_file_path == path).first()
+        )
+        ref = None if in_use else db.get(BlobRef, path)
+        if ref is not None:
+            db.delete(ref)
+            _recount(db, ref.sha256)
+    db.flush()
+
+
+def _remove_quietly(file_path: str) -> int:
+    try:
+        size = os.path.getsize(file_path)
+        os.remove(file_path)
+        return size
+    except OSError as e:
+        logger.warning(f"[!] Could not remove {file_path}: {e}")
+        return 0
+
+
+def collect_garbage(db: Session, grace_seconds: float = None, dry_run: bool = False) -> dict:
+    """
+    Reclaim blobs nothing has referenced for grace_seconds, plus files in the store with
+    no blob row (uploads abandoned between ingest and commit) or left in its tmp folder.
+    Returns {"blobs": n, "orphans": n, "bytes": n}.
+    """
+    if USE_MYSQL and db.get_bind().dialect.name == "sqlite":
+        # The fallback DB only knows the blobs created during the outage; everything else
+        # in the store would look unreferenced
+        logger.warning("[!] CAS garbage collection skipped: running on the SQLite fallback")
+        return {"blobs": 0, "orphans": 0, "bytes": 0}
+    grace_seconds = CAS_GC_GRACE_SECONDS if grace_seconds is None else grace_seconds
+    cutoff = datetime.utcnow() - timedelta(seconds=grace_seconds)
+    mtime_cutoff = time.time() - grace_seconds
+    stats = {"blobs": 0, "orphans": 0, "bytes": 0}
+
+    # Count the references themselves; ref_count can be stale after a fallback sync
+    unreferenced = ~db.query(BlobRef.path).filter(BlobRef.sha256 == FileBlob.sha256).exists()
+    for sha256, size in db.query(FileBlob.sha256, FileBlob.size).filter(
+        unreferenced,
+        (FileBlob.released_at == None) | (FileBlob.released_at < cutoff),
+    ).all():
+        target = blob_path(sha256)
+        if os.path.exists(target) and os.path.getmtime(target) > mtime_cutoff:
+            continue
+        stats["blobs"] += 1
+        if dry_run:
+            stats["bytes"] += size
+            continue
+        # Conditional delete: a link_blob() that raced us has added a reference
+        if db.query(FileBlob).filter(FileBlob.sha256 == sha256, unreferenced).delete(synchronize_session=False):
+            db.commit()
+            if os.path.exists(target):
+                stats["bytes"] += _remove_quietly(target)
+        else:
+            stats["blobs"] -= 1
+
+    known = {sha256 for (sha256,) in db.query(FileBlob.sha256).all()}
+    root = cas_root()
+    if os.path.isdir(root):
+        for dir_path, _, file_names in os.walk(root):
+            in_tmp = os.path.basename(dir_path) == "tmp"
+            for name in file_names:
+                full_path = os.path.join(dir_path, name)
+                if not in_tmp and (not _SHA256_NAME.match(name) or name in known):
+                    continue
+                if os.path.getmtime(full_path) > mtime_cutoff:
+                    continue
+                stats["orphans"] += 1
+                stats["bytes"] += os.path.getsize(full_path) if dry_run else _remove_quietly(full_path)
+
+    logger.info(f"[+] CAS garbage collection{' (dry run)' if dry_run else ''}: "
+                f"{stats['blobs']} blobs, {stats['orphans']} orphans, {stats['bytes']} bytes")
+    return stats
+
+def resolve_master_path(master_file_path: str) -> str:
+    """
+    Where a task's master_file_path lives on disk. The existence checks go through the
+    upload root index rather than the share.
+    """
+    if not master_file_path:
+        return ""
+    exists = path_index.exists
+    
+    # If it's already an absolute path and exists, use it
+    if os.path.isabs(master_file_path) and exists(master_file_path):
+        return master_file_path
+        
+    base_upload_dir = os.getenv("UPLOAD_DIR", os.path.join(APP_PATH, "uploads"))
+    
+    # Clean relative path prefix
+    rel_path = master_file_path
+    if rel_path.startswith("uploads/"):
+        rel_path = rel_path.replace("uploads/", "", 1)
+    elif rel_path.startswith("uploads\\"):
+        rel_path = rel_path.replace("uploads\\", "", 1)
+        
+    # Build standard full path
+    full_path = os.path.join(base_upload_dir, rel_path)
+    
+    # Check if standard path exists
+    if exists(full_path):
+        return full_path
+        
+    # If not found, try correcting Units & Tasks <-> Unts & Tasks spelling mismatch
+    if "Units & Tasks" in rel_path:
+        alt_rel_path = rel_path.replace("Units & Tasks", "Unts & Tasks")
+        alt_path = os.path.join(base_upload_dir, alt_rel_path)
+        if exists(alt_path):
+            return alt_path
+    elif "Unts & Tasks" in rel_path:
+        alt_rel_path = rel_path.replace("Unts & Tasks", "Units & Tasks")
+        alt_path = os.path.join(base_upload_dir, alt_rel_path)
+        if exists(alt_path):
+            return alt_path
+            
+    return full_path
 
 def get_safe_path(base_dir: str, req_path: str) -> str:
     resolved_base = Path(base_dir).resolve()
@@ -14,40 +372,51 @@ def get_safe_path(base_dir: str, req_path: str) -> str:
         raise HTTPException(status_code=400, detail="Directory traversal detected")
     return str(resolved_target)
 
-def handle_task_upload(file: UploadFile, set_number: int, task_code: str) -> str:
+def _extract_zip(zip_path: Path, extract_dir: Path):
+    extract_dir.mkdir(parents=True, exist_ok=True)
+    try:
+        # Zip slip protection: validate all member paths before extracting
+        with zipfile.ZipFile(zip_path, 'r') as zip_ref:
+            for member in zip_ref.namelist():
+                member_path = (extract_dir / member).resolve()
+                if not str(member_path).startswith(str(extract_dir.resolve())):
+                    raise HTTPException(status_code=400, detail=f"Unsafe zip entry: {member}")
+            zip_ref.extractall(extract_dir)
+    finally:
+        os.remove(zip_path)
+
+def master_units_dir() -> Path:
     upload_base = os.getenv("UPLOAD_DIR")
     if upload_base:
-        base = Path(upload_base) / "master_units"
-    else:
-        # Resolve to backend root path if UPLOAD_DIR is not set
-        base = Path(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))) / "master_units"
-    
-    master_dir = base / f"set{set_number}"
-    master_dir.mkdir(parents=True, exist_ok=True)
+        return Path(upload_base) / "master_units"
+    # Resolve to backend root path if UPLOAD_DIR is not set
+    return Path(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))) / "master_units"
+
+
+async def place_task_file(stored: StoredFile, filename: str, set_number: int, task_code: str, db: Session) -> str:
+    """
+    Put an upload that is already on disk (e.g. in staging_path()) where the master unit
+    for task_code lives, and return the master_file_path to record. A .zip is extracted
+    into its own folder; anything else goes into the blob store. stored.path is consumed.
+    """
+    master_dir = master_units_dir() / f"set{set_number}"
     
-    safe_filename = os.path.basename(file.filename)
+    safe_filename = os.path.basename(filename)
     file_extension = os.path.splitext(safe_filename)[1].lower()
     
     if file_extension == '.zip':
-        temp_zip_path = master_dir / f"temp_{task_code}_{safe_filename}"
-        with open(temp_zip_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
-            
         extract_dir = master_dir / f"{task_code}_{os.path.splitext(safe_filename)[0]}"
-        extract_dir.mkdir(parents=True, exist_ok=True)
-        
-        # Zip slip protection: validate all member paths before extracting
-        with zipfile.ZipFile(temp_zip_path, 'r') as zip_ref:
-            for member in zip_ref.namelist():
-                member_path = (extract_dir / member).resolve()
-                if not str(member_path).startswith(str(extract_dir.resolve())):
-                    raise HTTPException(status_code=400, detail=f"Unsafe zip entry: {member}")
-            zip_ref.extractall(extract_dir)
-            
-        os.remove(temp_zip_path)
+        await run_in_threadpool(_extract_zip, Path(stored.path), extract_dir)
+        path_index.invalidate(str(extract_dir))
+        logger.info(f"[+] Master unit {task_code} extracted from {safe_filename} ({stored.size} bytes, sha256 {stored.sha256[:12]})")
         return str(extract_dir)
     else:
-        file_path = master_dir / f"{task_code}_{safe_filename}"
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
-        return str(file_path)
+        # Master units are often byte-identical across task prefixes (A1_x.dwg, A10_x.dwg)
+        file_path = str(master_dir / f"{task_code}_{safe_filename}")
+        link_blob(db, file_path, await run_in_threadpool(ingest, stored))
+        return file_path
+
+
+async def handle_task_upload(file: UploadFile, set_number: int, task_code: str, db: Session) -> str:
+    stored = await save_upload(file, staging_path())
+    return await place_task_file(stored, file.filename, set_number, task_code, db)
@@ -0,0 +1,178 @@
+"""
+In-process catalog of assessment tasks for GET /assessments/tasks.
+
+The task list only changes through the admin task endpoints, yet trainees fetch it
+on every kmti-global-refresh. The catalog keeps the whole table in memory, grouped
+by (set_number, assessment_type), and reloads it only after invalidate() bumps the
+version. Every task mutation endpoint calls invalidate() after its commit. Each
+trainee's set mappings are cached too, and are dropped through forget_trainee()
+when a trainer changes them.
+
+Writers outside this process (scripts, a second backend on the same NAS database)
+cannot bump the version, so both caches also expire after TASK_CATALOG_MAX_AGE
+seconds, and are cleared on every DB_MODE switch because MySQL and the SQLite
+fallback can hold different rows.
+"""
+
+import os
+import time
+import hashlib
+import logging
+import threading
+from typing import NamedTuple
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from ..database import add_db_mode_listener
+from ..http_cache import bump
+from ..models import AssessmentTask, TraineeSetMapping
+from ..schemas import AssessmentTaskResponse
+
+logger = logging.getLogger(__name__)
+
+TASK_CATALOG_MAX_AGE = float(os.getenv("TASK_CATALOG_MAX_AGE", "300"))
+
+_NO_MAPPINGS = (frozenset(), frozenset())
+
+
+def _is_2d(assessment_type) -> bool:
+    return assessment_type == "2D"
+
+
+def _etag(*parts) -> str:
+    return '"' + hashlib.sha1("|".join(str(p) for p in parts).encode()).hexdigest()[:20] + '"'
+
+
+class _Snapshot(NamedTuple):
+    version: int
+    loaded_at: float
+    tasks: list
+    groups: dict    # (set_number, assessment_type) -> [task]
+    digest: str
+
+
+_EMPTY = _Snapshot(None, 0.0, [], {}, "")
+
+
+class TaskCatalog:
+    """
+    The lock only guards swapping cached values in and out; the task table and set
+    mappings are read without it, so a slow query doesn't stall every other request.
+    A value read while invalidate() or forget_trainee() ran is still served to the
+    request that read it, but not cached (the version, or the generation, moved).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.version = 0
+        self._generation = 0    # bumped by forget_trainee() and clear()
+        self._snapshot = _EMPTY
+        self._mappings = {}
+        self._visible = {}
+
+    def invalidate(self):
+        """Bump the version; the next read reloads the task table."""
+        with self._lock:
+            self.version += 1
+            self._visible.clear()
+        # The practical-assessment lesson tree is built from the same table
+        bump("tasks")
+
+    def forget_trainee(self, trainee_id: int):
+        """Drop a trainee's cached set mappings after they were changed."""
+        with self._lock:
+            self._generation += 1
+            self._mappings.pop(trainee_id, None)
+            self._visible.pop(trainee_id, None)
+
+    def clear(self):
+        with self._lock:
+            self.version += 1
+            self._generation += 1
+            self._mappings.clear()
+            self._visible.clear()
+
+    def _load(self, db: Session, version: int) -> _Snapshot:
+        rows = db.query(AssessmentTask).order_by(AssessmentTask.set_number, AssessmentTask.task_code).all()
+        tasks = [AssessmentTaskResponse.model_validate(row) for row in rows]
+        groups = {}
+        for task in tasks:
+            groups.setdefault((task.set_number, task.assessment_type), []).append(task)
+        digest = hashlib.sha1("\n".join(t.model_dump_json() for t in tasks).encode()).hexdigest()
+        logger.info(f"[+] Task catalog loaded: {len(tasks)} tasks in {len(groups)} sets (v{version})")
+        return _Snapshot(version, time.monotonic(), tasks, groups, digest)
+
+    def _fresh(self, db: Session) -> _Snapshot:
+        with self._lock:
+            if time.monotonic() - self._snapshot.loaded_at > TASK_CATALOG_MAX_AGE:
+                self._generation += 1
+                self._mappings.clear()
+                self._visible.clear()
+                self._snapshot = _EMPTY
+            snapshot, version = self._snapshot, self.version
+        if snapshot.version == version:
+            return snapshot
+
+        snapshot = self._load(db, version)
+        with self._lock:
+            # Checked again: keep a newer load, and don't cache one a write overtook
+            if self.version == version and self._snapshot.version != version:
+                self._snapshot = snapshot
+                self._visible.clear()
+        return snapshot
+
+    def _mapped_sets(self, db: Session, trainee_id: int):
+        with self._lock:
+            cached = self._mappings.get(trainee_id)
+            generation = self._generation
+        if cached is not None:
+            return cached, generation
+
+        rows = db.execute(
+            select(TraineeSetMapping.actual_set_number, TraineeSetMapping.assessment_type)
+            .where(TraineeSetMapping.trainee_id == trainee_id)
+        ).all()
+        cached = (
+            frozenset(s for s, t in rows if not _is_2d(t)),
+            frozenset(s for s, t in rows if _is_2d(t)),
+        ) if rows else _NO_MAPPINGS
+        with self._lock:
+            if self._generation == generation:
+                self._mappings[trainee_id] = cached
+        return cached, generation
+
+    def tasks_for(self, db: Session, user):
+        """
+        (etag, tasks) visible to user. Admins and employees see every task. A trainee
+        with set mappings of a type only sees the mapped sets of that type, ordered by
+        (set_number, order); a trainee without any mappings sees everything.
+        """
+        snapshot = self._fresh(db)
+        if user.role in ["admin", "employee"]:
+            return _etag(snapshot.digest, "all"), snapshot.tasks
+
+        with self._lock:
+            cached = self._visible.get(user.id) if self._snapshot is snapshot else None
+        if cached is not None:
+            return cached
+
+        (sets_3d, sets_2d), generation = self._mapped_sets(db, user.id)
+        if not sets_3d and not sets_2d:
+            visible = snapshot.tasks
+        else:
+            allowed = set()
+            for set_number, assessment_type in snapshot.groups:
+                mapped = sets_2d if _is_2d(assessment_type) else sets_3d
+                if not mapped or set_number in mapped:
+                    allowed.add((set_number, assessment_type))
+            visible = [t for t in snapshot.tasks if (t.set_number, t.assessment_type) in allowed]
+            visible.sort(key=lambda t: (t.set_number, t.order))
+
+        result = (_etag(snapshot.digest, ",".join(str(t.id) for t in visible)), visible)
+        with self._lock:
+            if self._snapshot is snapshot and self._generation == generation:
+                self._visible[user.id] = result
+        return result
+
+
+task_catalog = TaskCatalog()
+add_db_mode_listener(lambda old_mode, new_mode: task_catalog.clear())
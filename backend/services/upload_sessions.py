@@ -0,0 +1,216 @@
+"""
+Resumable uploads: create a session, PUT the file in fixed-size chunks (in any order,
+in parallel if the client likes, retrying any that fail), then finalize.
+
+Each session is a folder under {UPLOAD_DIR}/upload_sessions/<upload_id>:
+
+    session.json   what is being uploaded and by whom (written once at creation)
+    data           the file, preallocated to its full size; chunks land at their offsets
+    chunks/<n>     marker holding chunk n's SHA-256, written only after the bytes are synced
+
+so the received set survives a server restart and a client can resume from GET status.
+Finalize hashes the assembled file and hands it over as a StoredFile, like save_upload().
+"""
+
+import os
+import json
+import time
+import uuid
+import shutil
+import hashlib
+import logging
+from datetime import datetime
+from fastapi import HTTPException
+
+from .storage_service import StoredFile, blob_path, hash_file, staging_path, upload_limit
+from ..database import APP_PATH
+
+logger = logging.getLogger(__name__)
+
+RESUMABLE_CHUNK_SIZE = int(os.getenv("RESUMABLE_CHUNK_SIZE", str(8 * 1024 * 1024)))
+# Sessions with no chunk written for this long are discarded
+RESUMABLE_SESSION_TTL_HOURS = float(os.getenv("RESUMABLE_SESSION_TTL_HOURS", "24"))
+
+
+def sessions_root() -> str:
+    return os.path.join(os.getenv("UPLOAD_DIR", os.path.join(APP_PATH, "uploads")), "upload_sessions")
+
+
+def _session_dir(upload_id: str) -> str:
+    # upload_id comes from the URL; only ever accept our own hex ids
+    if len(upload_id) != 32 or not all(c in "0123456789abcdef" for c in upload_id):
+        raise HTTPException(status_code=404, detail="Upload session not found")
+    return os.path.join(sessions_root(), upload_id)
+
+
+def chunk_count(session: dict) -> int:
+    return -(-session["size"] // session["chunk_size"])
+
+
+def create_session(user_id: int, filename: str, size: int, params: dict, sha256: str = None) -> dict:
+    """Open a session for a file of `size` bytes; params are handed back on finalize."""
+    filename = os.path.basename(filename or "")
+    if not filename:
+        raise HTTPException(status_code=400, detail="filename is required")
+    if size <= 0:
+        raise HTTPException(status_code=400, detail="size must be positive")
+    max_bytes = upload_limit(filename)
+    if size > max_bytes:
+        raise HTTPException(status_code=413, detail=f"{filename} exceeds the {max_bytes // (1024 * 1024)} MB limit")
+
+    sweep_sessions()
+    upload_id = uuid.uuid4().hex
+    session = {
+        "upload_id": upload_id,
+        "user_id": user_id,
+        "filename": filename,
+        "size": size,
+        "chunk_size": RESUMABLE_CHUNK_SIZE,
+        "sha256": sha256.lower() if sha256 else None,
+        "params": params,
+        "created_at": datetime.utcnow().isoformat(),
+    }
+    session_dir = _session_dir(upload_id)
+    os.makedirs(os.path.join(session_dir, "chunks"))
+    with open(os.path.join(session_dir, "data"), "wb") as f:
+        f.truncate(size)
+    with open(os.path.join(session_dir, "session.json"), "w") as f:
+        json.dump(session, f)
+    return session
+
+
+def load_session(upload_id: str, user_id: int) -> dict:
+    try:
+        with open(os.path.join(_session_dir(upload_id), "session.json")) as f:
+            session = json.load(f)
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="Upload session not found")
+    if session["user_id"] != user_id:
+        raise HTTPException(status_code=404, detail="Upload session not found")
+    return session
+
+
+def received_chunks(session: dict) -> list:
+    chunks_dir = os.path.join(_session_dir(session["upload_id"]), "chunks")
+    try:
+        return sorted(int(name) for name in os.listdir(chunks_dir) if name.isdigit())
+    except FileNotFoundError:
+        return []
+
+
+def chunk_bounds(session: dict, offset: int):
+    """(index, expected length) of the chunk starting at offset."""
+    if offset < 0 or offset >= session["size"] or offset % session["chunk_size"]:
+        raise HTTPException(
+            status_code=400,
+            detail=f"offset must be a multiple of {session['chunk_size']} below {session['size']}"
+        )
+    return offset // session["chunk_size"], min(session["chunk_size"], session["size"] - offset)
+
+
+def write_chunk(session: dict, offset: int, data: bytes, sha256: str) -> int:
+    """Verify and store one chunk; returns its index. Re-sending a chunk overwrites it."""
+    index, expected = chunk_bounds(session, offset)
+    if len(data) != expected:
+        raise HTTPException(status_code=400, detail=f"Chunk {index} must be {expected} bytes, got {len(data)}")
+    if hashlib.sha256(data).hexdigest() != (sha256 or "").lower():
+        raise HTTPException(status_code=400, detail=f"Chunk {index} checksum mismatch")
+
+    session_dir = _session_dir(session["upload_id"])
+    try:
+        with open(os.path.join(session_dir, "data"), "r+b") as f:
+            f.seek(offset)
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+    except FileNotFoundError:
+        raise HTTPException(status_code=409, detail="Upload session already finalized")
+    marker = os.path.join(session_dir, "chunks", str(index))
+    with open(f"{marker}.tmp", "w") as f:
+        f.write(sha256.lower())
+    os.replace(f"{marker}.tmp", marker)
+    return index
+
+
+def claim_upload(session: dict) -> StoredFile:
+    """
+    Check every chunk arrived, move the assembled file to a staging path and hash it.
+    Moving it first means a second finalize of the same session gets 409, not a copy.
+    """
+    missing = sorted(set(range(chunk_count(session))) - set(received_chunks(session)))
+    if missing:
+        raise HTTPException(status_code=409, detail=f"Missing chunks: {missing[:20]}")
+
+    staged = staging_path()
+    os.makedirs(os.path.dirname(staged), exist_ok=True)
+    try:
+        os.replace(os.path.join(_session_dir(session["upload_id"]), "data"), staged)
+    except FileNotFoundError:
+        raise HTTPException(status_code=409, detail="Upload session already finalized")
+
+    size, sha256 = hash_file(staged)
+    if session["sha256"] and sha256 != session["sha256"]:
+        os.remove(staged)
+        discard_session(session["upload_id"])
+        raise HTTPException(status_code=400, detail="Assembled file checksum mismatch; upload it again")
+    return StoredFile(staged, size, sha256)
+
+
+def copy_claimed(stored: StoredFile) -> StoredFile:
+    """
+    A copy of a claimed file to hand over to something that consumes it without keeping
+    a blob (extracting a master .zip deletes it), so unclaim_upload() still has the
+    original. Remove the original with drop_claimed() once the hand-over succeeded.
+    """
+    copied = staging_path()
+    shutil.copyfile(stored.path, copied)
+    return StoredFile(copied, stored.size, stored.sha256)
+
+
+def drop_claimed(stored: StoredFile):
+    if os.path.exists(stored.path):
+        os.remove(stored.path)
+
+
+def unclaim_upload(session: dict, stored: StoredFile, handed: StoredFile = None):
+    """
+    Put a claimed file back so finalize can be retried after a failed hand-over. If the
+    hand-over already moved it into the blob store, the blob's content is copied back
+    (other paths may share it); handed, a copy_claimed() copy, is removed.
+    """
+    if handed is not None and handed.path != stored.path:
+        drop_claimed(handed)
+    data_path = os.path.join(_session_dir(session["upload_id"]), "data")
+    if os.path.exists(stored.path):
+        os.replace(stored.path, data_path)
+    elif os.path.exists(blob_path(stored.sha256)):
+        shutil.copyfile(blob_path(stored.sha256), f"{data_path}.tmp")
+        os.replace(f"{data_path}.tmp", data_path)
+    else:
+        logger.warning(f"[!] Upload {session['upload_id']} could not be restored after a failed finalize")
+
+
+def discard_session(upload_id: str):
+    shutil.rmtree(_session_dir(upload_id), ignore_errors=True)
+
+
+def sweep_sessions(max_age_hours: float = None) -> int:
+    """Remove sessions nobody has written to within max_age_hours; returns how many."""
+    max_age_hours = RESUMABLE_SESSION_TTL_HOURS if max_age_hours is None else max_age_hours
+    root = sessions_root()
+    if not os.path.isdir(root):
+        return 0
+    cutoff = time.time() - max_age_hours * 3600
+    removed = 0
+    for upload_id in os.listdir(root):
+        session_dir = os.path.join(root, upload_id)
+        stamps = [os.path.getmtime(session_dir)]
+        for name in ("data", "chunks"):
+            if os.path.exists(os.path.join(session_dir, name)):
+                stamps.append(os.path.getmtime(os.path.join(session_dir, name)))
+        if max(stamps) < cutoff:
+            shutil.rmtree(session_dir, ignore_errors=True)
+            removed += 1
+    if removed:
+        logger.info(f"[+] Discarded {removed} abandoned upload session(s)")
+    return removed
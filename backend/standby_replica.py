@@ -0,0 +1,241 @@
+"""
+Warm-standby replica: keeps the local SQLite fallback DB refreshed from MySQL.
+
+While the app runs on MySQL, a background thread copies the reference and user
+tables into kmti_icad.db so that a failover serves current data instead of
+whatever was there the last time the NAS dropped. Each cycle reads one MySQL
+transaction and writes one SQLite transaction, so the standby is always a
+consistent cut. Cycles run every REPLICA_LAG_TARGET / 2 seconds and the
+observed lag is exposed through status().
+
+Rows are only pulled once the SQLite -> MySQL direction is drained (no pending
+journal entries and a clean forward cycle since the last mode switch); until
+then the local file may hold fallback writes that MySQL has not seen yet. That
+only protects tables the forward sync covers, so every replica table must be in
+TABLES_TO_SYNC; deletes are never propagated into one that isn't.
+"""
+
+import os
+import threading
+import time
+import logging
+from datetime import datetime
+from sqlalchemy import select, delete, and_, bindparam, text, func
+
+try:
+    from .database import Base, USE_MYSQL, sqlite_engine, mysql_engine, get_db_mode, get_db_mode_changed_at
+    from .sync_worker import (
+        TABLES_TO_SYNC, SYNC_CHUNK_SIZE, sync_lock, sync_scheduler, pending_journal_counts,
+        upsert_statement, watermark_columns, rows_past_watermark, advance_watermark, mark_table_synced,
+        skip_conflicting_usernames,
+    )
+except ImportError:
+    from database import Base, USE_MYSQL, sqlite_engine, mysql_engine, get_db_mode, get_db_mode_changed_at
+    from sync_worker import (
+        TABLES_TO_SYNC, SYNC_CHUNK_SIZE, sync_lock, sync_scheduler, pending_journal_counts,
+        upsert_statement, watermark_columns, rows_past_watermark, advance_watermark, mark_table_synced,
+        skip_conflicting_usernames,
+    )
+
+logger = logging.getLogger(__name__)
+
+# Parents before children
+REPLICA_TABLES = [
+    "users",
+    "system_settings",
+    "courses",
+    "lessons",
+    "lesson_contents",
+    "quizzes",
+    "questions",
+    # Single-file master units only exist as blobs; downloads resolve them through blob_refs
+    "file_blobs",
+    "blob_refs",
+    "assessment_tasks",
+    "trainer_trainee_mappings",
+    "trainee_set_mappings",
+]
+
+REPLICA_LAG_TARGET = float(os.getenv("REPLICA_LAG_TARGET", "60"))  # seconds
+
+
+class StandbyReplicator:
+    """
+    MySQL -> SQLite replicator for REPLICA_TABLES.
+
+    Tables with an updated_at/submitted_at column are pulled incrementally past an
+    in-memory watermark; the others are small reference tables that are copied in
+    full, skipped when MySQL's CHECKSUM TABLE is unchanged. Rows deleted in MySQL
+    are removed locally by primary key difference, which is only computed when the
+    checksum or the row counts say something changed.
+    """
+
+    def __init__(self, tables=None, lag_target: float = REPLICA_LAG_TARGET):
+        self.tables = list(tables or REPLICA_TABLES)
+        self.lag_target = lag_target
+        self.interval = max(1.0, lag_target / 2)  # a single slow cycle still meets the target
+        self.last_snapshot_at = None  # unix time of the MySQL snapshot the standby reflects
+        self.last_cycle_ms = None
+        self.last_rows_applied = 0
+        self.last_error = None
+        self._watermarks = {}  # table -> (last_id, last_time)
+        self._checksums = {}   # table -> MySQL CHECKSUM TABLE value
+        self._lag_breached = False
+        self._thread = None
+
+    def lag_seconds(self):
+        if self.last_snapshot_at is None:
+            return None
+        return time.time() - self.last_snapshot_at
+
+    def status(self) -> dict:
+        lag = self.lag_seconds()
+        return {
+            "lag_seconds": round(lag, 1) if lag is not None else None,
+            "lag_target_seconds": self.lag_target,
+            "within_target": lag is not None and lag <= self.lag_target,
+            "last_snapshot_at": datetime.utcfromtimestamp(self.last_snapshot_at) if self.last_snapshot_at else None,
+            "last_cycle_ms": self.last_cycle_ms,
+            "last_rows_applied": self.last_rows_applied,
+            "last_error": self.last_error,
+        }
+
+    def forward_drained(self, sqlite_conn) -> bool:
+        """True when every local change has reached MySQL, so overwriting SQLite loses nothing."""
+        if pending_journal_counts(sqlite_conn):
+            return False
+        started = sync_scheduler.last_cycle_started
+        if started is None or started < get_db_mode_changed_at():
+            return False
+        metrics = sync_scheduler.snapshot()["tables"]
+        return all(metrics[t]["status"] == "ok" for t in self.tables if t in metrics)
+
+    @staticmethod
+    def _checksum(mysql_conn, table):
+        if mysql_conn.dialect.name != "mysql":
+            return None
+        row = mysql_conn.execute(text(f"CHECKSUM TABLE `{table.name}`")).first()
+        return row[1] if row else None
+
+    def _replicate_table(self, table, mysql_conn, sqlite_conn, pending_state) -> int:
+        id_col, time_col = watermark_columns(table)
+        pk_cols = list(table.primary_key.columns)
+        columns = [c.name for c in table.c]
+
+        if time_col is None:
+            checksum = self._checksum(mysql_conn, table)
+            if checksum is not None and checksum == self._checksums.get(table.name):
+                return 0
+            query = select(table)
+            last_id = last_time = None
+        else:
+            last_id, last_time = self._watermarks.get(table.name, (None, None))
+            query = rows_past_watermark(table, last_id, last_time)
+
+        upsert = upsert_statement(sqlite_conn, table, columns)
+        applied = skipped = 0
+        for chunk in mysql_conn.execute(query).mappings().partitions(SYNC_CHUNK_SIZE):
+            rows = [dict(row) for row in chunk]
+            last_id, last_time = advance_watermark(rows, id_col, time_col, last_id, last_time)
+            if table.name == "users":
+                # Same rule as the forward sync: a username held locally by another id is skipped
+                kept = skip_conflicting_usernames(sqlite_conn, rows)
+                skipped += len(rows) - len(kept)
+                rows = kept
+            if rows:
+                sqlite_conn.execute(upsert, rows)
+                applied += len(rows)
+        if not skipped:
+            # Otherwise pull the table again next cycle, once the delete pass below has
+            # removed the local row that held the username
+            if time_col is None:
+                pending_state[("checksum", table.name)] = checksum
+            else:
+                pending_state[("watermark", table.name)] = (last_id, last_time)
+
+        if table.name not in TABLES_TO_SYNC:
+            # Local rows missing from MySQL may be fallback writes nobody forwarded
+            return applied
+
+        # Propagate deletes. After the upserts every MySQL row is also local, so equal
+        # row counts mean nothing was deleted and the primary key comparison can be skipped.
+        # (Checksum tables only get here when their checksum moved.)
+        if time_col is not None and not skipped:
+            count = select(func.count()).select_from(table)
+            if mysql_conn.execute(count).scalar() == sqlite_conn.execute(count).scalar():
+                return applied
+        mysql_pks = set(mysql_conn.execute(select(*pk_cols)).tuples())
+        local_pks = set(sqlite_conn.execute(select(*pk_cols)).tuples())
+        gone = local_pks - mysql_pks
+        if gone:
+            stmt = delete(table).where(and_(*[c == bindparam(f"pk_{c.name}") for c in pk_cols]))
+            sqlite_conn.execute(stmt, [{f"pk_{c.name}": v for c, v in zip(pk_cols, pk)} for pk in gone])
+            applied += len(gone)
+        return applied
+
+    def replicate_once(self, mysql_conn, sqlite_conn) -> int:
+        """Copy one consistent MySQL snapshot of the standby tables into SQLite."""
+        snapshot_at = time.time()
+        pending_state = {}
+        applied = 0
+        try:
+            with mysql_conn.begin():  # One REPEATABLE READ snapshot across all tables
+                for name in self.tables:
+                    table = Base.metadata.tables[name]
+                    applied += self._replicate_table(table, mysql_conn, sqlite_conn, pending_state)
+                    if name in TABLES_TO_SYNC:
+                        # Everything local is already in MySQL; don't echo replicated rows back
+                        mark_table_synced(sqlite_conn, table)
+        except Exception:
+            sqlite_conn.rollback()
+            raise
+        sqlite_conn.commit()
+
+        for (kind, name), value in pending_state.items():
+            (self._checksums if kind == "checksum" else self._watermarks)[name] = value
+        self.last_snapshot_at = snapshot_at
+        return applied
+
+    def run_cycle(self):
+        """Replicate once if MySQL is primary and the forward direction is drained."""
+        if get_db_mode() != "mysql":
+            return
+        started = time.monotonic()
+        with sync_lock:
+            with sqlite_engine.connect() as sqlite_conn:
+                if not self.forward_drained(sqlite_conn):
+                    return
+                with mysql_engine.connect() as mysql_conn:
+                    self.last_rows_applied = self.replicate_once(mysql_conn, sqlite_conn)
+        self.last_cycle_ms = round((time.monotonic() - started) * 1000, 1)
+        self.last_error = None
+
+        lag = self.lag_seconds()
+        if lag is not None and lag > self.lag_target and not self._lag_breached:
+            logger.warning(f"[!] Standby replica lag {lag:.1f}s exceeds target {self.lag_target:.0f}s")
+        self._lag_breached = lag is not None and lag > self.lag_target
+
+    def _run(self):
+        logger.info("Standby replicator thread started.")
+        while True:
+            try:
+                self.run_cycle()
+            except Exception as e:
+                self.last_error = str(e)[:500]
+                logger.error(f"Error in standby replication cycle: {e}")
+            time.sleep(self.interval)
+
+    def start(self):
+        """Start the replicator thread (idempotent, no-op when MySQL is disabled)."""
+        if not USE_MYSQL or mysql_engine is None:
+            return
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._thread = threading.Thread(target=self._run, daemon=True, name="StandbyReplicator")
+        self._thread.start()
+
+
+standby_replicator = StandbyReplicator()
+
+def start_standby_replicator():
+    standby_replicator.start()
@@ -1,13 +1,24 @@
+import os
 import threading
 import time
+import json
 import logging
+import itertools
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from datetime import date, datetime, timedelta
 from sqlalchemy.orm import sessionmaker
-from sqlalchemy import text, inspect
+from sqlalchemy import text, inspect, select, update, delete, and_, or_, case, bindparam, DateTime, Integer, MetaData, Table, func
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 
 try:
-    from .database import USE_MYSQL, sqlite_engine, mysql_engine, SQLiteSessionLocal, MySQLSessionLocal, get_db_mode
+    from .database import Base, USE_MYSQL, sqlite_engine, mysql_engine, SQLiteSessionLocal, MySQLSessionLocal, get_db_mode
+    from .models import ChangeJournal, SyncWatermark
+    from .http_cache import bump_tables
 except ImportError:
-    from database import USE_MYSQL, sqlite_engine, mysql_engine, SQLiteSessionLocal, MySQLSessionLocal, get_db_mode
+    from database import Base, USE_MYSQL, sqlite_engine, mysql_engine, SQLiteSessionLocal, MySQLSessionLocal, get_db_mode
+    from models import ChangeJournal, SyncWatermark
+    from http_cache import bump_tables
 
 logger = logging.getLogger(__name__)
 
@@ -15,8 +26,16 @@ logger = logging.getLogger(__name__)
 TABLES_TO_SYNC = [
     "users",
     "system_settings",
+    # Curriculum and quizzes are replicated to the standby too, so admin edits made
+    # during a fallback must be forwarded before the replica prunes by primary key
+    "courses",
+    "lessons",
+    "lesson_contents",
+    "quizzes",
+    "questions",
     "user_progress",
     "quiz_scores",
+    "question_attempts",
     "media_metadata",
     "test_results",
     "system_logs",
@@ -25,79 +44,284 @@ TABLES_TO_SYNC = [
     "chat_feedback",
     "query_cache",
     "saved_snippets",
+    "file_blobs",
+    "blob_refs",
     "assessment_tasks",
     "assessment_submissions",
     "assessment_feedback",
     "trainer_trainee_mappings",
     "trainee_set_mappings",
+    "trainee_progress_snapshot",
     "notifications"
 ]
 
+SYNC_CHUNK_SIZE = 1000
+JOURNAL_BATCH_SIZE = 500
+JOURNAL_RETENTION_DAYS = 7
+
+def encode_row(row: dict) -> dict:
+    """Make a row JSON-serialisable (datetimes become ISO-8601 strings)."""
+    return {k: v.isoformat() if isinstance(v, (datetime, date)) else v for k, v in row.items()}
+
+def decode_row(table, data: dict) -> dict:
+    """Inverse of encode_row, driven by the table's column types. Unknown columns are dropped."""
+    row = {}
+    for name, value in data.items():
+        if name not in table.c:
+            continue
+        if isinstance(value, str) and isinstance(table.c[name].type, DateTime):
+            value = datetime.fromisoformat(value)
+        row[name] = value
+    return row
+
+def upsert_statement(conn, table, columns, guard_col=None, insert_only=False):
+    """
+    Build a dialect-aware upsert for executemany: INSERT ... ON DUPLICATE KEY UPDATE on
+    MySQL, INSERT ... ON CONFLICT DO UPDATE on SQLite.
+
+    With guard_col (e.g. "updated_at") an existing row is only overwritten when the
+    incoming value is not older than the stored one. Tables with nothing but primary
+    key columns (or insert_only=True) leave existing rows untouched.
+    """
+    pk_names = [c.name for c in table.primary_key.columns]
+    update_cols = [] if insert_only else [c for c in columns if c not in pk_names]
+
+    if conn.dialect.name == "mysql":
+        stmt = mysql_insert(table)
+        is_newer = None
+        if guard_col:
+            is_newer = or_(table.c[guard_col].is_(None), stmt.inserted[guard_col] >= table.c[guard_col])
+        assignments = []
+        # MySQL applies assignments left to right, so the guard column must be updated last
+        for name in sorted(update_cols, key=lambda n: n == guard_col):
+            value = stmt.inserted[name]
+            if is_newer is not None:
+                value = case((is_newer, value), else_=table.c[name])
+            assignments.append((name, value))
+        if not assignments:
+            assignments = [(pk_names[0], table.c[pk_names[0]])]
+        return stmt.on_duplicate_key_update(assignments)
+
+    stmt = sqlite_insert(table)
+    if not update_cols:
+        return stmt.on_conflict_do_nothing(index_elements=pk_names)
+    where = None
+    if guard_col:
+        where = or_(table.c[guard_col].is_(None), stmt.excluded[guard_col] >= table.c[guard_col])
+    return stmt.on_conflict_do_update(
+        index_elements=pk_names,
+        set_={name: stmt.excluded[name] for name in update_cols},
+        where=where
+    )
+
+def skip_conflicting_usernames(target_conn, rows):
+    """Drop user rows whose username already exists in the target DB under a different id."""
+    users = Base.metadata.tables["users"]
+    names = [r["username"] for r in rows if r.get("username")]
+    if not names:
+        return rows
+    existing = {
+        username.lower(): user_id
+        for user_id, username in target_conn.execute(
+            select(users.c.id, users.c.username).where(users.c.username.in_(names))
+        )
+    }
+    kept = []
+    for row in rows:
+        owner = existing.get((row.get("username") or "").lower())
+        if owner is not None and owner != row["id"]:
+            logger.warning(
+                f"Skipping sync of user id {row['id']}: username already used by id {owner} in {target_conn.dialect.name}"
+            )
+            continue
+        kept.append(row)
+    return kept
+
+def replay_change_journal(sqlite_conn, mysql_conn) -> list:
+    """
+    Apply up to JOURNAL_BATCH_SIZE pending change_journal entries to MySQL in the order
+    they were written. Consecutive entries for the same table and operation are sent as
+    a single executemany. Returns the ids of the replayed entries; the caller marks them
+    applied once the MySQL transaction has committed.
+    """
+    journal = ChangeJournal.__table__
+    entries = sqlite_conn.execute(
+        select(journal)
+        .where(journal.c.applied_at.is_(None))
+        .order_by(journal.c.id)
+        .limit(JOURNAL_BATCH_SIZE)
+    ).fetchall()
+
+    for (table_name, operation), group in itertools.groupby(entries, key=lambda e: (e.table_name, e.operation)):
+        group = list(group)
+        table = Base.metadata.tables[table_name]
+        if operation == "delete":
+            pk_cols = list(table.primary_key.columns)
+            stmt = delete(table).where(and_(*[c == bindparam(f"pk_{c.name}") for c in pk_cols]))
+            params = [
+                {f"pk_{k}": v for k, v in decode_row(table, json.loads(e.row_pk)).items()}
+                for e in group
+            ]
+            mysql_conn.execute(stmt, params)
+            continue
+
+        rows = [decode_row(table, json.loads(e.row_data)) for e in group]
+        if table_name == "users":
+            rows = skip_conflicting_usernames(mysql_conn, rows)
+        if rows:
+            guard_col = "updated_at" if "updated_at" in table.c else None
+            mysql_conn.execute(upsert_statement(mysql_conn, table, list(rows[0].keys()), guard_col), rows)
+
+    return [e.id for e in entries]
+
+def mark_journal_applied(sqlite_conn, entry_ids: list):
+    """Flag replayed entries and prune applied ones past the retention window (caller commits)."""
+    journal = ChangeJournal.__table__
+    now = datetime.utcnow()
+    if entry_ids:
+        sqlite_conn.execute(update(journal).where(journal.c.id.in_(entry_ids)).values(applied_at=now))
+    sqlite_conn.execute(
+        delete(journal).where(journal.c.applied_at < now - timedelta(days=JOURNAL_RETENTION_DAYS))
+    )
+
+def pending_journal_counts(sqlite_conn) -> dict:
+    """Number of not-yet-replayed journal entries per table."""
+    journal = ChangeJournal.__table__
+    rows = sqlite_conn.execute(
+        select(journal.c.table_name, func.count())
+        .where(journal.c.applied_at.is_(None))
+        .group_by(journal.c.table_name)
+    )
+    return {table_name: count for table_name, count in rows}
+
+def sync_change_journal(sqlite_conn, mysql_conn) -> int:
+    """Replay the whole pending journal in batches. Returns the number of entries applied."""
+    tables = pending_journal_counts(sqlite_conn)
+    applied = 0
+    while True:
+        with mysql_conn.begin():
+            entry_ids = replay_change_journal(sqlite_conn, mysql_conn)
+        mark_journal_applied(sqlite_conn, entry_ids)
+        sqlite_conn.commit()
+        applied += len(entry_ids)
+        if len(entry_ids) < JOURNAL_BATCH_SIZE:
+            if applied:
+                bump_tables(*tables)
+            return applied
+
+_reflected_tables = {}
+
+def _sync_table(table_name: str, sqlite_conn):
+    """Model table if there is one, otherwise the table reflected from SQLite (cached)."""
+    table = Base.metadata.tables.get(table_name)
+    if table is None:
+        table = _reflected_tables.get(table_name)
+        if table is None:
+            table = Table(table_name, MetaData(), autoload_with=sqlite_conn)
+            _reflected_tables[table_name] = table
+    return table
+
+def _load_watermark(sqlite_conn, table_name: str):
+    watermarks = SyncWatermark.__table__
+    row = sqlite_conn.execute(
+        select(watermarks.c.last_id, watermarks.c.last_time).where(watermarks.c.table_name == table_name)
+    ).first()
+    return (row.last_id, row.last_time) if row else (None, None)
+
+def _save_watermark(sqlite_conn, table_name: str, last_id, last_time):
+    watermarks = SyncWatermark.__table__
+    values = {"table_name": table_name, "last_id": last_id, "last_time": last_time, "synced_at": datetime.utcnow()}
+    sqlite_conn.execute(upsert_statement(sqlite_conn, watermarks, list(values.keys())), values)
+
+def mark_table_synced(sqlite_conn, table):
+    """Move a table's forward watermark to its current local maximum (caller commits)."""
+    id_col, time_col = watermark_columns(table)
+    cols = [c for c in (id_col, time_col) if c is not None]
+    if not cols:
+        return
+    maxima = list(sqlite_conn.execute(select(*[func.max(c) for c in cols])).first())
+    last_id = maxima.pop(0) if id_col is not None else None
+    last_time = maxima.pop(0) if time_col is not None else None
+    _save_watermark(sqlite_conn, table.name, last_id, last_time)
+
+def watermark_columns(table):
+    """(integer primary key column or None, updated_at/submitted_at column or None)."""
+    pk_cols = list(table.primary_key.columns)
+    id_col = pk_cols[0] if len(pk_cols) == 1 and isinstance(pk_cols[0].type, Integer) else None
+    time_col = None
+    if "updated_at" in table.c:
+        time_col = table.c.updated_at
+    elif "submitted_at" in table.c:
+        time_col = table.c.submitted_at
+    return id_col, time_col
+
+def rows_past_watermark(table, last_id, last_time):
+    """SELECT of the rows with a higher id or a not-older timestamp than the watermark."""
+    id_col, time_col = watermark_columns(table)
+    query = select(table)
+    if (last_id, last_time) != (None, None):
+        conditions = []
+        if id_col is not None:
+            conditions.append(id_col > last_id if last_id is not None else id_col.isnot(None))
+        if time_col is not None:
+            # >= so rows sharing the boundary timestamp are re-sent (upserts are idempotent)
+            conditions.append(time_col >= last_time if last_time is not None else time_col.isnot(None))
+        query = query.where(or_(*conditions))
+    if id_col is not None:
+        query = query.order_by(id_col)
+    return query
+
+def advance_watermark(rows, id_col, time_col, last_id, last_time):
+    """Fold a chunk of rows into an (id, time) watermark."""
+    if id_col is not None and rows:
+        last_id = max([last_id or 0] + [r[id_col.name] for r in rows])
+    if time_col is not None:
+        times = [r[time_col.name] for r in rows if r[time_col.name] is not None]
+        if times:
+            last_time = max(times + ([last_time] if last_time else []))
+    return last_id, last_time
+
 def sync_table_data(table_name: str, sqlite_conn, mysql_conn):
-    """Sync data for a single table from SQLite to MySQL."""
+    """
+    Push SQLite rows past the table's watermark to MySQL.
+
+    Only rows with a higher integer primary key, or a newer updated_at/submitted_at,
+    than the stored watermark are read; they are written as one executemany upsert
+    per SYNC_CHUNK_SIZE rows. Tables with a time column only overwrite MySQL rows that
+    are not newer; tables without one are insert-only. The new watermark is written to
+    sqlite_conn uncommitted so the caller can commit it after MySQL commits.
+    Returns the number of rows sent.
+    """
     try:
-        # Get SQLite records
-        sqlite_result = sqlite_conn.execute(text(f"SELECT * FROM {table_name}"))
-        columns = list(sqlite_result.keys())
-        sqlite_rows = [dict(zip(columns, row)) for row in sqlite_result.fetchall()]
-        
-        if not sqlite_rows:
-            return
-            
-        # Get existing MySQL keys (primary key check)
-        # We assume first column is 'id' unless it's system_settings ('key')
-        pk_col = "key" if table_name == "system_settings" else "id"
-        
-        # Determine timestamp column beforehand
-        time_col = None
-        if "updated_at" in columns:
-            time_col = "updated_at"
-        elif "submitted_at" in columns:
-            time_col = "submitted_at"
-
-        # Batch query MySQL for primary keys and timestamps (if time_col exists)
-        if time_col:
-            mysql_result = mysql_conn.execute(text(f"SELECT {pk_col}, {time_col} FROM {table_name}"))
-            mysql_data = {row[0]: row[1] for row in mysql_result.fetchall()}
-            existing_pks = set(mysql_data.keys())
-        else:
-            mysql_result = mysql_conn.execute(text(f"SELECT {pk_col} FROM {table_name}"))
-            existing_pks = {row[0] for row in mysql_result.fetchall()}
-            mysql_data = {}
-        
-        # Check for existing usernames to prevent IntegrityErrors (case-insensitive check)
-        existing_usernames = set()
-        if table_name == "users":
-            uname_result = mysql_conn.execute(text("SELECT username FROM users"))
-            existing_usernames = {row[0].lower() for row in uname_result.fetchall() if row[0]}
-        
-        for row in sqlite_rows:
-            pk_val = row[pk_col]
-            if pk_val not in existing_pks:
-                # If username already exists in MySQL (with a different id), skip to avoid unique constraint conflict
-                if table_name == "users" and row.get("username") and row.get("username").lower() in existing_usernames:
-                    continue
-                
-                # Insert missing record
-                cols = ", ".join(row.keys())
-                placeholders = ", ".join([f":{col}" for col in row.keys()])
-                mysql_conn.execute(
-                    text(f"INSERT INTO {table_name} ({cols}) VALUES ({placeholders})"),
-                    row
-                )
-            else:
-                # Update if there is a timestamp column and the SQLite record is newer
-                if time_col and row[time_col]:
-                    sqlite_time = row[time_col]
-                    mysql_time = mysql_data.get(pk_val)
-                    
-                    if not mysql_time or str(sqlite_time) > str(mysql_time):
-                        set_clause = ", ".join([f"{col} = :{col}" for col in row.keys() if col != pk_col])
-                        mysql_conn.execute(
-                            text(f"UPDATE {table_name} SET {set_clause} WHERE {pk_col} = :key_val"),
-                            {**row, "key_val": pk_val}
-                        )
-        
+        table = _sync_table(table_name, sqlite_conn)
+        id_col, time_col = watermark_columns(table)
+        last_id, last_time = _load_watermark(sqlite_conn, table_name)
+        query = rows_past_watermark(table, last_id, last_time)
+
+        columns = [c.name for c in table.c]
+        upsert = upsert_statement(
+            mysql_conn, table, columns,
+            guard_col=time_col.name if time_col is not None else None,
+            insert_only=time_col is None
+        )
+
+        new_id, new_time = last_id, last_time
+        sent = 0
+        result = sqlite_conn.execute(query)
+        for chunk in result.mappings().partitions(SYNC_CHUNK_SIZE):
+            rows = [dict(row) for row in chunk]
+            new_id, new_time = advance_watermark(rows, id_col, time_col, new_id, new_time)
+            if table_name == "users":
+                # Skip usernames owned by a different id in MySQL to avoid unique constraint conflicts
+                rows = skip_conflicting_usernames(mysql_conn, rows)
+            if rows:
+                mysql_conn.execute(upsert, rows)
+                sent += len(rows)
+
+        if (new_id, new_time) != (last_id, last_time):
+            _save_watermark(sqlite_conn, table_name, new_id, new_time)
+        return sent
+
     except Exception as e:
         # Sanitize error message to prevent data leakage (e.g. hashed passwords or emails) in logs
         err_msg = str(e)
@@ -113,6 +337,177 @@ def sync_table_data(table_name: str, sqlite_conn, mysql_conn):
         logger.error(f"Error syncing table {table_name}: {err_msg}")
         raise  # Let caller handle transaction rollback
 
+SYNC_INTERVAL = 30  # seconds between sync cycles
+SYNC_MAX_WORKERS = int(os.getenv("SYNC_MAX_WORKERS", "4"))
+SYNC_MAX_BACKOFF = 600  # seconds
+
+# Held for a whole forward sync cycle; the standby replicator takes it too so the two
+# directions never interleave on the same tables.
+sync_lock = threading.Lock()
+
+def table_dependencies(tables) -> dict:
+    """Map each table to the synced tables its foreign keys point at (parents sync first)."""
+    synced = set(tables)
+    deps = {}
+    for name in tables:
+        table = Base.metadata.tables.get(name)
+        parents = {fk.column.table.name for fk in table.foreign_keys} if table is not None else set()
+        deps[name] = (parents & synced) - {name}
+    return deps
+
+class SyncScheduler:
+    """
+    Runs the watermarked table sync as a dependency-ordered DAG on a small thread pool.
+
+    A table starts as soon as all of its foreign-key parents have synced in the
+    current cycle; each table gets its own connections and MySQL transaction, so a
+    failure only rolls back that table. Failed tables back off exponentially on
+    their own and their dependents are reported as "blocked" until they recover.
+    Per-table metrics are exposed through snapshot() for /admin/sync-status.
+    """
+
+    def __init__(self, tables=None, max_workers=SYNC_MAX_WORKERS):
+        self.tables = list(tables or TABLES_TO_SYNC)
+        self.dependencies = table_dependencies(self.tables)
+        self.max_workers = max_workers
+        self.last_cycle_at = None
+        self.last_cycle_started = None  # unix time, compared against DB mode switches
+        self._lock = threading.Lock()
+        self._metrics = {name: self._empty_metrics() for name in self.tables}
+
+    @staticmethod
+    def _empty_metrics():
+        return {
+            "status": "pending",  # pending | ok | error | backoff | blocked
+            "rows_synced": 0,
+            "total_rows_synced": 0,
+            "duration_ms": None,
+            "last_success_at": None,
+            "last_error": None,
+            "failures": 0,
+            "next_attempt_at": None,
+        }
+
+    def _update(self, table_name, **values):
+        with self._lock:
+            self._metrics[table_name].update(values)
+
+    def sync_table(self, table_name: str) -> int:
+        """Sync one table in its own transaction; the watermark commits only after MySQL does."""
+        with sqlite_engine.connect() as sqlite_conn:
+            with mysql_engine.connect() as mysql_conn:
+                try:
+                    with mysql_conn.begin():
+                        rows = sync_table_data(table_name, sqlite_conn, mysql_conn)
+                except Exception:
+                    sqlite_conn.rollback()  # Keep the old watermark; MySQL did not get the rows
+                    raise
+                sqlite_conn.commit()
+        if rows:
+            bump_tables(table_name)
+        return rows
+
+    def _run_table(self, table_name: str) -> bool:
+        started = time.monotonic()
+        try:
+            rows = self.sync_table(table_name)
+        except Exception as e:
+            with self._lock:
+                metrics = self._metrics[table_name]
+                metrics["failures"] += 1
+                delay = min(SYNC_INTERVAL * 2 ** (metrics["failures"] - 1), SYNC_MAX_BACKOFF)
+                metrics.update(
+                    status="error",
+                    duration_ms=round((time.monotonic() - started) * 1000, 1),
+                    last_error=str(e)[:500],
+                    next_attempt_at=datetime.utcnow() + timedelta(seconds=delay),
+                )
+            return False
+        with self._lock:
+            metrics = self._metrics[table_name]
+            metrics.update(
+                status="ok",
+                rows_synced=rows,
+                total_rows_synced=metrics["total_rows_synced"] + rows,
+                duration_ms=round((time.monotonic() - started) * 1000, 1),
+                last_success_at=datetime.utcnow(),
+                last_error=None,
+                failures=0,
+                next_attempt_at=None,
+            )
+        return True
+
+    def _is_due(self, table_name: str, now: datetime) -> bool:
+        with self._lock:
+            next_attempt = self._metrics[table_name]["next_attempt_at"]
+        return next_attempt is None or next_attempt <= now
+
+    def run_cycle(self, available_tables=None):
+        """Sync every available table once, parents before children, independent tables in parallel."""
+        now = datetime.utcnow()
+        self.last_cycle_started = time.time()
+        tables = [t for t in self.tables if available_tables is None or t in available_tables]
+        remaining = list(tables)
+        results = {}  # table -> synced successfully this cycle
+        running = {}
+
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="DBSyncTable") as pool:
+            while remaining or running:
+                for table_name in list(remaining):
+                    deps = self.dependencies[table_name] & set(tables)
+                    if not deps <= results.keys():
+                        continue
+                    remaining.remove(table_name)
+                    if not all(results[d] for d in deps):
+                        self._update(table_name, status="blocked")
+                        results[table_name] = False
+                    elif not self._is_due(table_name, now):
+                        self._update(table_name, status="backoff")
+                        results[table_name] = False
+                    else:
+                        running[pool.submit(self._run_table, table_name)] = table_name
+                if not running:
+                    # Only reachable with a dependency cycle; never wait forever on it
+                    for table_name in remaining:
+                        self._update(table_name, status="blocked")
+                    break
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    results[running.pop(future)] = future.result()
+
+        self.last_cycle_at = datetime.utcnow()
+        return results
+
+    def snapshot(self) -> dict:
+        """Per-table metrics; lag_seconds is the time since the table was last known to be caught up."""
+        now = datetime.utcnow()
+        with self._lock:
+            tables = {}
+            for name, metrics in self._metrics.items():
+                entry = dict(metrics)
+                entry["depends_on"] = sorted(self.dependencies.get(name, ()))
+                entry["lag_seconds"] = (
+                    round((now - metrics["last_success_at"]).total_seconds(), 1)
+                    if metrics["last_success_at"] else None
+                )
+                tables[name] = entry
+        return {"last_cycle_at": self.last_cycle_at, "tables": tables}
+
+sync_scheduler = SyncScheduler()
+
+def run_forward_cycle():
+    """One SQLite -> MySQL pass: journal replay, then the watermarked table sync."""
+    # The journal is globally ordered, so it is replayed serially before the table pass
+    with sqlite_engine.connect() as sqlite_conn:
+        with mysql_engine.connect() as mysql_conn:
+            applied = sync_change_journal(sqlite_conn, mysql_conn)
+    if applied:
+        logger.info(f"Replayed {applied} journaled change(s) to MySQL.")
+
+    # Watermarked pass: picks up inserts made outside the ORM (no journal entry)
+    available = set(inspect(sqlite_engine).get_table_names()) & set(inspect(mysql_engine).get_table_names())
+    sync_scheduler.run_cycle(available)
+
 def run_sync():
     """Main loop for synchronization worker."""
     if not USE_MYSQL or mysql_engine is None:
@@ -124,20 +519,13 @@ def run_sync():
         try:
             # Only sync if we are back in MySQL mode (meaning MySQL is online)
             if get_db_mode() == "mysql":
-                sqlite_inspector = inspect(sqlite_engine)
-                mysql_inspector = inspect(mysql_engine)
-                
-                with sqlite_engine.connect() as sqlite_conn:
-                    with mysql_engine.connect() as mysql_conn:
-                        with mysql_conn.begin():  # Explicit transaction for all table syncs
-                            for table in TABLES_TO_SYNC:
-                                if sqlite_inspector.has_table(table) and mysql_inspector.has_table(table):
-                                    sync_table_data(table, sqlite_conn, mysql_conn)
+                with sync_lock:
+                    run_forward_cycle()
             
         except Exception as e:
             logger.error(f"Error in sync cycle: {e}")
             
-        time.sleep(30) # Run every 30 seconds
+        time.sleep(SYNC_INTERVAL)
 
 def start_sync_worker():
     """Start the sync worker in a background thread."""
@@ -2,36 +2,65 @@
 conftest.py — Shared pytest fixtures for the KMTI iCAD Hub backend test suite.
 
 Strategy:
-- Each test session gets a fresh in-memory SQLite database (no file on disk).
+- Each test session gets a fresh SQLite database in a temporary directory. It is a
+  file (not :memory:) so the sync and async (aiosqlite) engines share the same data.
+- Tables are emptied after every test instead of rolling back an outer transaction,
+  since rows committed by the sync session must be visible to async handlers.
 - FastAPI's dependency injection is overridden so no real DB is ever touched.
 - Seeded fixtures (admin_user, trainee_user, employee_user, seed_quiz) provide
   ready-made data for tests without repetitive setup code.
 """
 
 import os
+import shutil
+import tempfile
 import pytest
 from datetime import datetime, timezone
 from fastapi.testclient import TestClient
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
 
 # ── Set a dummy SECRET_KEY so security.py doesn't raise on import ─────────────
 os.environ.setdefault("SECRET_KEY", "test-secret-key-for-pytest-do-not-use-in-production")
 os.environ.setdefault("USE_MYSQL", "false")
 
-from backend.database import Base, get_db
+# ── Keep the app's own fallback DB and vector store out of the checkout ───────
+TEST_DB_DIR = tempfile.mkdtemp(prefix="kmti_test_db_")
+os.environ["SQLITE_DB_PATH"] = os.path.join(TEST_DB_DIR, "app_fallback.db")
+os.environ["VECTOR_DB_PATH"] = os.path.join(TEST_DB_DIR, "vector_db")
+
+from backend.database import Base, get_db, get_async_db
 from backend.main import app
 from backend.models import User, Quiz, Question
+from backend.services.task_catalog import task_catalog
+from backend import http_cache
+from backend.write_queue import write_queue
 from backend.auth.security import hash_password, create_access_token
 
-# ── In-memory SQLite engine — isolated per test session ──────────────────────
-SQLALCHEMY_TEST_URL = "sqlite://"  # :memory:
+# ── Temporary-file SQLite engines — isolated per test session ─────────────────
+SQLALCHEMY_TEST_URL = f"sqlite:///{os.path.join(TEST_DB_DIR, 'test.db')}"
 
 engine = create_engine(
     SQLALCHEMY_TEST_URL,
     connect_args={"check_same_thread": False},
 )
+# NullPool: every TestClient runs its own event loop, aiosqlite connections can't be shared
+async_engine = create_async_engine(
+    SQLALCHEMY_TEST_URL.replace("sqlite://", "sqlite+aiosqlite://", 1),
+    poolclass=NullPool,
+)
+
+@event.listens_for(engine, "connect")
+@event.listens_for(async_engine.sync_engine, "connect")
+def _set_wal(dbapi_connection, _connection_record):
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.close()
+
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+TestingAsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
 
 
 @pytest.fixture(scope="session", autouse=True)
@@ -40,18 +69,21 @@ def create_tables():
     Base.metadata.create_all(bind=engine)
     yield
     Base.metadata.drop_all(bind=engine)
+    engine.dispose()
+    shutil.rmtree(TEST_DB_DIR, ignore_errors=True)
 
 
 @pytest.fixture()
 def db():
-    """Provide a transactional DB session that rolls back after each test."""
-    connection = engine.connect()
-    transaction = connection.begin()
-    session = TestingSessionLocal(bind=connection)
+    """Provide a DB session; every table is emptied after each test."""
+    session = TestingSessionLocal()
     yield session
     session.close()
-    transaction.rollback()
-    connection.close()
+    with engine.begin() as conn:
+        for table in reversed(Base.metadata.sorted_tables):
+            conn.execute(table.delete())
+    task_catalog.clear()
+    http_cache.bump_all()
 
 
 @pytest.fixture()
@@ -63,9 +95,18 @@ def client(db):
         finally:
             pass
 
+    async def override_get_async_db():
+        async with TestingAsyncSessionLocal() as session:
+            yield session
+
     app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_async_db] = override_get_async_db
+    # Queued writes (heartbeats, quiz submissions on SQLite) go to the test database too
+    session_factory, write_queue.session_factory = write_queue.session_factory, TestingSessionLocal
     with TestClient(app, raise_server_exceptions=True) as c:
         yield c
+    write_queue.flush(timeout=10)
+    write_queue.session_factory = session_factory
     app.dependency_overrides.clear()
 
 
@@ -144,6 +185,14 @@ def auth_headers(token: str) -> dict:
     return {"Authorization": f"Bearer {token}"}
 
 
+def assert_query_budget(response, max_queries: int):
+    """Helper: fail if the request behind `response` ran more than max_queries statements."""
+    used = int(response.headers["X-DB-Queries"])
+    assert used <= max_queries, (
+        f"{response.request.method} {response.request.url.path} ran {used} queries (budget {max_queries})"
+    )
+
+
 # ── Quiz seed fixture ─────────────────────────────────────────────────────────
 
 @pytest.fixture()
@@ -0,0 +1,117 @@
+"""
+test_archive_service.py — Tests for the streamed submissions ZIP.
+"""
+
+import io
+import zipfile
+from datetime import datetime, timezone
+
+import pytest
+from fastapi import UploadFile
+
+from backend.models import AssessmentTask, AssessmentSubmission, TrainerTraineeMapping, User
+from backend.auth.security import hash_password
+from backend.services import archive_service
+from backend.services.archive_service import ArchiveEntry, stream_zip, unique_name
+from backend.services.storage_service import store_blob, link_blob
+from .conftest import auth_headers
+
+ENDPOINT = "/api/v1/assessments/trainer/submissions/archive"
+
+
+def _unzip(data: bytes) -> dict:
+    with zipfile.ZipFile(io.BytesIO(data)) as archive:
+        assert archive.testzip() is None
+        return {name: archive.read(name) for name in archive.namelist()}
+
+
+class TestStreamZip:
+
+    def test_members_round_trip_across_many_chunks(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(archive_service, "ARCHIVE_READ_SIZE", 1000)
+        big = bytes(range(256)) * 200
+        (tmp_path / "a.dwg").write_bytes(big)
+        (tmp_path / "b.dwg").write_bytes(b"second")
+
+        chunks = list(stream_zip([
+            ArchiveEntry("trainee/Set 1/A1/a.dwg", str(tmp_path / "a.dwg")),
+            ArchiveEntry("trainee/Set 1/A2/b.dwg", str(tmp_path / "b.dwg")),
+        ]))
+
+        assert len(chunks) > 2
+        assert _unzip(b"".join(chunks)) == {"trainee/Set 1/A1/a.dwg": big, "trainee/Set 1/A2/b.dwg": b"second"}
+
+    def test_missing_files_are_listed_not_fatal(self, tmp_path):
+        (tmp_path / "here.dwg").write_bytes(b"ok")
+
+        members = _unzip(b"".join(stream_zip([
+            ArchiveEntry("here.dwg", str(tmp_path / "here.dwg")),
+            ArchiveEntry("gone.dwg", str(tmp_path / "gone.dwg")),
+        ])))
+
+        assert members["here.dwg"] == b"ok"
+        assert b"gone.dwg" in members["MISSING.txt"]
+
+    def test_unique_name(self):
+        used = set()
+        assert unique_name("a/x.dwg", used) == "a/x.dwg"
+        assert unique_name("a/X.dwg", used) == "a/X (2).dwg"
+        assert unique_name("a/x.dwg", used) == "a/x (3).dwg"
+
+
+@pytest.fixture()
+async def archive_setup(db, tmp_path, monkeypatch, trainee_user, employee_user):
+    """Two trainees with one submission each; only trainee_user is assigned to employee_user."""
+    monkeypatch.setenv("UPLOAD_DIR", str(tmp_path))
+    other = User(
+        username="other_trainee", email="other@test.kmti", hashed_password=hash_password("Other@12345"),
+        role="trainee", is_active=True, created_at=datetime.now(timezone.utc),
+    )
+    task = AssessmentTask(set_number=2, task_code="A1", title="Unit 2A", assessment_type="3D")
+    db.add_all([other, task, TrainerTraineeMapping(trainer_id=employee_user.id, trainee_id=trainee_user.id)])
+    db.flush()
+
+    blob_path = str(tmp_path / "submissions" / "mine.dwg")
+    link_blob(db, blob_path, await store_blob(UploadFile(file=io.BytesIO(b"assigned trainee drawing"), filename="mine.dwg")))
+    legacy_path = tmp_path / "theirs.dwg"
+    legacy_path.write_bytes(b"unassigned trainee drawing")
+    mine = AssessmentSubmission(user_id=trainee_user.id, task_id=task.id, assessment_type="3D",
+                                submission_file_path=blob_path, submitted_at=datetime(2026, 3, 2))
+    theirs = AssessmentSubmission(user_id=other.id, task_id=task.id, assessment_type="3D",
+                                  submission_file_path=str(legacy_path), submitted_at=datetime(2026, 3, 9))
+    db.add_all([mine, theirs])
+    db.commit()
+    return mine, theirs
+
+
+class TestArchiveEndpoint:
+
+    def test_admin_gets_every_trainee(self, client, admin_token, archive_setup):
+        mine, theirs = archive_setup
+        response = client.get(ENDPOINT, params={"set_number": 2}, headers=auth_headers(admin_token))
+
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/zip"
+        assert 'filename="submissions_set2.zip"' in response.headers["content-disposition"]
+        assert _unzip(response.content) == {
+            f"other_trainee/Set 2/A1/{theirs.id}_theirs.dwg": b"unassigned trainee drawing",
+            f"trainee_test/Set 2/A1/{mine.id}_mine.dwg": b"assigned trainee drawing",
+        }
+
+    def test_employee_only_gets_assigned_trainees(self, client, employee_token, archive_setup):
+        mine, theirs = archive_setup
+        response = client.get(ENDPOINT, headers=auth_headers(employee_token))
+
+        assert list(_unzip(response.content)) == [f"trainee_test/Set 2/A1/{mine.id}_mine.dwg"]
+
+    def test_date_range(self, client, admin_token, archive_setup):
+        response = client.get(ENDPOINT, params={"submitted_from": "2026-03-05T00:00:00"}, headers=auth_headers(admin_token))
+
+        assert [name.split("/")[0] for name in _unzip(response.content)] == ["other_trainee"]
+
+    def test_no_match_is_404(self, client, admin_token, archive_setup):
+        response = client.get(ENDPOINT, params={"submitted_to": "2026-01-01T00:00:00"}, headers=auth_headers(admin_token))
+        assert response.status_code == 404
+
+    def test_trainee_forbidden(self, client, trainee_token, archive_setup):
+        assert client.get(ENDPOINT, headers=auth_headers(trainee_token)).status_code == 403
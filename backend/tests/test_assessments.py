@@ -8,10 +8,13 @@ Covers:
 - Admin-only endpoint protection
 """
 
+import threading
 import pytest
 from datetime import datetime
+from types import SimpleNamespace
 
-from backend.models import AssessmentTask, AssessmentSubmission, TrainerTraineeMapping
+from backend.models import AssessmentTask, AssessmentSubmission, TrainerTraineeMapping, FileBlob
+from backend.services.task_catalog import TaskCatalog
 from .conftest import auth_headers
 
 
@@ -89,6 +92,74 @@ class TestGetTasks:
         response = client.get(self.ENDPOINT)
         assert response.status_code == 401
 
+    def test_unchanged_catalog_returns_304(self, client, trainee_token, seed_task):
+        first = client.get(self.ENDPOINT, headers=auth_headers(trainee_token))
+        etag = first.headers["ETag"]
+        again = client.get(self.ENDPOINT, headers={**auth_headers(trainee_token), "If-None-Match": etag})
+        assert again.status_code == 304
+        assert again.headers["ETag"] == etag
+
+    def test_task_mutation_changes_etag(self, client, admin_token, seed_task):
+        etag = client.get(self.ENDPOINT, headers=auth_headers(admin_token)).headers["ETag"]
+        client.put(
+            "/api/v1/assessments/admin/sets/1/rename",
+            json={"set_name": "Orthographic Views"},
+            params={"assessment_type": seed_task.assessment_type},
+            headers=auth_headers(admin_token),
+        )
+        response = client.get(self.ENDPOINT, headers={**auth_headers(admin_token), "If-None-Match": etag})
+        assert response.status_code == 200
+        assert response.json()[0]["set_name"] == "Orthographic Views"
+
+    def test_trainee_only_sees_mapped_sets(self, client, db, trainee_token, trainee_user, employee_token, seed_task):
+        other_set = AssessmentTask(set_number=2, task_code="P1", title="Unit 2", order=0)
+        drawing = AssessmentTask(set_number=7, task_code="P1", title="2D Sheet", order=0, assessment_type="2D")
+        db.add_all([other_set, drawing])
+        db.commit()
+
+        def ids():
+            return {t["id"] for t in client.get(self.ENDPOINT, headers=auth_headers(trainee_token)).json()}
+
+        assert ids() == {seed_task.id, other_set.id, drawing.id}
+
+        response = client.post(
+            f"/api/v1/assessments/trainer/trainees/{trainee_user.id}/set-mappings",
+            json=[{"trainee_id": trainee_user.id, "display_set_number": 1, "actual_set_number": 2}],
+            headers=auth_headers(employee_token),
+        )
+        assert response.status_code == 200
+        # 3D is limited to the mapped set; 2D has no mappings so stays fully visible
+        assert ids() == {other_set.id, drawing.id}
+
+
+class TestTaskCatalogLocking:
+
+    def test_table_is_read_outside_the_lock(self, db, seed_task, monkeypatch):
+        catalog = TaskCatalog()
+        started, release = threading.Event(), threading.Event()
+        load = catalog._load
+
+        def slow_load(session, version):
+            started.set()
+            release.wait(5)
+            return load(session, version)
+
+        monkeypatch.setattr(catalog, "_load", slow_load)
+        results = []
+        reader = threading.Thread(target=lambda: results.append(catalog.tasks_for(db, SimpleNamespace(id=1, role="admin"))))
+        reader.start()
+        assert started.wait(5)
+
+        # Other requests get the lock while the table is being read
+        assert catalog._lock.acquire(timeout=1)
+        catalog._lock.release()
+        catalog.invalidate()
+        release.set()
+        reader.join(5)
+
+        assert [t.id for t in results[0][1]] == [seed_task.id]  # served to the request that read it...
+        assert catalog._snapshot.version is None                # ...but not cached past the invalidate()
+
 
 # ══════════════════════════════════════════════════════════════════
 # GET /api/v1/assessments/my-submissions
@@ -146,6 +217,58 @@ class TestTrainerSubmissions:
         assert response.status_code == 200
         assert response.json() == []
 
+    def test_keyset_pages_walk_newest_first(self, client, db, admin_token, trainee_user, seed_task):
+        second_set = AssessmentTask(set_number=2, task_code="P1", title="Unit 2", order=0)
+        db.add(second_set)
+        db.flush()
+        same_time = datetime(2026, 5, 1, 9, 0)
+        submissions = [
+            AssessmentSubmission(user_id=trainee_user.id, task_id=(seed_task if n % 2 else second_set).id,
+                                 submission_file_path=f"uploads/{n}.dwg", status="pending",
+                                 submitted_at=same_time if n < 3 else datetime(2026, 5, n, 9, 0))
+            for n in range(7)
+        ]
+        db.add_all(submissions)
+        db.commit()
+        expected = [s.id for s in sorted(submissions, key=lambda s: (s.submitted_at, s.id), reverse=True)]
+
+        seen, cursor = [], None
+        while True:
+            params = {"limit": 3, **({"cursor": cursor} if cursor else {})}
+            page = client.get(self.ENDPOINT, params=params, headers=auth_headers(admin_token)).json()
+            seen += [item["id"] for item in page["items"]]
+            cursor = page["next_cursor"]
+            if not cursor:
+                break
+        assert seen == expected
+        assert page["items"][0]["username"] == trainee_user.username
+        assert "feedback" not in page["items"][0]
+
+        by_set = client.get(self.ENDPOINT, params={"limit": 50, "set_number": 2}, headers=auth_headers(admin_token))
+        assert {item["task_id"] for item in by_set.json()["items"]} == {second_set.id}
+
+    def test_trainee_filter_respects_assignment(self, client, employee_token, admin_user, trainer_mapping, seed_submission):
+        mine = client.get(self.ENDPOINT, params={"limit": 10, "trainee_id": seed_submission.user_id},
+                          headers=auth_headers(employee_token))
+        assert [item["id"] for item in mine.json()["items"]] == [seed_submission.id]
+        other = client.get(self.ENDPOINT, params={"limit": 10, "trainee_id": admin_user.id},
+                           headers=auth_headers(employee_token))
+        assert other.json() == {"items": [], "next_cursor": None}
+
+    def test_invalid_cursor_is_400(self, client, admin_token):
+        response = client.get(self.ENDPOINT, params={"cursor": "bogus"}, headers=auth_headers(admin_token))
+        assert response.status_code == 400
+
+    def test_opening_a_row_loads_feedback(self, client, employee_token, trainer_mapping, seed_submission):
+        response = client.get(f"{self.ENDPOINT}/{seed_submission.id}", headers=auth_headers(employee_token))
+        assert response.status_code == 200
+        assert response.json()["feedback"] == []
+        assert response.json()["task"]["id"] == seed_submission.task_id
+
+    def test_opening_unassigned_row_is_forbidden(self, client, employee_token, seed_submission):
+        response = client.get(f"{self.ENDPOINT}/{seed_submission.id}", headers=auth_headers(employee_token))
+        assert response.status_code == 403
+
 
 # ══════════════════════════════════════════════════════════════════
 # Admin-only: POST /api/v1/assessments/admin/assign
@@ -211,3 +334,77 @@ class TestDeleteSubmission:
             headers=auth_headers(trainee_token),
         )
         assert response.status_code == 404
+
+
+# ══════════════════════════════════════════════════════════════════
+# Submission files in the content-addressed store
+# ══════════════════════════════════════════════════════════════════
+
+class TestMasterUnitBlobs:
+    def test_deleted_and_replaced_masters_release_their_blobs(self, client, db, tmp_path, monkeypatch, admin_token):
+        monkeypatch.setenv("UPLOAD_DIR", str(tmp_path))
+
+        def create(set_number, code):
+            response = client.post(
+                "/api/v1/assessments/admin/tasks",
+                data={"set_number": set_number, "task_code": code, "title": f"Unit {code}"},
+                files={"file": (f"{code}.dwg", b"master bytes", "application/octet-stream")},
+                headers=auth_headers(admin_token),
+            )
+            assert response.status_code == 200, response.text
+            return response.json()
+
+        def ref_counts():
+            db.expire_all()
+            return sorted(blob.ref_count for blob in db.query(FileBlob))
+
+        first, second, _ = create(3, "A1"), create(3, "A2"), create(4, "A1")
+        assert ref_counts() == [3]
+
+        client.put(
+            f"/api/v1/assessments/admin/tasks/{second['id']}",
+            data={"set_number": 3, "task_code": "A2", "title": "Unit A2"},
+            files={"file": ("A2.dwg", b"new master bytes", "application/octet-stream")},
+            headers=auth_headers(admin_token),
+        )
+        assert ref_counts() == [1, 2]
+
+        client.delete(f"/api/v1/assessments/admin/tasks/{first['id']}", headers=auth_headers(admin_token))
+        client.post("/api/v1/assessments/admin/tasks/bulk-delete", json={"task_ids": [second["id"]]}, headers=auth_headers(admin_token))
+        assert ref_counts() == [0, 1]
+
+        client.delete("/api/v1/assessments/admin/sets/4", headers=auth_headers(admin_token))
+        assert ref_counts() == [0, 0]
+
+
+class TestSubmissionBlobs:
+    def test_identical_resubmissions_share_a_blob_until_deleted(
+        self, client, db, tmp_path, monkeypatch, trainee_token, admin_token, seed_task
+    ):
+        monkeypatch.setenv("UPLOAD_DIR", str(tmp_path))
+        other = AssessmentTask(set_number=1, task_code="B", title="Unit 1B", order=1)
+        db.add(other)
+        db.commit()
+
+        ids = []
+        for task_id, name in ((seed_task.id, "front.dwg"), (other.id, "front_copy.dwg")):
+            response = client.post(
+                f"/api/v1/assessments/submit/{task_id}",
+                files={"file": (name, b"same drawing bytes", "application/octet-stream")},
+                headers=auth_headers(trainee_token),
+            )
+            assert response.status_code == 200
+            ids.append(response.json()["id"])
+
+        blob = db.query(FileBlob).one()
+        assert blob.ref_count == 2
+        download = client.get(f"/api/v1/assessments/submissions/{ids[0]}/download", headers=auth_headers(admin_token))
+        assert download.content == b"same drawing bytes"
+        assert "front.dwg" in download.headers["content-disposition"]
+
+        response = client.delete(f"/api/v1/assessments/submissions/{ids[0]}/permanent", headers=auth_headers(trainee_token))
+        assert response.status_code == 200
+        db.expire_all()
+        assert db.query(FileBlob).one().ref_count == 1
+        download = client.get(f"/api/v1/assessments/submissions/{ids[1]}/download", headers=auth_headers(admin_token))
+        assert download.content == b"same drawing bytes"
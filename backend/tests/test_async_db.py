@@ -0,0 +1,110 @@
+"""
+test_async_db.py — WebSocket heartbeats keep flowing while an async handler writes.
+
+A SQL function that sleeps stands in for a slow write (a locked SQLite file, a
+congested NAS link). The ticker pushes a heartbeat through notification_manager
+every 10 ms, the same way the real WebSocket endpoints do; the largest gap
+between two heartbeats is the time the event loop was blocked.
+"""
+
+import asyncio
+import time
+
+import pytest
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from sqlalchemy.orm import sessionmaker
+
+from backend.database import Base
+from backend.models import SystemLog
+from backend.websocket_manager import notification_manager
+
+SLOW_WRITE_SECONDS = 0.3
+HEARTBEAT_INTERVAL = 0.01
+USER_ID = 4242
+
+
+def _slow(seconds):
+    time.sleep(seconds)
+    return "slow write"
+
+
+def _register_slow(dbapi_connection, _connection_record):
+    dbapi_connection.create_function("slow", 1, _slow)
+
+
+class _FakeWebSocket:
+    def __init__(self):
+        self.sent_at = []
+
+    async def send_text(self, message):
+        self.sent_at.append(time.perf_counter())
+
+
+async def _heartbeats(stop):
+    while not stop.is_set():
+        await notification_manager.send_personal_message({"event": "HEARTBEAT"}, USER_ID)
+        await asyncio.sleep(HEARTBEAT_INTERVAL)
+
+
+async def _max_heartbeat_gap(write):
+    """Run write() alongside the heartbeat ticker; return the longest pause between heartbeats."""
+    socket = _FakeWebSocket()
+    notification_manager.active_connections[USER_ID] = [socket]
+    stop = asyncio.Event()
+    ticker = asyncio.create_task(_heartbeats(stop))
+    try:
+        await asyncio.sleep(HEARTBEAT_INTERVAL * 3)
+        await write()
+        await asyncio.sleep(HEARTBEAT_INTERVAL * 3)
+    finally:
+        stop.set()
+        await ticker
+        notification_manager.active_connections.pop(USER_ID, None)
+    return max(b - a for a, b in zip(socket.sent_at, socket.sent_at[1:]))
+
+
+@pytest.fixture()
+def db_path(tmp_path):
+    path = tmp_path / "latency.db"
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(bind=engine)
+    engine.dispose()
+    return path
+
+
+async def test_async_session_write_does_not_delay_heartbeats(db_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{db_path}")
+    event.listen(engine.sync_engine, "connect", _register_slow)
+    Session = async_sessionmaker(engine, expire_on_commit=False)
+
+    async def write():
+        async with Session() as db:
+            message = await db.scalar(text("SELECT slow(:s)"), {"s": SLOW_WRITE_SECONDS})
+            db.add(SystemLog(level="INFO", message=message, context="TEST"))
+            await db.commit()
+
+    try:
+        gap = await _max_heartbeat_gap(write)
+    finally:
+        await engine.dispose()
+    assert gap < SLOW_WRITE_SECONDS / 2
+
+
+async def test_sync_session_write_blocks_heartbeats(db_path):
+    # The baseline the async layer replaces: a sync Session inside an async def handler
+    engine = create_engine(f"sqlite:///{db_path}")
+    event.listen(engine, "connect", _register_slow)
+    Session = sessionmaker(bind=engine)
+
+    async def write():
+        with Session() as db:
+            message = db.scalar(text("SELECT slow(:s)"), {"s": SLOW_WRITE_SECONDS})
+            db.add(SystemLog(level="INFO", message=message, context="TEST"))
+            db.commit()
+
+    try:
+        gap = await _max_heartbeat_gap(write)
+    finally:
+        engine.dispose()
+    assert gap >= SLOW_WRITE_SECONDS
@@ -272,6 +272,20 @@ class TestSubmitQuiz:
         scores = [p["score"] for p in progress_response.json() if p["lesson_id"] == seed_quiz.slug]
         assert scores[0] == 90.0
 
+    def test_sqlite_submissions_go_through_the_write_queue(self, client, db, trainee_token, seed_quiz):
+        from backend.models import QuestionAttempt
+        from backend.write_queue import write_queue
+        committed = write_queue.jobs_committed
+
+        response = client.post(self.ENDPOINT, headers=auth_headers(trainee_token), json={
+            "course_id": "2D_Drawing", "lesson_id": seed_quiz.slug, "score": 85.0,
+            "answers": [{"question_id": 1, "chosen_option": 0, "is_correct": True, "seconds_spent": 4}],
+        })
+
+        assert response.status_code == 200
+        assert write_queue.jobs_committed == committed + 1
+        assert db.query(QuestionAttempt).count() == 1
+
     def test_submit_quiz_unauthenticated(self, client, seed_quiz):
         response = client.post(self.ENDPOINT, json={
             "course_id": "2D_Drawing", "lesson_id": seed_quiz.slug, "score": 80.0,
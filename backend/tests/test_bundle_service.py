@@ -0,0 +1,145 @@
+"""
+test_bundle_service.py — Tests for the per-set master unit bundles.
+"""
+
+import io
+import os
+import zipfile
+
+import pytest
+from fastapi import UploadFile
+
+from backend.models import AssessmentTask, TraineeSetMapping
+from backend.services.bundle_service import bundle_cache, bundles_root
+from backend.services.storage_service import store_blob, link_blob
+from .conftest import auth_headers
+
+ENDPOINT = "/api/v1/assessments/sets/4/bundle"
+UNIT = "Units & Tasks/4th Set/2655RCGR"
+
+
+@pytest.fixture()
+def unit_set(db, tmp_path, monkeypatch):
+    """Set 4 laid out like the NAS: an assembly with its Parts folder."""
+    monkeypatch.setenv("UPLOAD_DIR", str(tmp_path))
+    bundle_cache.clear()
+    files = {
+        "2655RCGR.dwg": b"assembly",
+        "Parts/FH26130N01.dwg": b"part one",
+        "Parts/FH26130N02.dwg": b"part two",
+    }
+    for name, data in files.items():
+        path = tmp_path / UNIT / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(data)
+    db.add_all([
+        AssessmentTask(set_number=4, task_code="A1", title="Master Assembly: 2655RCGR", unit_name="2655RCGR",
+                       is_assembly=True, assessment_type="3D", master_file_path=f"{UNIT}/2655RCGR.dwg"),
+        AssessmentTask(set_number=4, task_code="P1", title="FH26130N01", unit_name="2655RCGR",
+                       assessment_type="3D", master_file_path=f"{UNIT}/Parts/FH26130N01.dwg"),
+        AssessmentTask(set_number=4, task_code="P2", title="FH26130N02", unit_name="2655RCGR",
+                       assessment_type="3D", master_file_path=f"{UNIT}/Parts/FH26130N02.dwg"),
+    ])
+    db.commit()
+    yield files
+    bundle_cache.clear()
+
+
+def _members(content: bytes) -> dict:
+    with zipfile.ZipFile(io.BytesIO(content)) as archive:
+        return {name: archive.read(name) for name in archive.namelist()}
+
+
+class TestSetBundle:
+
+    def test_one_archive_with_assembly_and_parts(self, client, trainee_token, unit_set):
+        response = client.get(ENDPOINT, headers=auth_headers(trainee_token))
+
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/zip"
+        assert response.headers["accept-ranges"] == "bytes"
+        assert _members(response.content) == unit_set
+
+    def test_built_once_and_resumable(self, client, trainee_token, unit_set):
+        first = client.get(ENDPOINT, headers=auth_headers(trainee_token))
+        built = os.listdir(bundles_root())
+
+        again = client.get(ENDPOINT, headers={**auth_headers(trainee_token), "If-None-Match": first.headers["etag"]})
+        tail = client.get(ENDPOINT, headers={**auth_headers(trainee_token), "Range": "bytes=10-", "If-Range": first.headers["etag"]})
+
+        assert again.status_code == 304
+        assert tail.status_code == 206
+        assert tail.content == first.content[10:]
+        assert os.listdir(bundles_root()) == built
+
+    def test_task_file_upload_rebuilds(self, client, db, admin_token, trainee_token, unit_set):
+        before = client.get(ENDPOINT, headers=auth_headers(trainee_token)).headers["etag"]
+        assembly = db.query(AssessmentTask).filter(AssessmentTask.task_code == "A1").first()
+
+        client.post(
+            f"/api/v1/assessments/admin/tasks/{assembly.id}/files",
+            data={"path": "Parts"},
+            files={"file": ("FH26130N03.dwg", b"part three", "application/octet-stream")},
+            headers=auth_headers(admin_token),
+        )
+        response = client.get(ENDPOINT, headers=auth_headers(trainee_token))
+
+        assert response.headers["etag"] != before
+        assert _members(response.content)["Parts/FH26130N03.dwg"] == b"part three"
+        assert len(os.listdir(bundles_root())) == 1  # the superseded bundle is gone
+
+    def test_unchanged_content_keeps_its_key(self, client, trainee_token, unit_set):
+        before = client.get(ENDPOINT, headers=auth_headers(trainee_token)).headers["etag"]
+        bundle_cache.invalidate(4)
+
+        assert client.get(ENDPOINT, headers=auth_headers(trainee_token)).headers["etag"] == before
+
+    async def test_blob_store_master(self, client, db, trainee_token, unit_set, tmp_path):
+        path = str(tmp_path / "master_units" / "set4" / "A2_extra.dwg")
+        link_blob(db, path, await store_blob(UploadFile(file=io.BytesIO(b"from the store"), filename="A2_extra.dwg")))
+        db.add(AssessmentTask(set_number=4, task_code="A2", title="Extra", assessment_type="3D", master_file_path=path))
+        db.commit()
+
+        members = _members(client.get(ENDPOINT, headers=auth_headers(trainee_token)).content)
+
+        assert b"from the store" in members.values()
+        assert len(members) == 4
+
+    def test_unassigned_set_forbidden(self, client, db, trainee_user, trainee_token, unit_set):
+        db.add(TraineeSetMapping(trainee_id=trainee_user.id, trainer_id=trainee_user.id,
+                                 display_set_number=1, actual_set_number=1, assessment_type="3D"))
+        db.commit()
+        assert client.get(ENDPOINT, headers=auth_headers(trainee_token)).status_code == 403
+
+    def test_empty_set_is_404(self, client, trainee_token, unit_set):
+        assert client.get("/api/v1/assessments/sets/9/bundle", headers=auth_headers(trainee_token)).status_code == 404
+
+    async def test_mixed_set_in_master_units(self, client, db, trainee_token, unit_set, tmp_path):
+        set_dir = tmp_path / "master_units" / "set1"
+        masters = {
+            "A1_unit3d.dwg": ("3D", b"3d assembly"),
+            "A2_drawing2d.dwg": ("2D", b"2d drawing"),
+        }
+        for code_name, (assessment_type, data) in masters.items():
+            path = str(set_dir / code_name)
+            link_blob(db, path, await store_blob(UploadFile(file=io.BytesIO(data), filename=code_name)))
+            db.add(AssessmentTask(set_number=1, task_code=code_name.split("_")[0], title=code_name,
+                                  assessment_type=assessment_type, master_file_path=path))
+        extracted = set_dir / "A3_unit2d"  # a zip master of the other type, extracted in place
+        (extracted / "Parts").mkdir(parents=True)
+        (extracted / "unit2d.dwg").write_bytes(b"2d unit")
+        (extracted / "Parts" / "p.dwg").write_bytes(b"2d part")
+        db.add(AssessmentTask(set_number=1, task_code="A3", title="Unit 2D", assessment_type="2D",
+                              master_file_path=str(extracted)))
+        db.commit()
+        url = "/api/v1/assessments/sets/1/bundle"
+
+        first = client.get(url, headers=auth_headers(trainee_token))
+        (set_dir / f"A4_upload.dwg.{'0' * 8}.part").write_bytes(b"half an upload")
+        bundle_cache.invalidate(1)
+        again = client.get(url, headers=auth_headers(trainee_token))
+        drawings = _members(client.get(url, params={"assessment_type": "2D"}, headers=auth_headers(trainee_token)).content)
+
+        assert _members(first.content) == {"A1_unit3d.dwg": b"3d assembly"}
+        assert again.headers["etag"] == first.headers["etag"]
+        assert sorted(drawings.values()) == [b"2d drawing", b"2d part", b"2d unit"]
@@ -0,0 +1,124 @@
+"""
+test_change_journal.py — Tests for the SQLite fallback change journal and its replay.
+
+The journal normally only records writes to the local sqlite_engine while MySQL is
+configured; journal_enabled is patched so the in-memory test engine counts as the
+fallback. A second in-memory SQLite database stands in for MySQL during replay.
+"""
+
+import json
+import pytest
+from sqlalchemy import create_engine, select
+
+from backend import change_journal, http_cache, sync_worker
+from backend.database import Base
+from backend.models import ChangeJournal, Course, Notification, User
+
+
+@pytest.fixture()
+def journaling(monkeypatch):
+    monkeypatch.setattr(change_journal, "journal_enabled", lambda bind: True)
+
+
+def _entries(db):
+    return db.query(ChangeJournal).order_by(ChangeJournal.id).all()
+
+
+def _make_user(db, username="journal_user"):
+    user = User(username=username, email=f"{username}@test.kmti", hashed_password="x", role="trainee")
+    db.add(user)
+    db.commit()
+    return user
+
+
+class TestJournalCapture:
+
+    def test_no_entries_when_journal_disabled(self, db):
+        _make_user(db)
+        assert _entries(db) == []
+
+    def test_flush_insert_and_update_are_journaled(self, db, journaling):
+        user = _make_user(db)
+        user.full_name = "Renamed"
+        db.commit()
+
+        entries = _entries(db)
+        assert [(e.table_name, e.operation) for e in entries] == [("users", "insert"), ("users", "update")]
+        assert json.loads(entries[0].row_pk) == {"id": user.id}
+        assert json.loads(entries[1].row_data)["full_name"] == "Renamed"
+
+    def test_bulk_update_journals_each_affected_row(self, db, journaling, admin_user, trainee_user):
+        for user in (admin_user, trainee_user):
+            db.add(Notification(recipient_id=user.id, message="m", is_read=False))
+        db.commit()
+
+        db.query(Notification).filter(Notification.is_read == False).update({"is_read": True})
+        db.commit()
+
+        updates = [e for e in _entries(db) if e.table_name == "notifications" and e.operation == "update"]
+        assert len(updates) == 2
+        assert all(json.loads(e.row_data)["is_read"] for e in updates)
+
+    def test_bulk_delete_journals_primary_keys(self, db, journaling):
+        user = _make_user(db)
+        db.query(User).filter(User.id == user.id).delete()
+        db.commit()
+
+        deletes = [e for e in _entries(db) if e.operation == "delete"]
+        assert len(deletes) == 1
+        assert json.loads(deletes[0].row_pk) == {"id": user.id}
+        assert deletes[0].row_data is None
+
+
+class TestJournalReplay:
+
+    @pytest.fixture()
+    def target(self):
+        """Stand-in for MySQL: a separate database with the same schema."""
+        engine = create_engine("sqlite://")
+        Base.metadata.create_all(bind=engine)
+        with engine.connect() as conn:
+            yield conn
+        engine.dispose()
+
+    def test_replay_applies_entries_in_order(self, db, journaling, target):
+        user = _make_user(db)
+        user.full_name = "Latest"
+        db.commit()
+        doomed = _make_user(db, "doomed_user")
+        db.delete(doomed)
+        db.commit()
+
+        entry_ids = sync_worker.replay_change_journal(db.connection(), target)
+        target.commit()
+
+        assert len(entry_ids) == len(_entries(db))
+        names = {row.username: row.full_name for row in target.execute(select(User.__table__))}
+        assert names == {"journal_user": "Latest"}
+
+    def test_mark_applied_hides_entries_from_next_replay(self, db, journaling, target):
+        _make_user(db)
+        entry_ids = sync_worker.replay_change_journal(db.connection(), target)
+        sync_worker.mark_journal_applied(db.connection(), entry_ids)
+
+        assert sync_worker.replay_change_journal(db.connection(), target) == []
+
+    def test_replay_skips_username_owned_by_other_id(self, db, journaling, target):
+        target.execute(User.__table__.insert().values(
+            id=999, username="journal_user", email="other@test.kmti", hashed_password="x", role="admin"
+        ))
+        _make_user(db)
+
+        sync_worker.replay_change_journal(db.connection(), target)
+        rows = target.execute(select(User.__table__.c.id)).scalars().all()
+        assert rows == [999]
+
+    def test_replayed_courses_invalidate_cached_reads(self, db, journaling, target):
+        db.add(Course(title="Bonus Drills", course_type="Bonus"))
+        db.commit()
+        before = http_cache.version("courses"), http_cache.version("quizzes")
+
+        with db.get_bind().connect() as conn:
+            assert sync_worker.sync_change_journal(conn, target) == 1
+
+        assert (http_cache.version("courses"), http_cache.version("quizzes")) == (before[0] + 1, before[1])
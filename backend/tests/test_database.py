@@ -0,0 +1,129 @@
+"""
+test_database.py — Unit tests for the MySQL/SQLite failover layer in database.py.
+
+MySQL is never contacted: probes are replaced with stubs so the DB_MODE
+state machine can be exercised deterministically.
+"""
+
+import pytest
+
+from backend import database
+
+
+@pytest.fixture()
+def breaker():
+    return database.MySQLCircuitBreaker(failure_threshold=3, reset_timeout=0)
+
+
+@pytest.fixture()
+def monitor(monkeypatch, breaker):
+    """A fresh health monitor with DB_MODE restored after each test."""
+    original_mode = database.DB_MODE
+    yield database.DBHealthMonitor(interval=0.01, breaker=breaker)
+    monkeypatch.setattr(database, "DB_MODE", original_mode)
+
+
+class TestHealthMonitorStateMachine:
+
+    def test_consecutive_failed_probes_trip_to_sqlite(self, monitor, monkeypatch):
+        monkeypatch.setattr(database, "DB_MODE", "mysql")
+        monkeypatch.setattr(monitor, "probe", lambda: False)
+        monitor.check_now()
+        monitor.check_now()
+        assert database.get_db_mode() == "mysql"
+        monitor.check_now()
+        assert database.get_db_mode() == "sqlite"
+
+    def test_successful_probe_recovers_through_recovering(self, monitor, monkeypatch):
+        seen_modes = []
+        monkeypatch.setattr(database, "DB_MODE", "sqlite")
+        monkeypatch.setattr(monitor, "probe", lambda: True)
+        monkeypatch.setattr(
+            database.Base.metadata, "create_all",
+            lambda bind=None: seen_modes.append(database.get_db_mode())
+        )
+        monitor.check_now()
+        assert seen_modes == ["recovering"]
+        assert database.get_db_mode() == "mysql"
+
+    def test_healthy_probe_keeps_mysql(self, monitor, monkeypatch):
+        monkeypatch.setattr(database, "DB_MODE", "mysql")
+        monkeypatch.setattr(monitor, "probe", lambda: True)
+        monitor.check_now()
+        assert database.get_db_mode() == "mysql"
+
+    def test_failed_recovery_probe_reopens(self, monitor, monkeypatch):
+        monkeypatch.setattr(database, "DB_MODE", "sqlite")
+        monkeypatch.setattr(monitor, "probe", lambda: False)
+        monitor.check_now()
+        assert database.get_db_mode() == "sqlite"
+
+
+class TestCircuitBreaker:
+
+    @pytest.fixture(autouse=True)
+    def restore_mode(self, monkeypatch):
+        monkeypatch.setattr(database, "DB_MODE", "mysql")
+
+    def test_request_failures_trip_after_threshold(self, breaker):
+        assert breaker.record_failure(Exception("connection reset")) is False
+        assert breaker.record_failure(Exception("connection reset")) is False
+        assert breaker.record_failure(Exception("connection reset")) is True
+        assert breaker.state == "open"
+        assert database.get_db_mode() == "sqlite"
+
+    def test_success_resets_failure_count(self, breaker):
+        breaker.record_failure()
+        breaker.record_failure()
+        breaker.record_success()
+        breaker.record_failure()
+        assert breaker.state == "closed"
+
+    def test_only_one_half_open_probe(self, breaker, monkeypatch):
+        monkeypatch.setattr(database, "DB_MODE", "sqlite")
+        assert breaker.try_half_open() is True
+        assert breaker.try_half_open() is False
+        assert breaker.state == "half_open"
+
+    def test_reset_timeout_delays_half_open(self, monkeypatch):
+        breaker = database.MySQLCircuitBreaker(failure_threshold=1, reset_timeout=60)
+        breaker.record_failure()
+        assert breaker.try_half_open() is False
+
+    def test_listeners_see_every_transition(self, breaker, monkeypatch):
+        seen = []
+        monkeypatch.setattr(database, "_db_mode_listeners", [lambda old, new: seen.append((old, new))])
+        for _ in range(3):
+            breaker.record_failure()
+        breaker.try_half_open()
+        breaker.close()
+        assert seen == [("mysql", "sqlite"), ("sqlite", "recovering"), ("recovering", "mysql")]
+
+
+class TestGetDb:
+
+    def test_get_db_does_not_ping_mysql(self, monitor, monkeypatch):
+        """Handing out a session must not trigger a health probe."""
+        probes = []
+        monkeypatch.setattr(database, "DB_MODE", "sqlite")
+        monkeypatch.setattr(database.health_monitor, "probe", lambda: probes.append(1) or True)
+        gen = database.get_db()
+        db = next(gen)
+        assert db.get_bind() is database.sqlite_engine
+        gen.close()
+        assert probes == []
+
+    def test_completed_mysql_request_resets_failures(self, breaker, monkeypatch):
+        monkeypatch.setattr(database, "DB_MODE", "mysql")
+        monkeypatch.setattr(database, "MySQLSessionLocal", database.SQLiteSessionLocal)
+        monkeypatch.setattr(database, "circuit_breaker", breaker)
+        breaker.record_failure(Exception("dropped"))
+        breaker.record_failure(Exception("dropped"))
+
+        gen = database.get_db()
+        next(gen)
+        next(gen, None)  # the request finished without an error
+
+        assert breaker.consecutive_failures == 0
+        breaker.record_failure(Exception("dropped"))
+        assert database.get_db_mode() == "mysql"  # the count started over
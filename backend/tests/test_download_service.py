@@ -0,0 +1,104 @@
+"""
+test_download_service.py — Tests for conditional and ranged file downloads.
+"""
+
+import io
+import os
+import hashlib
+from email.utils import formatdate
+
+import pytest
+from fastapi import UploadFile
+
+from backend.models import AssessmentTask, AssessmentSubmission
+from backend.services.download_service import FileDownload
+from backend.services.storage_service import store_blob, link_blob
+from .conftest import auth_headers
+
+DRAWING = bytes(range(256)) * 40
+
+
+@pytest.fixture()
+async def blob_task(db, tmp_path, monkeypatch) -> AssessmentTask:
+    monkeypatch.setenv("UPLOAD_DIR", str(tmp_path))
+    path = str(tmp_path / "master_units" / "set1" / "A1_FH26130N01.dwg")
+    link_blob(db, path, await store_blob(UploadFile(file=io.BytesIO(DRAWING), filename="A1_FH26130N01.dwg")))
+    task = AssessmentTask(set_number=1, task_code="A1", title="Unit 1A", master_file_path=path)
+    db.add(task)
+    db.commit()
+    db.refresh(task)
+    return task
+
+
+class TestMasterDownload:
+
+    def test_blob_etag_is_its_content_hash(self, client, trainee_token, blob_task):
+        response = client.get(f"/api/v1/assessments/tasks/{blob_task.id}/download", headers=auth_headers(trainee_token))
+
+        assert response.status_code == 200
+        assert response.content == DRAWING
+        assert response.headers["etag"] == f'"{hashlib.sha256(DRAWING).hexdigest()}"'
+        assert response.headers["accept-ranges"] == "bytes"
+        assert "A1_FH26130N01.dwg" in response.headers["content-disposition"]
+
+    def test_unchanged_file_is_304(self, client, trainee_token, blob_task):
+        url = f"/api/v1/assessments/tasks/{blob_task.id}/download"
+        etag = client.get(url, headers=auth_headers(trainee_token)).headers["etag"]
+
+        response = client.get(url, headers={**auth_headers(trainee_token), "If-None-Match": etag})
+
+        assert response.status_code == 304
+        assert response.content == b""
+        assert response.headers["etag"] == etag
+
+    def test_interrupted_download_resumes_with_range(self, client, trainee_token, blob_task):
+        url = f"/api/v1/assessments/tasks/{blob_task.id}/download"
+        etag = client.get(url, headers=auth_headers(trainee_token)).headers["etag"]
+
+        response = client.get(url, headers={**auth_headers(trainee_token), "Range": "bytes=4000-", "If-Range": etag})
+
+        assert response.status_code == 206
+        assert response.content == DRAWING[4000:]
+        assert response.headers["content-range"] == f"bytes 4000-{len(DRAWING) - 1}/{len(DRAWING)}"
+
+    def test_304_still_requires_auth(self, client, trainee_token, blob_task):
+        url = f"/api/v1/assessments/tasks/{blob_task.id}/download"
+        etag = client.get(url, headers=auth_headers(trainee_token)).headers["etag"]
+        assert client.get(url, headers={"If-None-Match": etag}).status_code in (401, 403)
+
+
+class TestLegacyFileDownload:
+
+    def test_if_modified_since_on_a_plain_file(self, client, db, tmp_path, admin_token, trainee_user):
+        path = tmp_path / "feedback.dwg"
+        path.write_bytes(b"legacy upload")
+        submission = AssessmentSubmission(user_id=trainee_user.id, task_id=1, submission_file_path=str(path))
+        db.add(submission)
+        db.commit()
+        url = f"/api/v1/assessments/submissions/{submission.id}/download"
+
+        first = client.get(url, headers=auth_headers(admin_token))
+        later = client.get(url, headers={**auth_headers(admin_token), "If-Modified-Since": first.headers["last-modified"]})
+        older = formatdate(os.path.getmtime(path) - 3600, usegmt=True)
+        stale = client.get(url, headers={**auth_headers(admin_token), "If-Modified-Since": older})
+
+        assert first.content == b"legacy upload" and first.headers["last-modified"]
+        assert later.status_code == 304
+        assert stale.status_code == 200
+
+
+class TestPathSend:
+
+    async def test_server_pathsend_extension_gets_the_path(self, tmp_path):
+        path = tmp_path / "part.dwg"
+        path.write_bytes(DRAWING)
+        sent = []
+
+        async def send(message):
+            sent.append(message)
+
+        scope = {"type": "http", "method": "GET", "headers": [], "extensions": {"http.response.pathsend": {}}}
+        await FileDownload(str(path), stat_result=os.stat(path))(scope, None, send)
+
+        assert sent[0]["status"] == 200
+        assert sent[1] == {"type": "http.response.pathsend", "path": str(path)}
@@ -0,0 +1,85 @@
+"""
+test_http_cache.py — Tests for the ETag / conditional-GET layer on curriculum and quiz reads.
+"""
+
+from backend.http_cache import BodyLRU
+from backend.models import Lesson
+from .conftest import auth_headers
+
+
+QUIZ = "/api/v1/quizzes/test-keyway-lesson"
+
+
+def conditional(token, etag):
+    return {**auth_headers(token), "If-None-Match": etag}
+
+
+class TestQuizConditionalGet:
+
+    def test_matching_etag_is_304_without_queries(self, client, trainee_token, seed_quiz):
+        first = client.get(QUIZ, headers=auth_headers(trainee_token))
+        assert first.status_code == 200
+        assert len(first.json()["questions"]) == 2
+
+        again = client.get(QUIZ, headers=conditional(trainee_token, first.headers["ETag"]))
+        assert again.status_code == 304
+        assert again.content == b""
+        assert again.headers["ETag"] == first.headers["ETag"]
+        assert again.headers["X-DB-Queries"] == "0"
+
+    def test_cached_body_is_identical(self, client, trainee_token, seed_quiz):
+        first = client.get(QUIZ, headers=auth_headers(trainee_token))
+        second = client.get(QUIZ, headers=auth_headers(trainee_token))
+        assert second.content == first.content
+        assert second.headers["ETag"] == first.headers["ETag"]
+
+    def test_admin_edit_invalidates(self, client, trainee_token, admin_token, seed_quiz):
+        etag = client.get(QUIZ, headers=auth_headers(trainee_token)).headers["ETag"]
+        response = client.put(f"/api/v1/admin/quizzes/{seed_quiz.id}", json={"title": "Keyways, revised"},
+                              headers=auth_headers(admin_token))
+        assert response.status_code == 200
+
+        response = client.get(QUIZ, headers=conditional(trainee_token, etag))
+        assert response.status_code == 200
+        assert response.json()["title"] == "Keyways, revised"
+        assert response.headers["ETag"] != etag
+
+    def test_invalid_token_never_gets_304(self, client, trainee_token, seed_quiz):
+        etag = client.get(QUIZ, headers=auth_headers(trainee_token)).headers["ETag"]
+        response = client.get(QUIZ, headers=conditional("not-a-jwt", etag))
+        assert response.status_code == 401
+
+    def test_missing_quiz_is_still_404(self, client, trainee_token):
+        response = client.get("/api/v1/quizzes/no-such-quiz", headers=auth_headers(trainee_token))
+        assert response.status_code == 404
+
+
+class TestLessonContentConditionalGet:
+
+    def test_new_content_changes_etag(self, client, db, admin_token):
+        lesson = Lesson(course_id=1, slug="keyways", title="Keyways", order=1)
+        db.add(lesson)
+        db.commit()
+        url = "/api/v1/courses/lesson/keyways/content"
+        first = client.get(url)
+        assert first.json() == []
+
+        client.post(f"/api/v1/admin/curriculum/lessons/{lesson.id}/content",
+                    json={"lesson_id": lesson.id, "content_type": "text", "data": "Cut the keyway", "order": 1},
+                    headers=auth_headers(admin_token))
+        response = client.get(url, headers={"If-None-Match": first.headers["ETag"]})
+        assert response.status_code == 200
+        assert [c["data"] for c in response.json()] == ["Cut the keyway"]
+
+
+class TestBodyLRU:
+
+    def test_evicts_least_recently_used(self):
+        lru = BodyLRU(max_entries=2)
+        lru.put("a", b"1")
+        lru.put("b", b"2")
+        assert lru.get("a") == b"1"
+        lru.put("c", b"3")
+        assert lru.get("b") is None
+        assert lru.get("a") == b"1"
+        assert len(lru) == 2
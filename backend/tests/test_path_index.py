@@ -0,0 +1,141 @@
+"""
+test_path_index.py — Tests for the upload root index behind resolve_master_path().
+"""
+
+import os
+
+import pytest
+
+from backend.models import AssessmentTask
+from backend.services import path_index as path_index_module
+from backend.services.path_index import PathIndex
+from backend.services.storage_service import resolve_master_path
+from .conftest import auth_headers
+
+
+@pytest.fixture()
+def index(tmp_path, monkeypatch) -> PathIndex:
+    monkeypatch.setenv("UPLOAD_DIR", str(tmp_path))
+    unit = tmp_path / "Unts & Tasks" / "4th Set" / "2655RCGR"
+    (unit / "Parts").mkdir(parents=True)
+    (unit / "2655RCGR.dwg").write_bytes(b"assembly")
+    fresh = PathIndex()
+    monkeypatch.setattr(path_index_module, "path_index", fresh)
+    monkeypatch.setattr("backend.services.storage_service.path_index", fresh)
+    monkeypatch.setattr("backend.routers.assessments.path_index", fresh)
+    return fresh
+
+
+class TestPathIndex:
+
+    def test_spelling_fallback_resolves_from_memory(self, index, tmp_path):
+        expected = str(tmp_path / "Unts & Tasks" / "4th Set" / "2655RCGR" / "2655RCGR.dwg")
+
+        assert resolve_master_path("uploads/Units & Tasks/4th Set/2655RCGR/2655RCGR.dwg") == expected
+        scans = index.stats()["scans"]
+        assert resolve_master_path("Units & Tasks/4th Set/2655RCGR/2655RCGR.dwg") == expected
+
+        stats = index.stats()
+        assert stats["scans"] == scans
+        assert stats["hits"] >= 1
+        assert stats["negative_hits"] == 1  # the misspelt candidate wasn't looked up again
+
+    def test_entries_carry_size_and_kind(self, index, tmp_path):
+        unit = tmp_path / "Unts & Tasks" / "4th Set" / "2655RCGR"
+
+        assert index.lookup(str(unit / "2655RCGR.dwg")).size == len(b"assembly")
+        assert index.lookup(str(unit / "Parts")).is_dir
+        assert index.lookup(str(unit / "2655RCGR.dwg" / "child")) is None
+
+    def test_external_change_seen_after_revalidation(self, index, tmp_path, monkeypatch):
+        monkeypatch.setattr(path_index_module, "PATH_INDEX_NEGATIVE_TTL", 0)
+        part = tmp_path / "Unts & Tasks" / "4th Set" / "2655RCGR" / "Parts" / "FH26130N01.dwg"
+        assert not index.exists(str(part))
+
+        part.write_bytes(b"part")
+        os.utime(part.parent, ns=(0, 10**18))  # coarse NAS mtimes: make the change visible
+        monkeypatch.setattr(path_index_module, "PATH_INDEX_REVALIDATE", 0)
+
+        assert index.exists(str(part))
+
+    def test_invalidate_after_own_write(self, index, tmp_path):
+        part = tmp_path / "Unts & Tasks" / "4th Set" / "2655RCGR" / "Parts" / "FH26130N02.dwg"
+        assert not index.exists(str(part))
+
+        part.write_bytes(b"part")
+        index.invalidate(str(part))
+
+        assert index.exists(str(part))
+
+    def test_paths_outside_root_bypass(self, index, tmp_path_factory):
+        outside = tmp_path_factory.mktemp("elsewhere") / "x.dwg"
+        outside.write_bytes(b"x")
+
+        assert resolve_master_path(str(outside)) == str(outside)
+        assert index.stats()["bypassed"] == 1
+
+    def test_stats_endpoint(self, client, admin_token, trainee_token):
+        assert client.get("/api/v1/admin/path-index", headers=auth_headers(trainee_token)).status_code == 403
+        response = client.get("/api/v1/admin/path-index", headers=auth_headers(admin_token))
+        assert response.status_code == 200
+        assert {"hits", "misses", "scans", "negative_hits"} <= set(response.json())
+
+
+@pytest.fixture()
+def unit_task(db, index, tmp_path):
+    unit = tmp_path / "Unts & Tasks" / "4th Set" / "2655RCGR"
+    (unit / "Parts" / "FH26130N01.dwg").write_bytes(b"part one")
+    (unit / "Parts" / "Old").mkdir()
+    task = AssessmentTask(set_number=4, task_code="A1", title="Master Assembly: 2655RCGR", is_assembly=True,
+                          master_file_path="Units & Tasks/4th Set/2655RCGR/2655RCGR.dwg")
+    db.add(task)
+    db.commit()
+    return task
+
+
+class TestTaskFileTree:
+
+    def url(self, task):
+        return f"/api/v1/assessments/admin/tasks/{task.id}/files"
+
+    def test_full_tree_with_sizes(self, client, admin_token, unit_task):
+        tree = client.get(self.url(unit_task), headers=auth_headers(admin_token)).json()["tree"]
+
+        assert [n["name"] for n in tree] == ["Parts", "2655RCGR.dwg"]
+        parts, assembly = tree
+        assert parts["child_count"] == 2
+        assert [n["path"] for n in parts["children"]] == ["Parts/Old", "Parts/FH26130N01.dwg"]
+        assert assembly["size"] == len(b"assembly")
+        assert "modified_at" in assembly
+
+    def test_lazy_returns_one_level(self, client, admin_token, unit_task):
+        root = client.get(self.url(unit_task), params={"lazy": True}, headers=auth_headers(admin_token)).json()
+        parts = client.get(self.url(unit_task), params={"lazy": True, "path": "Parts"}, headers=auth_headers(admin_token)).json()
+
+        assert root["path"] == ""
+        assert "children" not in root["tree"][0]
+        assert root["tree"][0]["child_count"] == 2
+        assert parts["path"] == "Parts"
+        assert [n["name"] for n in parts["tree"]] == ["Old", "FH26130N01.dwg"]
+
+    def test_served_from_the_index(self, client, admin_token, unit_task, index):
+        client.get(self.url(unit_task), headers=auth_headers(admin_token))
+        scans = index.stats()["scans"]
+
+        client.get(self.url(unit_task), headers=auth_headers(admin_token))
+
+        assert index.stats()["scans"] == scans
+
+    def test_upload_shows_up_immediately(self, client, admin_token, unit_task):
+        client.get(self.url(unit_task), params={"lazy": True, "path": "Parts"}, headers=auth_headers(admin_token))
+        client.post(self.url(unit_task), data={"path": "Parts"},
+                    files={"file": ("FH26130N02.dwg", b"part two", "application/octet-stream")},
+                    headers=auth_headers(admin_token))
+
+        parts = client.get(self.url(unit_task), params={"lazy": True, "path": "Parts"}, headers=auth_headers(admin_token)).json()
+
+        assert "FH26130N02.dwg" in [n["name"] for n in parts["tree"]]
+
+    def test_traversal_rejected(self, client, admin_token, unit_task):
+        response = client.get(self.url(unit_task), params={"lazy": True, "path": "../../.."}, headers=auth_headers(admin_token))
+        assert response.status_code == 400
@@ -0,0 +1,80 @@
+"""
+test_query_counter.py — Tests for the per-request query counter and N+1 detector.
+"""
+
+import logging
+
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+
+from backend.models import User
+from backend.query_counter import QueryCounterMiddleware, count_queries, statement_shape
+from .conftest import auth_headers, assert_query_budget
+
+
+class TestStatementShape:
+
+    def test_collapses_whitespace_and_in_lists(self):
+        a = statement_shape("SELECT * FROM users\n  WHERE id IN (?, ?, ?)")
+        b = statement_shape("SELECT * FROM users WHERE id IN (?)")
+        assert a == b == "SELECT * FROM users WHERE id IN (?)"
+
+
+class TestCountQueries:
+
+    def test_counts_and_flags_repeated_shapes(self, db, trainee_user, admin_user):
+        user_ids = (trainee_user.id, admin_user.id) * 5
+        with count_queries() as stats:
+            for user_id in user_ids:
+                db.query(User).filter(User.id == user_id).first()
+        assert stats.count == 10
+        assert stats.time_ms > 0
+        assert [times for _, times in stats.repeated(threshold=10)] == [10]
+        assert stats.repeated(threshold=11) == []
+
+    def test_nothing_recorded_outside_a_scope(self, db, trainee_user):
+        with count_queries() as stats:
+            pass
+        db.query(User).count()
+        assert stats.count == 0
+
+
+class TestMiddleware:
+
+    def test_headers_report_request_queries(self, client, trainee_user, trainee_token):
+        response = client.get("/api/v1/auth/me", headers=auth_headers(trainee_token))
+        assert response.status_code == 200
+        assert int(response.headers["X-DB-Queries"]) >= 1
+        assert float(response.headers["X-DB-Time-ms"]) >= 0
+        assert_query_budget(response, 3)
+
+    def test_n_plus_one_is_logged(self, db, trainee_user, caplog, monkeypatch):
+        from backend import query_counter
+        monkeypatch.setattr(query_counter, "N_PLUS_ONE_THRESHOLD", 3)
+        user_id = trainee_user.id
+        with count_queries() as stats:
+            for _ in range(3):
+                db.query(User).filter(User.id == user_id).first()
+
+        with caplog.at_level(logging.WARNING, logger="backend.query_counter"):
+            query_counter.report("GET /api/v1/example", stats)
+        assert "possible N+1, same statement ran 3x" in caplog.text
+
+    def test_streamed_body_queries_are_logged(self, db, trainee_user, caplog, monkeypatch):
+        from backend import query_counter
+        monkeypatch.setattr(query_counter, "N_PLUS_ONE_THRESHOLD", 3)
+        app = FastAPI()
+        app.add_middleware(QueryCounterMiddleware)
+
+        @app.get("/stream")
+        def stream():
+            async def rows():
+                for _ in range(3):
+                    yield f"{db.query(User).count()}\n"
+            return StreamingResponse(rows())
+
+        with caplog.at_level(logging.WARNING, logger="backend.query_counter"):
+            response = TestClient(app).get("/stream")
+        assert response.headers["X-DB-Queries"] == "0"
+        assert "GET /stream: possible N+1, same statement ran 3x" in caplog.text
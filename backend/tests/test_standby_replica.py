@@ -0,0 +1,201 @@
+"""
+test_standby_replica.py — Tests for the MySQL -> SQLite warm-standby replicator.
+
+Two separate in-memory SQLite databases play the MySQL primary and the local
+standby file; the checksum shortcut is MySQL-only, so every cycle does a full
+compare of the reference tables here.
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine, event, select
+from sqlalchemy.orm import Session
+
+from backend import standby_replica, sync_worker
+from backend.database import Base
+from backend.models import AssessmentTask, BlobRef, Course, FileBlob, Quiz, SyncWatermark, User
+from backend.services.storage_service import blob_path, resolve_blob
+
+
+def _database():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    return engine
+
+
+@pytest.fixture()
+def primary():
+    engine = _database()
+    with engine.connect() as conn:
+        yield conn
+    engine.dispose()
+
+
+@pytest.fixture()
+def standby():
+    engine = _database()
+    with engine.connect() as conn:
+        yield conn
+    engine.dispose()
+
+
+@pytest.fixture()
+def replicator():
+    return standby_replica.StandbyReplicator(tables=["users", "courses", "quizzes"], lag_target=10)
+
+
+def _insert(conn, model, **values):
+    conn.execute(model.__table__.insert().values(**values))
+    conn.commit()
+
+
+class TestReplicateOnce:
+
+    def test_copies_inserts_updates_and_deletes(self, replicator, primary, standby):
+        _insert(primary, User, id=1, username="alice", email="a@test.kmti", hashed_password="x", role="trainee")
+        _insert(primary, Course, id=1, title="2D Drawing")
+        replicator.replicate_once(primary, standby)
+
+        primary.execute(User.__table__.update().values(role="employee"))
+        primary.execute(Course.__table__.delete())
+        primary.commit()
+        replicator.replicate_once(primary, standby)
+
+        assert standby.execute(select(User.__table__.c.role)).scalars().all() == ["employee"]
+        assert standby.execute(select(Course.__table__)).all() == []
+
+    def test_username_held_by_another_local_id_does_not_abort_the_snapshot(self, replicator, primary, standby):
+        _insert(primary, User, id=1, username="alice", email="a@test.kmti", hashed_password="x", role="trainee")
+        _insert(primary, Course, id=1, title="2D Drawing")
+        _insert(standby, User, id=2, username="alice", email="old@test.kmti", hashed_password="x", role="trainee")
+
+        replicator.replicate_once(primary, standby)
+        assert standby.execute(select(Course.__table__.c.id)).scalars().all() == [1]
+        assert standby.execute(select(User.__table__.c.id)).scalars().all() == []
+
+        replicator.replicate_once(primary, standby)
+        assert standby.execute(select(User.__table__.c.id, User.__table__.c.username)).all() == [(1, "alice")]
+
+    def test_timestamped_tables_pull_only_rows_past_watermark(self, replicator, primary, standby):
+        now = datetime.utcnow()
+        _insert(primary, Quiz, id=1, slug="q1", title="Oldest", updated_at=now - timedelta(hours=2))
+        _insert(primary, Quiz, id=2, slug="q2", title="Old", updated_at=now - timedelta(hours=1))
+        assert replicator.replicate_once(primary, standby) == 2
+
+        _insert(primary, Quiz, id=3, slug="q3", title="New", updated_at=now)
+        # The boundary row (id 2) is re-read, the older one is not
+        assert replicator.replicate_once(primary, standby) == 2
+        assert standby.execute(select(Quiz.__table__.c.id)).scalars().all() == [1, 2, 3]
+
+    def test_forward_watermark_moves_past_replicated_rows(self, replicator, primary, standby):
+        _insert(primary, User, id=7, username="bob", email="b@test.kmti", hashed_password="x", role="trainee")
+        replicator.replicate_once(primary, standby)
+
+        watermark = standby.execute(
+            select(SyncWatermark.__table__).where(SyncWatermark.__table__.c.table_name == "users")
+        ).first()
+        assert watermark.last_id == 7
+
+    def test_lag_is_measured_from_last_snapshot(self, replicator, primary, standby):
+        assert replicator.status()["lag_seconds"] is None
+        replicator.replicate_once(primary, standby)
+        status = replicator.status()
+        assert status["lag_seconds"] < 10
+        assert status["within_target"] is True
+
+
+class TestForwardDrained:
+
+    def test_waits_for_pending_journal_entries(self, replicator, standby, monkeypatch):
+        monkeypatch.setattr(standby_replica, "pending_journal_counts", lambda conn: {"users": 1})
+        assert replicator.forward_drained(standby) is False
+
+    def test_waits_for_forward_cycle_after_mode_switch(self, replicator, standby, monkeypatch):
+        monkeypatch.setattr(standby_replica, "pending_journal_counts", lambda conn: {})
+        scheduler = sync_worker.SyncScheduler(tables=["users"])
+        monkeypatch.setattr(standby_replica, "sync_scheduler", scheduler)
+        assert replicator.forward_drained(standby) is False
+
+        monkeypatch.setattr(scheduler, "sync_table", lambda name: 0)
+        scheduler.run_cycle()
+        monkeypatch.setattr(standby_replica, "get_db_mode_changed_at", lambda: scheduler.last_cycle_started - 1)
+        assert replicator.forward_drained(standby) is True
+
+
+class TestFallbackWrites:
+
+    def test_course_created_in_fallback_reaches_mysql_and_survives(self, replicator, primary, standby):
+        _insert(primary, Course, id=1, title="2D Drawing")
+        replicator.replicate_once(primary, standby)
+
+        # MySQL drops; an admin adds a course to the local fallback DB
+        _insert(standby, Course, id=2, title="Bonus Drills")
+
+        # MySQL recovers: the forward sync runs before the replicator is allowed to
+        with primary.begin():
+            sync_worker.sync_table_data("courses", standby, primary)
+        standby.commit()
+        replicator.replicate_once(primary, standby)
+
+        assert primary.execute(select(Course.__table__.c.id)).scalars().all() == [1, 2]
+        assert standby.execute(select(Course.__table__.c.id)).scalars().all() == [1, 2]
+
+    def test_deletes_skip_tables_the_forward_sync_does_not_cover(self, replicator, primary, standby, monkeypatch):
+        monkeypatch.setattr(standby_replica, "TABLES_TO_SYNC", ["users", "quizzes"])
+        _insert(standby, Course, id=5, title="Local only")
+
+        replicator.replicate_once(primary, standby)
+
+        assert standby.execute(select(Course.__table__.c.id)).scalars().all() == [5]
+
+    def test_curriculum_tables_are_forward_synced(self):
+        assert set(standby_replica.REPLICA_TABLES) <= set(sync_worker.TABLES_TO_SYNC)
+
+
+class TestDeleteScan:
+
+    def test_skipped_while_row_counts_match(self, replicator, primary, standby):
+        now = datetime.utcnow()
+        _insert(primary, Quiz, id=1, slug="q1", title="Quiz", updated_at=now)
+        replicator.replicate_once(primary, standby)
+
+        statements = []
+        listener = lambda conn, cursor, statement, *args: statements.append(statement)
+        event.listen(primary.engine, "before_cursor_execute", listener)
+        try:
+            replicator.replicate_once(primary, standby)
+        finally:
+            event.remove(primary.engine, "before_cursor_execute", listener)
+
+        assert not [s for s in statements if s.startswith("SELECT quizzes.id \nFROM quizzes") and "WHERE" not in s]
+
+    def test_deletes_still_found_when_counts_differ(self, replicator, primary, standby):
+        now = datetime.utcnow()
+        _insert(primary, Quiz, id=1, slug="q1", title="Kept", updated_at=now)
+        _insert(primary, Quiz, id=2, slug="q2", title="Dropped", updated_at=now)
+        replicator.replicate_once(primary, standby)
+
+        primary.execute(Quiz.__table__.delete().where(Quiz.__table__.c.id == 2))
+        primary.commit()
+        replicator.replicate_once(primary, standby)
+
+        assert standby.execute(select(Quiz.__table__.c.id)).scalars().all() == [1]
+
+
+class TestBlobStoreOnStandby:
+
+    def test_single_file_master_resolves_after_failover(self, primary, standby, tmp_path, monkeypatch):
+        monkeypatch.setenv("UPLOAD_DIR", str(tmp_path))
+        sha256 = "ab" * 32
+        master = str(tmp_path / "master_units" / "set1" / "A1_FH26130N01.dwg")
+        _insert(primary, FileBlob, sha256=sha256, size=10, ref_count=1, updated_at=datetime.utcnow())
+        _insert(primary, BlobRef, path=master, sha256=sha256, updated_at=datetime.utcnow())
+        _insert(primary, AssessmentTask, id=1, set_number=1, title="Unit 1A", master_file_path=master)
+
+        standby_replica.StandbyReplicator(lag_target=10).replicate_once(primary, standby)
+
+        # MySQL is gone; the download route resolves against the standby alone
+        with Session(bind=standby) as db:
+            task = db.get(AssessmentTask, 1)
+            assert resolve_blob(db, task.master_file_path) == blob_path(sha256)
@@ -0,0 +1,171 @@
+"""
+test_storage_service.py — Tests for the streaming upload sink and the content-addressed store.
+"""
+
+import io
+import os
+import time
+import hashlib
+
+import pytest
+from fastapi import HTTPException, UploadFile
+
+from backend.services import storage_service
+from backend.models import FileBlob, BlobRef, AssessmentSubmission
+from backend.services.storage_service import (
+    save_upload, upload_limit, store_blob, link_blob, resolve_blob, release_unreferenced, collect_garbage, blob_path,
+)
+from .test_async_db import _max_heartbeat_gap
+
+
+def _upload(data: bytes, filename: str = "FH26130N01.dwg") -> UploadFile:
+    return UploadFile(file=io.BytesIO(data), filename=filename)
+
+
+class TestSaveUpload:
+
+    async def test_streams_hash_and_size(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(storage_service, "UPLOAD_CHUNK_SIZE", 1000)
+        data = bytes(range(256)) * 20
+        dest = tmp_path / "submissions" / "7" / "FH26130N01.dwg"
+
+        stored = await save_upload(_upload(data), str(dest))
+
+        assert stored.size == len(data)
+        assert stored.sha256 == hashlib.sha256(data).hexdigest()
+        assert dest.read_bytes() == data
+        assert [p.name for p in dest.parent.iterdir()] == ["FH26130N01.dwg"]
+
+    async def test_oversized_upload_keeps_previous_file(self, tmp_path):
+        dest = tmp_path / "FH26130N01.dwg"
+        dest.write_bytes(b"previous attempt")
+
+        with pytest.raises(HTTPException) as exc:
+            await save_upload(_upload(b"x" * 2048), str(dest), max_bytes=1024)
+
+        assert exc.value.status_code == 413
+        assert dest.read_bytes() == b"previous attempt"
+        assert [p.name for p in tmp_path.iterdir()] == ["FH26130N01.dwg"]
+
+    def test_limits_are_per_extension(self):
+        assert upload_limit("assembly.zip") > upload_limit("part.dwg") > upload_limit("checkback.xlsx")
+        assert upload_limit("notes.txt") == int(storage_service.UPLOAD_MAX_MB * 1024 * 1024)
+
+    async def test_slow_disk_does_not_delay_heartbeats(self, tmp_path, monkeypatch):
+        # Each chunk write stalls like a congested NAS link; the loop must keep ticking
+        write_chunk = storage_service._write_chunk
+
+        def slow_write(buffer, hasher, chunk):
+            time.sleep(0.05)
+            write_chunk(buffer, hasher, chunk)
+
+        monkeypatch.setattr(storage_service, "_write_chunk", slow_write)
+        monkeypatch.setattr(storage_service, "UPLOAD_CHUNK_SIZE", 1024)
+
+        async def upload():
+            await save_upload(_upload(b"z" * 6 * 1024, "assembly.zip"), str(tmp_path / "assembly.zip"))
+
+        gap = await _max_heartbeat_gap(upload)
+        assert gap < 0.15
+        assert (tmp_path / "assembly.zip").stat().st_size == 6 * 1024
+
+
+@pytest.fixture()
+def cas_dir(tmp_path, monkeypatch):
+    monkeypatch.setenv("UPLOAD_DIR", str(tmp_path))
+    return tmp_path / "cas"
+
+
+class TestBlobStore:
+
+    async def test_identical_uploads_share_one_blob(self, db, cas_dir):
+        data = b"FH26130N01 drawing" * 100
+        first = await store_blob(_upload(data, "A1_FH26130N01.dwg"))
+        second = await store_blob(_upload(data, "A10_FH26130N01.dwg"))
+        link_blob(db, "master_units/set1/A1_FH26130N01.dwg", first)
+        link_blob(db, "master_units/set1/A10_FH26130N01.dwg", second)
+        db.commit()
+
+        assert first == second
+        assert first.sha256 == hashlib.sha256(data).hexdigest()
+        assert db.get(FileBlob, first.sha256).ref_count == 2
+        assert [p.name for p in cas_dir.rglob("*") if p.is_file()] == [first.sha256]
+        assert resolve_blob(db, "master_units/set1/A10_FH26130N01.dwg") == first.path
+        assert resolve_blob(db, "master_units/set1/unknown.dwg") is None
+
+    async def test_relinking_a_path_moves_its_reference(self, db, cas_dir):
+        old = await store_blob(_upload(b"first attempt"))
+        new = await store_blob(_upload(b"second attempt"))
+        link_blob(db, "submissions/7/part.dwg", old)
+        link_blob(db, "submissions/7/part.dwg", new)
+        db.commit()
+
+        assert db.get(FileBlob, old.sha256).ref_count == 0
+        assert db.get(FileBlob, new.sha256).ref_count == 1
+        assert resolve_blob(db, "submissions/7/part.dwg") == new.path
+
+    async def test_release_skips_paths_still_recorded(self, db, cas_dir, trainee_user):
+        stored = await store_blob(_upload(b"shared"))
+        for path in ("submissions/kept.dwg", "submissions/gone.dwg"):
+            link_blob(db, path, stored)
+        db.add(AssessmentSubmission(user_id=trainee_user.id, task_id=1, submission_file_path="submissions/kept.dwg"))
+        db.commit()
+
+        release_unreferenced(db, ["submissions/kept.dwg", "submissions/gone.dwg", None])
+        db.commit()
+
+        assert db.get(FileBlob, stored.sha256).ref_count == 1
+        assert db.get(BlobRef, "submissions/gone.dwg") is None
+        assert db.get(BlobRef, "submissions/kept.dwg") is not None
+
+    async def test_gc_reclaims_released_blobs_after_grace(self, db, cas_dir):
+        kept = await store_blob(_upload(b"still referenced"))
+        dropped = await store_blob(_upload(b"released"))
+        link_blob(db, "kept.dwg", kept)
+        link_blob(db, "dropped.dwg", dropped)
+        db.commit()
+        release_unreferenced(db, ["dropped.dwg"])
+        db.commit()
+        stray = cas_dir / "tmp" / "abandoned"
+        stray.write_bytes(b"half an upload")
+
+        assert collect_garbage(db, grace_seconds=3600) == {"blobs": 0, "orphans": 0, "bytes": 0}
+
+        past = time.time() - 7200
+        for path in (blob_path(dropped.sha256), str(stray)):
+            os.utime(path, (past, past))
+        stats = collect_garbage(db, grace_seconds=0)
+
+        assert stats["blobs"] == 1 and stats["orphans"] == 1
+        assert db.get(FileBlob, dropped.sha256) is None
+        assert not os.path.exists(dropped.path) and not stray.exists()
+        assert os.path.exists(kept.path)
+
+    async def test_gc_counts_references_not_a_synced_counter(self, db, cas_dir):
+        stored = await store_blob(_upload(b"shared master unit"))
+        for path in ("master_units/set1/A1_x.dwg", "master_units/set1/A10_x.dwg", "submissions/3/x.dwg"):
+            link_blob(db, path, stored)
+        db.commit()
+        # A fallback copy of the row, synced over MySQL's, knew of only one reference
+        db.query(FileBlob).update({FileBlob.ref_count: 1})
+        db.commit()
+
+        release_unreferenced(db, ["submissions/3/x.dwg"])
+        db.commit()
+        past = time.time() - 7200
+        os.utime(blob_path(stored.sha256), (past, past))
+
+        assert collect_garbage(db, grace_seconds=0)["blobs"] == 0
+        assert os.path.exists(stored.path)
+        assert db.get(FileBlob, stored.sha256).ref_count == 2
+
+    async def test_gc_refuses_to_run_on_the_fallback(self, db, cas_dir, monkeypatch):
+        monkeypatch.setattr(storage_service, "USE_MYSQL", True)
+        stray = cas_dir / "aa" / ("a" * 64)
+        stray.parent.mkdir(parents=True)
+        stray.write_bytes(b"blob MySQL knows about")
+        past = time.time() - 7200
+        os.utime(stray, (past, past))
+
+        assert collect_garbage(db, grace_seconds=0) == {"blobs": 0, "orphans": 0, "bytes": 0}
+        assert stray.exists()
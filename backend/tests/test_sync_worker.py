@@ -0,0 +1,137 @@
+"""
+test_sync_worker.py — Tests for the watermarked SQLite -> MySQL table sync.
+
+A second in-memory SQLite database stands in for MySQL; the upserts are
+dialect-aware, so the same code paths run against it.
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine, select
+
+from backend import sync_worker
+from backend.database import Base
+from backend.models import Quiz, SyncWatermark, User
+
+
+@pytest.fixture()
+def target():
+    """Stand-in for MySQL: a separate database with the same schema."""
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    with engine.connect() as conn:
+        yield conn
+    engine.dispose()
+
+
+def _add_users(db, *usernames):
+    users = [User(username=u, email=f"{u}@test.kmti", hashed_password="x", role="trainee") for u in usernames]
+    db.add_all(users)
+    db.commit()
+    return users
+
+
+def _target_ids(target, model):
+    return sorted(target.execute(select(model.__table__.c.id)).scalars())
+
+
+class TestWatermarkedSync:
+
+    def test_first_pass_copies_all_rows_and_records_watermark(self, db, target):
+        users = _add_users(db, "sync_a", "sync_b")
+        sync_worker.sync_table_data("users", db.connection(), target)
+
+        assert _target_ids(target, User) == sorted(u.id for u in users)
+        watermark = db.get(SyncWatermark, "users")
+        assert watermark.last_id == max(u.id for u in users)
+
+    def test_next_pass_only_reads_rows_past_watermark(self, db, target):
+        first, = _add_users(db, "sync_a")
+        sync_worker.sync_table_data("users", db.connection(), target)
+        # If the first row were re-read it would be re-inserted here
+        target.execute(User.__table__.delete())
+
+        second, = _add_users(db, "sync_b")
+        sync_worker.sync_table_data("users", db.connection(), target)
+
+        assert _target_ids(target, User) == [second.id]
+
+    def test_rows_are_sent_in_chunks(self, db, target, monkeypatch):
+        monkeypatch.setattr(sync_worker, "SYNC_CHUNK_SIZE", 2)
+        executed = []
+        original_execute = target.execute
+        monkeypatch.setattr(target, "execute", lambda stmt, params=None: executed.append(params) or original_execute(stmt, params))
+
+        _add_users(db, "sync_a", "sync_b", "sync_c")
+        sync_worker.sync_table_data("users", db.connection(), target)
+
+        batches = [p for p in executed if isinstance(p, list)]
+        assert [len(b) for b in batches] == [2, 1]
+
+    def test_newer_mysql_row_is_not_overwritten(self, db, target):
+        now = datetime.utcnow()
+        quiz = Quiz(slug="sync-quiz", title="Local", updated_at=now - timedelta(hours=1))
+        db.add(quiz)
+        db.commit()
+        target.execute(Quiz.__table__.insert().values(id=quiz.id, slug="sync-quiz", title="Remote", updated_at=now))
+
+        sync_worker.sync_table_data("quizzes", db.connection(), target)
+
+        title = target.execute(select(Quiz.__table__.c.title)).scalar_one()
+        assert title == "Remote"
+
+
+class TestSyncScheduler:
+
+    @pytest.fixture()
+    def scheduler(self):
+        return sync_worker.SyncScheduler(tables=["users", "notifications", "system_settings"], max_workers=2)
+
+    def test_dependencies_follow_foreign_keys(self, scheduler):
+        assert scheduler.dependencies == {"users": set(), "notifications": {"users"}, "system_settings": set()}
+
+    def test_parents_sync_before_children(self, scheduler, monkeypatch):
+        order = []
+        monkeypatch.setattr(scheduler, "sync_table", lambda name: order.append(name) or 1)
+
+        results = scheduler.run_cycle()
+
+        assert all(results.values())
+        assert order.index("users") < order.index("notifications")
+        assert scheduler.snapshot()["tables"]["notifications"]["rows_synced"] == 1
+
+    def test_failed_table_backs_off_and_blocks_only_dependents(self, scheduler, monkeypatch):
+        calls = []
+
+        def fake_sync(name):
+            calls.append(name)
+            if name == "users":
+                raise RuntimeError("lock wait timeout")
+            return 0
+
+        monkeypatch.setattr(scheduler, "sync_table", fake_sync)
+        scheduler.run_cycle()
+        tables = scheduler.snapshot()["tables"]
+
+        assert tables["users"]["status"] == "error"
+        assert tables["users"]["next_attempt_at"] is not None
+        assert tables["notifications"]["status"] == "blocked"
+        assert tables["system_settings"]["status"] == "ok"
+
+        calls.clear()
+        scheduler.run_cycle()
+        assert calls == ["system_settings"]
+        assert scheduler.snapshot()["tables"]["users"]["status"] == "backoff"
+
+
+def test_sync_status_endpoint(client, admin_token, monkeypatch):
+    from backend.routers.admin import system
+    monkeypatch.setattr(system, "pending_journal_counts", lambda conn: {"users": 3})
+
+    res = client.get("/api/v1/admin/sync-status", headers={"Authorization": f"Bearer {admin_token}"})
+
+    assert res.status_code == 200
+    body = res.json()
+    assert body["tables"]["users"]["pending_journal_entries"] == 3
+    assert "lag_seconds" in body["tables"]["notifications"]
@@ -0,0 +1,372 @@
+"""
+test_trainee_progress.py — Trainee progress read paths: the trainer dashboard, the
+admin Performance Directory and the progress export, plus the
+trainee_progress_snapshot table behind them.
+
+Checks the per-trainee numbers on a small hand-built dataset, that query counts do
+not grow with the number of trainees, that write paths keep the snapshot current
+and that a rebuild reports drift.
+"""
+
+import csv
+import io
+import json
+from datetime import datetime, timedelta
+
+import pytest
+
+from backend.auth.security import hash_password
+from backend.models import (
+    User, Quiz, QuizScore, AssessmentTask, AssessmentSubmission, TraineeSetMapping,
+    TrainerTraineeMapping, UserActivity, UserProgress, TraineeProgressSnapshot,
+)
+from backend.services.progress_service import ensure_trainee_snapshots, rebuild_trainee_snapshots
+from .conftest import auth_headers, assert_query_budget
+
+ENDPOINT = "/api/v1/assessments/trainer/trainees-progress"
+T0 = datetime(2026, 1, 5, 9, 0, 0)
+
+
+def _trainee(db, name):
+    user = User(username=name, email=f"{name}@test.kmti", hashed_password=hash_password("x"), role="trainee", full_name=name.title())
+    db.add(user)
+    db.flush()
+    return user
+
+
+def _submit(db, user, task, status, assessment_type="3D", minutes=0):
+    db.add(AssessmentSubmission(
+        user_id=user.id, task_id=task.id, status=status, assessment_type=assessment_type,
+        submission_file_path="uploads/x.dwg", submitted_at=T0 + timedelta(minutes=minutes),
+    ))
+
+
+@pytest.fixture()
+def progress_data(db, employee_user):
+    db.add_all([
+        Quiz(slug="q3d-1", title="3D 1", course_type="3D_Modeling"),
+        Quiz(slug="q3d-2", title="3D 2", course_type="3D_Modeling"),
+        Quiz(slug="q3d-3", title="3D 3", course_type="3D_Modeling"),
+        Quiz(slug="q2d-1", title="2D 1", course_type="2D_Drawing"),
+        Quiz(slug="q2d-2", title="2D 2", course_type="2D_Drawing"),
+    ])
+    set1 = AssessmentTask(set_number=1, title="Set 1 A", assessment_type="3D")
+    set1b = AssessmentTask(set_number=1, title="Set 1 B", assessment_type="3D")
+    set2 = AssessmentTask(set_number=2, title="Set 2 A", assessment_type="3D")
+    asm_2d = AssessmentTask(set_number=5, title="2D Assembly", assessment_type="2D", is_assembly=True)
+    asm_2d_b = AssessmentTask(set_number=6, title="2D Assembly B", assessment_type="2D", is_assembly=True)
+    db.add_all([set1, set1b, set2, asm_2d, asm_2d_b])
+    db.flush()
+
+    # alice: live activity, two 3D quizzes passed, set 1 done (twice), set 2 pending, one 2D assembly
+    alice = _trainee(db, "alice")
+    db.add_all([
+        QuizScore(user_id=alice.id, course_id="1", lesson_id="part-modeling", score=90.0, completed_at=T0),
+        QuizScore(user_id=alice.id, course_id="1", lesson_id="assembly", score=80.0, completed_at=T0),
+        QuizScore(user_id=alice.id, course_id="1", lesson_id="sketch", score=79.9, completed_at=T0),
+        QuizScore(user_id=alice.id, course_id="2", lesson_id="keyway", score=100.0, completed_at=T0),
+        TraineeSetMapping(trainee_id=alice.id, trainer_id=employee_user.id, display_set_number=1, actual_set_number=1),
+        TraineeSetMapping(trainee_id=alice.id, trainer_id=employee_user.id, display_set_number=2, actual_set_number=2),
+        UserActivity(user_id=alice.id, current_activity="Lesson: Fairing", last_updated=T0),
+    ])
+    _submit(db, alice, set1, "approved")
+    _submit(db, alice, set1b, "approved", assessment_type=None)
+    _submit(db, alice, set2, "pending")
+    _submit(db, alice, asm_2d, "approved", assessment_type="2D")
+    _submit(db, alice, asm_2d, "approved", assessment_type="2D")
+    _submit(db, alice, asm_2d_b, "rejected", assessment_type="2D")
+
+    # bob: latest thing he did was a quiz; set 2 mapped but only approved as 2D, so not complete
+    bob = _trainee(db, "bob")
+    db.add_all([
+        QuizScore(user_id=bob.id, course_id="2", lesson_id="title-block", score=85.0, completed_at=T0 + timedelta(hours=2)),
+        QuizScore(user_id=bob.id, course_id="2", lesson_id="bom", score=60.0, completed_at=None),
+        TraineeSetMapping(trainee_id=bob.id, trainer_id=employee_user.id, display_set_number=1, actual_set_number=2),
+        UserActivity(user_id=bob.id, current_activity=None),
+    ])
+    _submit(db, bob, set2, "approved", assessment_type="2D", minutes=30)
+    _submit(db, bob, set1, "rejected", minutes=60)
+
+    # carol: only a submission
+    carol = _trainee(db, "carol")
+    _submit(db, carol, set2, "pending", minutes=5)
+
+    # dave: nothing at all
+    dave = _trainee(db, "dave")
+
+    for trainee in (alice, bob, carol):
+        db.add(TrainerTraineeMapping(trainer_id=employee_user.id, trainee_id=trainee.id))
+    db.commit()
+    return {"alice": alice.id, "bob": bob.id, "carol": carol.id, "dave": dave.id}
+
+
+def _by_username(response):
+    assert response.status_code == 200
+    return {row["username"]: row for row in response.json()}
+
+
+class TestTraineesProgress:
+
+    def test_admin_sees_every_trainee(self, client, admin_token, progress_data):
+        rows = _by_username(client.get(ENDPOINT, headers=auth_headers(admin_token)))
+        assert set(rows) == {"alice", "bob", "carol", "dave"}
+
+        alice = rows["alice"]
+        assert alice["current_activity"] == "Lesson: Fairing"
+        assert alice["last_updated"] == T0.isoformat()
+        assert alice["is_online"] is False
+        assert alice["progress"] == {
+            "course_3d": {"completed": 2, "total": 3, "percentage": 66.7},
+            "course_2d": {"completed": 1, "total": 2, "percentage": 50.0},
+            "practical_3d": {"completed": 1, "total": 2, "percentage": 50.0},
+            "practical_2d": {"completed": 1, "total": 2, "percentage": 50.0},
+            "assessments": {"approved": 4, "pending": 1, "rejected": 1, "total_submitted": 6},
+        }
+
+        bob = rows["bob"]
+        assert bob["current_activity"] == "Course: Title Block"
+        assert bob["last_updated"] == (T0 + timedelta(hours=2)).isoformat()
+        assert bob["progress"]["course_2d"] == {"completed": 1, "total": 2, "percentage": 50.0}
+        assert bob["progress"]["practical_3d"] == {"completed": 0, "total": 1, "percentage": 0.0}
+        assert bob["progress"]["assessments"] == {"approved": 1, "pending": 0, "rejected": 1, "total_submitted": 2}
+
+        carol = rows["carol"]
+        assert carol["current_activity"] == "Practical: Set 2 A"
+        assert carol["last_updated"] == (T0 + timedelta(minutes=5)).isoformat()
+
+        dave = rows["dave"]
+        assert dave["current_activity"] == "Not started yet"
+        assert dave["last_updated"] is None
+        assert dave["progress"]["practical_3d"] == {"completed": 0, "total": 0, "percentage": 0.0}
+        assert dave["progress"]["assessments"]["total_submitted"] == 0
+
+    def test_trainer_sees_only_mapped_trainees(self, client, employee_token, progress_data):
+        rows = _by_username(client.get(ENDPOINT, headers=auth_headers(employee_token)))
+        assert set(rows) == {"alice", "bob", "carol"}
+
+    def test_trainee_is_forbidden(self, client, trainee_token):
+        assert client.get(ENDPOINT, headers=auth_headers(trainee_token)).status_code == 403
+
+    def test_query_count_does_not_grow_with_trainees(self, client, db, admin_token, progress_data):
+        baseline = client.get(ENDPOINT, headers=auth_headers(admin_token))
+        for i in range(20):
+            _trainee(db, f"extra_{i}")
+        db.commit()
+        grown = client.get(ENDPOINT, headers=auth_headers(admin_token))
+
+        assert len(grown.json()) == len(baseline.json()) + 20
+        assert grown.headers["X-DB-Queries"] == baseline.headers["X-DB-Queries"]
+        assert_query_budget(grown, 15)
+
+
+class TestProgressSnapshot:
+
+    def test_rebuild_populates_and_then_reports_no_drift(self, db, progress_data):
+        drift = rebuild_trainee_snapshots(db)
+        db.commit()
+        assert {user_id for user_id, *_ in drift} >= set(progress_data.values())
+
+        alice = db.get(TraineeProgressSnapshot, progress_data["alice"])
+        assert (alice.passed_3d, alice.passed_2d, alice.quizzes_taken) == (2, 1, 4)
+        assert (alice.completed_3d_sets, alice.assigned_sets, alice.completed_2d_sets) == (1, 2, 1)
+        assert rebuild_trainee_snapshots(db, check_only=True) == []
+
+    def test_check_only_reports_drift_without_fixing(self, db, progress_data):
+        rebuild_trainee_snapshots(db)
+        db.get(TraineeProgressSnapshot, progress_data["bob"]).submissions_rejected = 7
+        db.commit()
+
+        drift = rebuild_trainee_snapshots(db, check_only=True)
+        assert drift == [(progress_data["bob"], "submissions_rejected", 7, 1)]
+        assert db.get(TraineeProgressSnapshot, progress_data["bob"]).submissions_rejected == 7
+
+    def test_quiz_submission_updates_snapshot(self, client, db, trainee_user, trainee_token, seed_quiz):
+        response = client.post("/api/v1/auth/submit-quiz", headers=auth_headers(trainee_token), json={
+            "course_id": "2", "lesson_id": seed_quiz.slug, "score": 90.0,
+        })
+        assert response.status_code == 200
+
+        snapshot = db.get(TraineeProgressSnapshot, trainee_user.id)
+        assert (snapshot.passed_2d, snapshot.quizzes_taken, snapshot.mastery_index) == (1, 1, 90.0)
+        assert rebuild_trainee_snapshots(db, check_only=True) == []
+
+    def test_set_mapping_change_updates_snapshot(self, client, db, employee_token, progress_data):
+        response = client.post(
+            f"/api/v1/assessments/trainer/trainees/{progress_data['dave']}/set-mappings",
+            headers=auth_headers(employee_token),
+            json=[
+                {"trainee_id": progress_data["dave"], "display_set_number": n, "actual_set_number": n}
+                for n in (1, 2)
+            ],
+        )
+        assert response.status_code == 200
+
+        snapshot = db.get(TraineeProgressSnapshot, progress_data["dave"])
+        assert (snapshot.assigned_sets, snapshot.completed_3d_sets) == (2, 0)
+
+    def test_reopen_all_updates_snapshot(self, client, db, admin_token, progress_data):
+        rebuild_trainee_snapshots(db)
+        db.commit()
+        response = client.post(
+            "/api/v1/admin/reopen-all-assessments",
+            headers=auth_headers(admin_token),
+            params={"user_id": progress_data["alice"], "course_type": "3D_Modeling"},
+        )
+        assert response.status_code == 200
+
+        db.expire_all()
+        snapshot = db.get(TraineeProgressSnapshot, progress_data["alice"])
+        assert (snapshot.passed_3d, snapshot.passed_2d, snapshot.quizzes_taken) == (0, 1, 1)
+
+    def test_moving_tasks_out_of_a_set_updates_snapshot(self, client, db, admin_token, progress_data):
+        rebuild_trainee_snapshots(db)
+        db.commit()
+        set1_ids = [t.id for t in db.query(AssessmentTask).filter(AssessmentTask.set_number == 1)]
+        response = client.patch(
+            "/api/v1/assessments/admin/tasks/reorder",
+            headers=auth_headers(admin_token),
+            json=[{"id": task_id, "set_number": 3, "order": n} for n, task_id in enumerate(set1_ids)],
+        )
+        assert response.status_code == 200
+
+        db.expire_all()
+        assert db.get(TraineeProgressSnapshot, progress_data["alice"]).completed_3d_sets == 0
+        assert rebuild_trainee_snapshots(db, check_only=True) == []
+
+    def test_deleting_a_set_updates_snapshot(self, client, db, admin_token, progress_data):
+        rebuild_trainee_snapshots(db)
+        db.commit()
+        response = client.delete("/api/v1/assessments/admin/sets/1", headers=auth_headers(admin_token))
+        assert response.status_code == 200
+
+        db.expire_all()
+        assert db.get(TraineeProgressSnapshot, progress_data["alice"]).completed_3d_sets == 0
+        assert rebuild_trainee_snapshots(db, check_only=True) == []
+
+
+class TestPerformanceDirectory:
+    ENDPOINT = "/api/v1/admin/progress"
+
+    @pytest.fixture()
+    def directory_data(self, db, progress_data):
+        """What the startup backfill does for trainees that predate their snapshot rows."""
+        ensure_trainee_snapshots(db)
+        db.commit()
+        return progress_data
+
+    def _get(self, client, token, **params):
+        response = client.get(self.ENDPOINT, headers=auth_headers(token), params=params)
+        assert response.status_code == 200
+        return response.json()
+
+    def test_cursor_pages_cover_everyone_once(self, client, admin_token, directory_data):
+        seen, cursor = [], None
+        while True:
+            params = {"limit": 2, **({"cursor": cursor} if cursor else {})}
+            page = self._get(client, admin_token, **params)
+            assert len(page["items"]) <= 2
+            seen += [row["username"] for row in page["items"]]
+            cursor = page["next_cursor"]
+            if cursor is None:
+                break
+        # Employees are listed too, as before; admins are not
+        assert sorted(seen) == ["alice", "bob", "carol", "dave", "employee_test"]
+        assert seen == [row["username"] for row in self._get(client, admin_token)]
+
+    def test_sort_by_mastery_with_cursor(self, client, admin_token, directory_data):
+        first = self._get(client, admin_token, limit=1, sort="-mastery")
+        rest = self._get(client, admin_token, limit=10, sort="-mastery", cursor=first["next_cursor"])
+        ordered = [row["average_score"] for row in first["items"] + rest["items"]]
+        assert ordered == sorted(ordered, reverse=True)
+        assert first["items"][0]["username"] == "alice"
+        assert rest["next_cursor"] is None
+
+    def test_filters(self, client, admin_token, employee_user, directory_data):
+        def names(**params):
+            return sorted(row["username"] for row in self._get(client, admin_token, **params))
+
+        assert names(course="2D_Drawing") == ["alice", "bob"]
+        assert names(min_score=80) == ["alice"]
+        assert names(max_score=0) == ["carol", "dave", "employee_test"]
+        assert names(trainer_id=employee_user.id) == ["alice", "bob", "carol"]
+        assert names(inactive_since=(T0 + timedelta(hours=1)).isoformat()) == ["alice", "carol", "dave", "employee_test"]
+
+    def test_course_filter_limits_history(self, client, admin_token, directory_data):
+        rows = {row["username"]: row for row in self._get(client, admin_token, course="1")}
+        assert [q["lesson_id"] for q in rows["alice"]["quizzes_history"]] == ["part-modeling", "assembly", "sketch"]
+
+    def test_ndjson_stream(self, client, admin_token, directory_data):
+        response = client.get(self.ENDPOINT, headers=auth_headers(admin_token), params={"stream": "true", "sort": "mastery"})
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        rows = [json.loads(line) for line in response.text.splitlines()]
+        assert len(rows) == 5
+        assert [r["average_score"] for r in rows] == sorted(r["average_score"] for r in rows)
+
+    def test_reads_never_write_snapshots(self, client, db, admin_token, employee_user):
+        carol = _trainee(db, "carol")
+        db.add(QuizScore(user_id=carol.id, course_id="1", lesson_id="sketch", score=70.0, completed_at=T0))
+        db.commit()
+
+        rows = {row["username"]: row for row in self._get(client, admin_token)}
+
+        assert rows["carol"]["average_score"] == 70.0  # computed on the fly for the page
+        assert db.query(TraineeProgressSnapshot).count() == 0
+
+    def test_invalid_cursor_and_sort_rejected(self, client, admin_token):
+        assert client.get(self.ENDPOINT, headers=auth_headers(admin_token), params={"cursor": "nope"}).status_code == 400
+        assert client.get(self.ENDPOINT, headers=auth_headers(admin_token), params={"sort": "name"}).status_code == 400
+
+
+class TestProgressExport:
+    ENDPOINT = "/api/v1/admin/export/progress"
+
+    @pytest.fixture()
+    def export_data(self, db, progress_data):
+        db.add_all([
+            UserProgress(user_id=progress_data["alice"], course_id="1", progress_percentage=66.7, last_accessed=T0),
+            UserProgress(user_id=progress_data["alice"], course_id="2", progress_percentage=100.0, last_accessed=T0),
+            UserProgress(user_id=progress_data["bob"], course_id="2", progress_percentage=50.0, last_accessed=T0),
+        ])
+        db.commit()
+        return progress_data
+
+    def test_csv_rows_carry_best_score_per_course(self, client, admin_token, export_data):
+        response = client.get(self.ENDPOINT, headers=auth_headers(admin_token))
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/csv")
+        rows = list(csv.reader(io.StringIO(response.text)))
+        assert rows[0][0] == "Trainee Username"
+        assert [(r[0], r[2], r[3], r[5]) for r in rows[1:]] == [
+            ("alice", "1", "In Progress", "90.0%"),
+            ("alice", "2", "Completed", "100.0%"),
+            ("bob", "2", "In Progress", "85.0%"),
+        ]
+
+    def test_query_count_is_constant(self, client, db, admin_token, export_data):
+        baseline = client.get(self.ENDPOINT, headers=auth_headers(admin_token))
+        extra = _trainee(db, "erin")
+        db.add_all([UserProgress(user_id=extra.id, course_id=c, progress_percentage=10.0) for c in ("1", "2")])
+        db.commit()
+        grown = client.get(self.ENDPOINT, headers=auth_headers(admin_token))
+        assert len(grown.text.splitlines()) == len(baseline.text.splitlines()) + 2
+        assert grown.headers["X-DB-Queries"] == baseline.headers["X-DB-Queries"]
+
+    def test_xlsx_export(self, client, admin_token, export_data):
+        from openpyxl import load_workbook
+
+        response = client.get(self.ENDPOINT, headers=auth_headers(admin_token), params={"format": "xlsx"})
+        assert response.status_code == 200
+        assert "filename=trainee_granular_report_all.xlsx" in response.headers["content-disposition"]
+        sheet = load_workbook(io.BytesIO(response.content), read_only=True).active
+        rows = list(sheet.iter_rows(values_only=True))
+        assert rows[0][0] == "Trainee Username"
+        assert rows[2] == ("alice", "Alice", "2", "Completed", 100.0, 100.0, T0)
+
+    def test_user_without_progress_gets_placeholder_row(self, client, admin_token, export_data):
+        response = client.get(self.ENDPOINT, headers=auth_headers(admin_token), params={"user_id": export_data["dave"]})
+        rows = list(csv.reader(io.StringIO(response.text)))
+        assert rows[1][:3] == ["dave", "Dave", "N/A"]
+
+    def test_unknown_user_is_404(self, client, admin_token):
+        assert client.get(self.ENDPOINT, headers=auth_headers(admin_token), params={"user_id": 9999}).status_code == 404
@@ -0,0 +1,180 @@
+"""
+test_uploads.py — Tests for the resumable chunked upload API (/api/v1/uploads).
+"""
+
+import io
+import os
+import hashlib
+import zipfile
+
+import pytest
+from datetime import datetime
+from fastapi import HTTPException
+
+from backend.models import AssessmentTask, AssessmentSubmission, FileBlob
+from backend.routers import uploads
+from backend.services import storage_service, upload_sessions
+from .conftest import auth_headers
+
+DATA = bytes(range(256)) * 9  # 2304 bytes -> 5 chunks of 512
+
+
+@pytest.fixture(autouse=True)
+def small_chunks(tmp_path, monkeypatch):
+    monkeypatch.setenv("UPLOAD_DIR", str(tmp_path))
+    monkeypatch.setattr(upload_sessions, "RESUMABLE_CHUNK_SIZE", 512)
+
+
+@pytest.fixture()
+def seed_task(db) -> AssessmentTask:
+    task = AssessmentTask(set_number=1, task_code="A1", title="Unit 1A", order=0, created_at=datetime.now())
+    db.add(task)
+    db.commit()
+    db.refresh(task)
+    return task
+
+
+def _put(client, token, upload_id, offset, data, checksum=None):
+    return client.put(
+        f"/api/v1/uploads/{upload_id}?offset={offset}",
+        content=data,
+        headers={**auth_headers(token), "X-Chunk-SHA256": checksum or hashlib.sha256(data).hexdigest()},
+    )
+
+
+def _start(client, token, **body):
+    response = client.post("/api/v1/uploads/", json=body, headers=auth_headers(token))
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+class TestResumableSubmission:
+
+    def test_chunks_in_any_order_then_finalize(self, client, db, trainee_token, trainee_user, seed_task):
+        upload = _start(client, trainee_token, filename="assembly.zip", size=len(DATA), purpose="submission",
+                        task_id=seed_task.id, sha256=hashlib.sha256(DATA).hexdigest())
+        assert upload["chunk_count"] == 5
+
+        for offset in (2048, 0, 1024):
+            assert _put(client, trainee_token, upload["upload_id"], offset, DATA[offset:offset + 512]).status_code == 200
+
+        # Connection dropped; the client asks what made it and sends the rest
+        status = client.get(f"/api/v1/uploads/{upload['upload_id']}", headers=auth_headers(trainee_token)).json()
+        assert status["received"] == [0, 2, 4]
+        incomplete = client.post(f"/api/v1/uploads/{upload['upload_id']}/finalize", headers=auth_headers(trainee_token))
+        assert incomplete.status_code == 409
+
+        for index in (1, 3):
+            _put(client, trainee_token, upload["upload_id"], index * 512, DATA[index * 512:(index + 1) * 512])
+        response = client.post(f"/api/v1/uploads/{upload['upload_id']}/finalize", headers=auth_headers(trainee_token))
+
+        assert response.status_code == 200, response.text
+        assert response.json()["submission_file_path"].endswith("assembly.zip")
+        submission = db.query(AssessmentSubmission).one()
+        assert submission.user_id == trainee_user.id and submission.status == "pending"
+        assert db.query(FileBlob).one().sha256 == hashlib.sha256(DATA).hexdigest()
+        gone = client.get(f"/api/v1/uploads/{upload['upload_id']}", headers=auth_headers(trainee_token))
+        assert gone.status_code == 404
+
+    def test_failed_finalize_can_be_retried(self, client, db, admin_token, trainee_token, seed_task, monkeypatch):
+        record_submission = uploads.record_submission
+        calls = []
+
+        async def fails_once(*args, **kwargs):
+            calls.append(args)
+            if len(calls) == 1:
+                raise HTTPException(status_code=503, detail="Database unavailable")
+            return await record_submission(*args, **kwargs)
+
+        monkeypatch.setattr(uploads, "record_submission", fails_once)
+        upload = _start(client, trainee_token, filename="assembly.zip", size=len(DATA), purpose="submission",
+                        task_id=seed_task.id)
+        for offset in range(0, len(DATA), 512):
+            _put(client, trainee_token, upload["upload_id"], offset, DATA[offset:offset + 512])
+        url = f"/api/v1/uploads/{upload['upload_id']}/finalize"
+
+        # The first attempt already moved the file into the blob store
+        assert client.post(url, headers=auth_headers(trainee_token)).status_code == 503
+        response = client.post(url, headers=auth_headers(trainee_token))
+
+        assert response.status_code == 200, response.text
+        assert db.query(AssessmentSubmission).count() == 1
+        download = client.get(f"/api/v1/assessments/submissions/{response.json()['id']}/download",
+                              headers=auth_headers(admin_token))
+        assert download.content == DATA
+
+    def test_corrupt_chunk_is_rejected_and_can_be_resent(self, client, trainee_token, seed_task):
+        upload = _start(client, trainee_token, filename="part.dwg", size=600, purpose="submission", task_id=seed_task.id)
+        chunk = b"x" * 512
+
+        bad = _put(client, trainee_token, upload["upload_id"], 0, chunk, checksum=hashlib.sha256(b"other").hexdigest())
+        assert bad.status_code == 400
+        assert bad.json()["detail"] == "Chunk 0 checksum mismatch"
+        assert _put(client, trainee_token, upload["upload_id"], 0, chunk).json()["received"] == [0]
+        assert _put(client, trainee_token, upload["upload_id"], 100, b"y" * 88).status_code == 400  # misaligned
+        assert _put(client, trainee_token, upload["upload_id"], 512, b"y" * 100).status_code == 413  # last chunk is 88
+
+    def test_sessions_are_private_to_their_owner(self, client, trainee_token, employee_token, seed_task):
+        upload = _start(client, trainee_token, filename="part.dwg", size=10, purpose="submission", task_id=seed_task.id)
+        response = client.get(f"/api/v1/uploads/{upload['upload_id']}", headers=auth_headers(employee_token))
+        assert response.status_code == 404
+
+    def test_oversized_file_is_refused_up_front(self, client, trainee_token, seed_task):
+        response = client.post("/api/v1/uploads/", json={
+            "filename": "part.dwg", "size": 10 ** 12, "purpose": "submission", "task_id": seed_task.id,
+        }, headers=auth_headers(trainee_token))
+        assert response.status_code == 413
+
+
+class TestResumableMasterUnit:
+
+    def test_trainee_cannot_upload_master_units(self, client, trainee_token):
+        response = client.post("/api/v1/uploads/", json={
+            "filename": "FH26130N01.dwg", "size": 10, "purpose": "task", "set_number": 3,
+        }, headers=auth_headers(trainee_token))
+        assert response.status_code == 403
+
+    def test_finalize_creates_the_next_unit(self, client, db, admin_token, seed_task):
+        upload = _start(client, admin_token, filename="FH26130N01.dwg", size=len(DATA), purpose="task",
+                        set_number=1, is_assembly=True)
+        for offset in range(0, len(DATA), 512):
+            _put(client, admin_token, upload["upload_id"], offset, DATA[offset:offset + 512])
+
+        response = client.post(f"/api/v1/uploads/{upload['upload_id']}/finalize", headers=auth_headers(admin_token))
+
+        assert response.status_code == 200, response.text
+        body = response.json()
+        assert body["title"] == "Fh26130N01"
+        assert body["master_file_path"].endswith("A1_FH26130N01.dwg")
+        assert db.query(AssessmentTask).count() == 2
+        download = client.get(f"/api/v1/assessments/tasks/{body['id']}/download", headers=auth_headers(admin_token))
+        assert download.content == DATA
+
+    def test_failed_zip_extraction_can_be_retried(self, client, db, admin_token, seed_task, monkeypatch, tmp_path):
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, "w") as archive:
+            archive.writestr("2655RCGR.dwg", DATA)
+        content = buffer.getvalue()
+        extract_zip = storage_service._extract_zip
+        calls = []
+
+        def fails_once(zip_path, extract_dir):
+            extract_zip(zip_path, extract_dir)  # deletes the zip it was given
+            calls.append(zip_path)
+            if len(calls) == 1:
+                raise HTTPException(status_code=503, detail="Database unavailable")
+
+        monkeypatch.setattr(storage_service, "_extract_zip", fails_once)
+        upload = _start(client, admin_token, filename="2655RCGR.zip", size=len(content), purpose="task",
+                        set_number=1, is_assembly=True)
+        for offset in range(0, len(content), 512):
+            _put(client, admin_token, upload["upload_id"], offset, content[offset:offset + 512])
+        url = f"/api/v1/uploads/{upload['upload_id']}/finalize"
+
+        assert client.post(url, headers=auth_headers(admin_token)).status_code == 503
+        response = client.post(url, headers=auth_headers(admin_token))
+
+        assert response.status_code == 200, response.text
+        assert db.query(AssessmentTask).count() == 2
+        assert (tmp_path / "master_units" / "set1" / "A1_2655RCGR" / "2655RCGR.dwg").read_bytes() == DATA
+        assert os.listdir(tmp_path / "cas" / "tmp") == []  # neither the copy nor the original is left behind
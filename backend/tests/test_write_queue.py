@@ -0,0 +1,50 @@
+"""
+test_write_queue.py — Tests for the single-writer group-commit queue.
+"""
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from backend.database import Base
+from backend.models import User, UserActivity
+from backend.services.progress_service import record_user_activity
+from backend.write_queue import WriteQueue
+
+
+@pytest.fixture()
+def Session():
+    engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(bind=engine, autoflush=False)
+    with Session() as db:
+        db.add(User(id=1, username="queue_user", email="q@test.kmti", hashed_password="x"))
+        db.commit()
+    yield Session
+    engine.dispose()
+
+
+def test_jobs_are_group_committed(Session):
+    writer = WriteQueue(session_factory=Session, batch_window=0.5)
+    futures = [writer.submit(lambda db, n=n: record_user_activity(db, 1, f"Lesson {n}")) for n in range(5)]
+    writer.flush(timeout=5)
+
+    assert all(f.done() and f.exception() is None for f in futures)
+    assert writer.batches_committed <= 2
+    with Session() as db:
+        # Later jobs saw the row added by the first one: a single upserted row, last value wins
+        rows = db.query(UserActivity).all()
+        assert [r.current_activity for r in rows] == ["Lesson 4"]
+
+
+def test_failing_job_does_not_sink_batch(Session):
+    writer = WriteQueue(session_factory=Session, batch_window=0.5)
+    good = writer.submit(lambda db: record_user_activity(db, 1, "Quiz"))
+    bad = writer.submit(lambda db: db.add(User(id=1, username="duplicate", email="d@test.kmti", hashed_password="x")))
+    writer.flush(timeout=5)
+
+    assert good.exception() is None
+    assert bad.exception() is not None
+    with Session() as db:
+        assert db.query(UserActivity).count() == 1
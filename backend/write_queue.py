@@ -0,0 +1,124 @@
+"""
+Single writer thread for the high-frequency writes: heartbeats and activity
+(fire-and-forget, always) and quiz submissions (awaited, whenever DB_MODE isn't
+"mysql").
+
+On the SQLite fallback every request thread competing for the one write lock turns
+into "database is locked" retries and one fsync per tiny commit. Jobs submitted here
+are applied by one dedicated thread that drains the queue in batches and commits
+each batch once (group commit). Jobs run in an ORM session, so the change journal
+still records them while MySQL is down. Occasional admin and trainer writes still
+commit on the request thread; scripts/benchmark_sqlite_writes.py measures the mix
+this queue is for.
+"""
+
+import os
+import queue
+import threading
+import time
+import logging
+from concurrent.futures import Future
+
+try:
+    from .database import SessionLocal
+except ImportError:
+    from database import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+WRITE_BATCH_MAX = int(os.getenv("WRITE_BATCH_MAX", "200"))
+WRITE_BATCH_WINDOW = float(os.getenv("WRITE_BATCH_WINDOW_MS", "20")) / 1000
+
+
+class WriteQueue:
+    """
+    submit(job) enqueues job(session) and returns a Future with its result.
+
+    The writer waits up to batch_window after the first job for more to arrive (at
+    most batch_max), runs them in order in one session, flushing after each so later
+    jobs see earlier ones, and commits once. If the batch commit fails, the jobs are
+    retried one per transaction so a single bad job cannot sink the others.
+    """
+
+    def __init__(self, session_factory=SessionLocal, batch_max: int = WRITE_BATCH_MAX, batch_window: float = WRITE_BATCH_WINDOW):
+        self.session_factory = session_factory
+        self.batch_max = batch_max
+        self.batch_window = batch_window
+        self.batches_committed = 0
+        self.jobs_committed = 0
+        self._queue = queue.Queue()
+        self._thread = None
+        self._start_lock = threading.Lock()
+
+    def submit(self, job) -> Future:
+        self.start()
+        future = Future()
+        self._queue.put((job, future))
+        return future
+
+    def flush(self, timeout: float = None):
+        """Block until everything submitted so far has been applied."""
+        self.submit(lambda session: None).result(timeout)
+
+    def _next_batch(self):
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.batch_window
+        while len(batch) < self.batch_max:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _apply(self, batch):
+        session = self.session_factory()
+        try:
+            results = []
+            for job, _ in batch:
+                results.append(job(session))
+                session.flush()
+            session.commit()
+        except Exception as e:
+            session.rollback()
+            session.close()
+            if len(batch) > 1:
+                logger.warning(f"Batched write failed ({e}); retrying {len(batch)} job(s) individually")
+                for item in batch:
+                    self._apply([item])
+            else:
+                batch[0][1].set_exception(e)
+            return
+        finally:
+            session.close()
+
+        self.batches_committed += 1
+        self.jobs_committed += len(batch)
+        for (_, future), result in zip(batch, results):
+            future.set_result(result)
+
+    def _run(self):
+        logger.info("Write queue thread started.")
+        while True:
+            batch = self._next_batch()
+            try:
+                self._apply(batch)
+            except Exception as e:
+                logger.error(f"Error in write queue: {e}")
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+
+    def start(self):
+        """Start the writer thread (idempotent; submit() calls it lazily)."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._start_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, daemon=True, name="DBWriteQueue")
+                self._thread.start()
+
+
+write_queue = WriteQueue()
@@ -112,6 +112,8 @@ function AppContent() {
         notificationTriggered = true;
       } else if (data.event === "GLOBAL_REFRESH") {
         window.dispatchEvent(new CustomEvent('kmti-global-refresh'));
+      } else if (data.event === "DB_MODE_CHANGED") {
+        setDbStatus({ db_mode: data.db_mode, nas_reachable: data.nas_reachable });
       }
       if (notificationTriggered) {
         fetchUnreadCount();
@@ -133,10 +135,8 @@ function AppContent() {
   };
 
   useEffect(() => {
+    // Initial status only; later changes are pushed as DB_MODE_CHANGED over the websocket
     fetchStatus();
-    // Check status every 2 minutes
-    const interval = setInterval(fetchStatus, 120000);
-    return () => clearInterval(interval);
   }, []);
 
   // Theme Management
@@ -128,15 +128,15 @@ export const adminService = {
         await api.post('/admin/reindex');
     },
 
-    async downloadProgressExport(userId?: number): Promise<void> {
+    async downloadProgressExport(userId?: number, format: 'csv' | 'xlsx' = 'csv'): Promise<void> {
         const response = await api.get('/admin/export/progress', {
-            params: { user_id: userId },
+            params: { user_id: userId, format },
             responseType: 'blob'
         });
         const url = window.URL.createObjectURL(new Blob([response.data]));
         const link = document.createElement('a');
         link.href = url;
-        const filename = userId ? `trainee_report_${userId}.csv` : 'trainee_progress.csv';
+        const filename = userId ? `trainee_report_${userId}.${format}` : `trainee_progress.${format}`;
         link.setAttribute('download', filename);
         document.body.appendChild(link);
         link.click();
@@ -31,6 +31,114 @@ export interface AssessmentSubmission {
     feedback?: any[];
 }
 
+export interface AssessmentSubmissionSummary {
+    id: number;
+    user_id: number;
+    username: string;
+    full_name?: string;
+    task_id: number;
+    set_number?: number;
+    task_code?: string;
+    task_title?: string;
+    assessment_type: '3D' | '2D';
+    status: 'pending' | 'approved' | 'rejected';
+    trainer_id?: number;
+    submitted_at: string;
+    updated_at?: string;
+    feedback_count: number;
+}
+
+export interface SubmissionInboxFilters {
+    status?: string;
+    trainee_id?: number;
+    set_number?: number;
+    task_id?: number;
+    assessment_type?: '3D' | '2D';
+}
+
+export interface TaskFileNode {
+    name: string;
+    path: string;
+    is_dir: boolean;
+    modified_at: string;
+    size?: number;
+    child_count?: number;
+    children?: TaskFileNode[];
+}
+
+export type ResumableUploadTarget =
+    | { purpose: 'submission'; task_id: number; assessment_type?: '3D' | '2D' }
+    | { purpose: 'task'; set_number: number; set_name?: string; is_assembly?: boolean; assessment_type?: string };
+
+interface UploadSession {
+    upload_id: string;
+    chunk_size: number;
+    chunk_count: number;
+    received: number[];
+}
+
+const UPLOAD_PARALLELISM = 3;
+const UPLOAD_CHUNK_RETRIES = 3;
+
+const sha256Hex = async (data: ArrayBuffer): Promise<string> => {
+    const digest = await crypto.subtle.digest('SHA-256', data);
+    return Array.from(new Uint8Array(digest)).map(b => b.toString(16).padStart(2, '0')).join('');
+};
+
+const resumableKey = (file: File, target: ResumableUploadTarget) =>
+    `resumable-upload:${JSON.stringify(target)}:${file.name}:${file.size}:${file.lastModified}`;
+
+/**
+ * Upload a file in checksummed chunks, a few in parallel, resuming an earlier session for
+ * the same file and target if one is still on the server, then finalize it.
+ * Resolves with the finalize response (the submission, or the created unit).
+ */
+const uploadResumable = async (file: File, target: ResumableUploadTarget, onProgress?: (fraction: number) => void) => {
+    const key = resumableKey(file, target);
+    let session: UploadSession | null = null;
+    const previousId = localStorage.getItem(key);
+    if (previousId) {
+        session = await api.get(`/api/v1/uploads/${previousId}`).then(r => r.data).catch(() => null);
+    }
+    if (!session) {
+        session = (await api.post('/api/v1/uploads/', { filename: file.name, size: file.size, ...target })).data as UploadSession;
+        localStorage.setItem(key, session.upload_id);
+    }
+
+    const { upload_id, chunk_size, chunk_count } = session;
+    const pending = Array.from({ length: chunk_count }, (_, i) => i).filter(i => !session!.received.includes(i));
+    let done = chunk_count - pending.length;
+    onProgress?.(done / chunk_count);
+
+    const sendChunk = async (index: number) => {
+        const offset = index * chunk_size;
+        const data = await file.slice(offset, offset + chunk_size).arrayBuffer();
+        const checksum = await sha256Hex(data);
+        for (let attempt = 1; ; attempt++) {
+            try {
+                await api.put(`/api/v1/uploads/${upload_id}`, data, {
+                    params: { offset },
+                    headers: { 'Content-Type': 'application/octet-stream', 'X-Chunk-SHA256': checksum },
+                });
+                break;
+            } catch (err) {
+                if (attempt >= UPLOAD_CHUNK_RETRIES) throw err;
+            }
+        }
+        onProgress?.(++done / chunk_count);
+    };
+    const worker = async () => {
+        for (let index = pending.shift(); index !== undefined; index = pending.shift()) {
+            await sendChunk(index);
+        }
+    };
+    await Promise.all(Array.from({ length: Math.min(UPLOAD_PARALLELISM, pending.length) }, worker));
+
+    const response = await api.post(`/api/v1/uploads/${upload_id}/finalize`, null, { timeout: 300000 });
+    localStorage.removeItem(key);
+    return response.data;
+};
+
 export const assessmentService = {
     getTasks: async (): Promise<AssessmentTask[]> => {
         return cachedGet('/api/v1/assessments/tasks');
@@ -52,6 +160,19 @@ export const assessmentService = {
         return response.data;
     },
 
+    getSetBundleBlob: async (setNumber: number, assessmentType: '3D' | '2D' = '3D'): Promise<Blob> => {
+        const response = await api.get(`/api/v1/assessments/sets/${setNumber}/bundle`, {
+            params: { assessment_type: assessmentType },
+            responseType: 'blob',
+            timeout: 600000  // every unit of the set in one archive
+        });
+        return response.data;
+    },
+
+    getSetBundleUrl: (setNumber: number, assessmentType: '3D' | '2D' = '3D'): string => {
+        return `${api.defaults.baseURL}/api/v1/assessments/sets/${setNumber}/bundle?assessment_type=${assessmentType}`;
+    },
+
     getDownloadUrl: (taskId: number): string => {
         return `${api.defaults.baseURL}/api/v1/assessments/tasks/${taskId}/download`;
     },
@@ -82,6 +203,33 @@ export const assessmentService = {
         });
     },
 
+    getTrainerSubmissionsPage: async (
+        filters: SubmissionInboxFilters = {},
+        cursor?: string,
+        limit: number = 50
+    ): Promise<{ items: AssessmentSubmissionSummary[]; next_cursor: string | null }> => {
+        const response = await api.get(`/api/v1/assessments/trainer/submissions`, {
+            params: { status: 'all', ...filters, limit, cursor }
+        });
+        return response.data;
+    },
+
+    getTrainerSubmission: async (submissionId: number): Promise<AssessmentSubmission> => {
+        const response = await api.get(`/api/v1/assessments/trainer/submissions/${submissionId}`);
+        return response.data;
+    },
+
+    getSubmissionsArchiveBlob: async (
+        filters: SubmissionInboxFilters & { submitted_from?: string; submitted_to?: string } = {}
+    ): Promise<Blob> => {
+        const response = await api.get(`/api/v1/assessments/trainer/submissions/archive`, {
+            params: { status: 'all', ...filters },
+            responseType: 'blob',
+            timeout: 0  // streamed while it is built; a whole set can take a while
+        });
+        return response.data;
+    },
+
     provideFeedback: async (submissionId: number, status: 'approved' | 'rejected', file?: File, comments?: string) => {
         const formData = new FormData();
         formData.append('status', status);
@@ -147,6 +295,29 @@ export const assessmentService = {
         return response.data;
     },
 
+    /** submitTask over the resumable upload API, for large .zip/.rar assemblies. */
+    submitTaskResumable: async (
+        taskId: number, file: File, assessmentType: '3D' | '2D' = '3D', onProgress?: (fraction: number) => void
+    ): Promise<AssessmentSubmission> => {
+        return uploadResumable(file, { purpose: 'submission', task_id: taskId, assessment_type: assessmentType }, onProgress);
+    },
+
+    /** bulkCreateTasks one file at a time over the resumable upload API. */
+    bulkCreateTasksResumable: async (
+        setNumber: number, files: File[], setName?: string, isAssembly: boolean = false, assessmentType: string = '3D',
+        onProgress?: (fraction: number) => void
+    ): Promise<AssessmentTask[]> => {
+        const created: AssessmentTask[] = [];
+        for (const [i, file] of files.entries()) {
+            created.push(await uploadResumable(
+                file,
+                { purpose: 'task', set_number: setNumber, set_name: setName, is_assembly: isAssembly, assessment_type: assessmentType },
+                fraction => onProgress?.((i + fraction) / files.length)
+            ));
+        }
+        return created;
+    },
+
     bulkCreateTasks: async (setNumber: number, files: File[], setName?: string, isAssembly: boolean = false, assessmentType: string = '3D') => {
         const formData = new FormData();
         formData.append('set_number', setNumber.toString());
@@ -204,8 +375,11 @@ export const assessmentService = {
         return response.data;
     },
 
-    getTaskFileTree: async (taskId: number) => {
-        const response = await api.get(`/api/v1/assessments/admin/tasks/${taskId}/files`);
+    getTaskFileTree: async (taskId: number, path?: string): Promise<{ tree: TaskFileNode[]; base_dir?: string; path?: string }> => {
+        // With a path, only that level is listed (folders carry child_count instead of children)
+        const response = await api.get(`/api/v1/assessments/admin/tasks/${taskId}/files`, {
+            params: path === undefined ? {} : { path, lazy: true }
+        });
         return response.data;
     },
 
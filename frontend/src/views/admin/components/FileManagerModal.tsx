@@ -1,6 +1,6 @@
 import React, { useState, useEffect } from 'react';
 import { Folder, File as FileIcon, Upload, FolderPlus, Trash2 } from 'lucide-react';
-import { assessmentService, AssessmentTask } from '../../../services/assessmentService';
+import { assessmentService, AssessmentTask, TaskFileNode } from '../../../services/assessmentService';
 import { useNotification } from '../../../context/NotificationContext';
 import { Modal } from '../../../components/Modal';
 
@@ -11,20 +11,21 @@ interface FileManagerModalProps {
 
 export const FileManagerModal: React.FC<FileManagerModalProps> = ({ task, onClose }) => {
     const { showNotification } = useNotification();
-    const [tree, setTree] = useState<any[]>([]);
+    const [nodes, setNodes] = useState<TaskFileNode[]>([]);
     const [loading, setLoading] = useState(true);
     const [currentPath, setCurrentPath] = useState<string>(''); // empty means root
     const [uploading, setUploading] = useState(false);
 
     useEffect(() => {
         loadTree();
-    }, [task.id]);
+    }, [task.id, currentPath]);
 
+    // One folder level at a time, so large unit folders open without walking the whole share
     const loadTree = async () => {
         setLoading(true);
         try {
-            const data = await assessmentService.getTaskFileTree(task.id);
-            setTree(data.tree || []);
+            const data = await assessmentService.getTaskFileTree(task.id, currentPath);
+            setNodes(data.tree || []);
         } catch (err) {
             showNotification('Failed to load file tree', 'error');
         } finally {
@@ -75,26 +76,12 @@ export const FileManagerModal: React.FC<FileManagerModalProps> = ({ task, onClos
         }
     };
 
-    // Helper to find current directory nodes
-    const getCurrentNodes = () => {
-        if (!currentPath) return tree;
-        
-        const parts = currentPath.split('/');
-        let currentLevel = tree;
-        
-        for (const part of parts) {
-            const node = currentLevel.find(n => n.name === part && n.is_dir);
-            if (node) {
-                currentLevel = node.children || [];
-            } else {
-                return [];
-            }
-        }
-        return currentLevel;
+    const formatSize = (bytes: number) => {
+        if (bytes < 1024) return `${bytes} B`;
+        if (bytes < 1024 * 1024) return `${(bytes / 1024).toFixed(1)} KB`;
+        return `${(bytes / (1024 * 1024)).toFixed(1)} MB`;
     };
 
-    const nodes = getCurrentNodes();
-
     return (
         <Modal
             isOpen={true}
@@ -166,6 +153,14 @@ export const FileManagerModal: React.FC<FileManagerModalProps> = ({ task, onClos
                                                 <span style={{ color: '#d1d5db' }}>{node.name}</span>
                                             )}
                                         </td>
+                                        <td style={{ padding: '0.75rem 1rem', color: '#888', fontSize: '0.85rem', whiteSpace: 'nowrap' }}>
+                                            {node.is_dir
+                                                ? `${node.child_count ?? 0} item${node.child_count === 1 ? '' : 's'}`
+                                                : formatSize(node.size ?? 0)}
+                                        </td>
+                                        <td style={{ padding: '0.75rem 1rem', color: '#888', fontSize: '0.85rem', whiteSpace: 'nowrap' }}>
+                                            {new Date(node.modified_at).toLocaleString()}
+                                        </td>
                                         <td style={{ padding: '0.75rem 1rem', textAlign: 'right' }}>
                                             <button 
                                                 className="btn-ghost" 